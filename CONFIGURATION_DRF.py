@@ -49,13 +49,13 @@ REST_FRAMEWORK = {
     
     # Format de rendu
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'app.renderers.ORJSONRenderer',  # JSONRenderer basé sur orjson (même sortie, plus rapide)
         'rest_framework.renderers.BrowsableAPIRenderer',  # Interface web de DRF
     ],
     
     # Parsing
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'app.renderers.ORJSONParser',  # JSONParser basé sur orjson
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',  # Pour les uploads de fichiers
     ],
@@ -67,15 +67,11 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     'DATE_FORMAT': '%Y-%m-%d',
     
-    # Throttling (limitation de taux) - optionnel
-    # 'DEFAULT_THROTTLE_CLASSES': [
-    #     'rest_framework.throttling.AnonRateThrottle',
-    #     'rest_framework.throttling.UserRateThrottle'
-    # ],
-    # 'DEFAULT_THROTTLE_RATES': {
-    #     'anon': '100/day',
-    #     'user': '1000/day'
-    # }
+    # Throttling (limitation de taux) : seau à jetons par route et par client,
+    # débits dans THROTTLE_RATES (voir app/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'app.throttling.TokenBucketThrottle',
+    ],
 }
 
 # ============================================================================
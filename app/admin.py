@@ -1,6 +1,54 @@
 from django.contrib import admin
-from .models import Client, Category
+from .inventory import with_available_stock
+from .models import Client, Category, IdempotencyKey, Job, Product, StockAlert, StockMovement
 # Register your models here.
 
 admin.site.register(Client)
 admin.site.register(Category)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_after', 'updated_at']
+    list_filter = ['status', 'name']
+    search_fields = ['idempotency_key']
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    list_display = ['product', 'kind', 'stock', 'threshold', 'created_at']
+    list_filter = ['kind']
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['product', 'delta', 'reason', 'order', 'compacted', 'created_at']
+    list_filter = ['reason', 'compacted']
+    raw_id_fields = ['product', 'order']
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'user', 'status_code', 'created_at', 'expires_at']
+    search_fields = ['key']
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ['name', 'category', 'price', 'available']
+    search_fields = ['name']
+
+    def get_queryset(self, request):
+        return with_available_stock(super().get_queryset(request))
+
+    @admin.display(description='Stock disponible', ordering='available_stock')
+    def available(self, obj):
+        return obj.available_stock
+
+    def get_object(self, request, object_id, from_field=None):
+        # Le formulaire affiche le stock disponible, pas l'instantané (app/inventory.py) ;
+        # une saisie est journalisée comme ajustement par Product.save() (set_stock)
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None:
+            obj.stock = obj.available_stock
+        return obj
@@ -0,0 +1,211 @@
+"""
+📦 ÉCRITURE EN MASSE (back-office : synchronisations de milliers de lignes)
+
+BulkWriteView : une vue par ressource, trois méthodes sur la même URL.
+
+    POST   [{...}, {...}]                  création (bulk_create)
+    PATCH  [{"id": 1, ...}, {...}]         mise à jour partielle (bulk_update)
+    DELETE {"ids": [1, 2, 3]}              suppression
+
+- validation ligne par ligne par le serializer de la ressource (ListSerializer),
+  sans rejeter tout le lot pour une ligne invalide
+- vérifications qui demandent la base faites en une requête pour le lot
+  (check_rows), effets de bord de save() reproduits sur chaque objet
+  (prepare_instance) : bulk_create / bulk_update n'appellent pas save()
+- écriture par paquets de BULK_CHUNK_SIZE, chacun dans sa transaction ; un
+  paquet en conflit est rejoué ligne par ligne (seules les lignes fautives
+  sont en erreur)
+- réponse : un résultat par ligne, dans l'ordre reçu
+      {"index": 0, "status": "created", "id": 12}
+      {"index": 1, "status": "error", "errors": {"email": [...]}}
+"""
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import generics, serializers, status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer qui garde les lignes valides avec leur index (`rows`) et
+    les erreurs par index (`row_errors`) au lieu de lever une erreur globale.
+    `instances` ({pk: objet}) : validation de mises à jour, ligne par ligne.
+    """
+
+    def __init__(self, *args, instances=None, **kwargs):
+        self.instances = instances
+        self.rows = []
+        self.row_errors = {}
+        super().__init__(*args, **kwargs)
+
+    def run_child_validation(self, data):
+        if self.instances is not None:
+            instance = self.instances.get(data.get('id')) if isinstance(data, dict) else None
+            if instance is None:
+                raise serializers.ValidationError({'id': ["Objet introuvable."]})
+            self.child.instance = instance
+            self.child.initial_data = data
+        return self.child.run_validation(data)
+
+    def to_internal_value(self, data):
+        for index, item in enumerate(data):
+            try:
+                self.rows.append((index, self.run_child_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors[index] = exc.detail
+        return [validated for _, validated in self.rows]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkWriteView(generics.GenericAPIView):
+    """
+    Vue d'écriture en masse. Sous-classes : queryset, serializer_class et,
+    si besoin, check_rows() / prepare_instance().
+    """
+    permission_classes = [IsAdminUser]
+    throttle_scope = 'bulk'
+
+    # ---- points d'extension ----------------------------------------------
+
+    def check_rows(self, rows, instances):
+        """Vérifications ensemblistes : {index: erreurs} pour les lignes refusées."""
+        return {}
+
+    def prepare_instance(self, obj):
+        """Effets de bord de Model.save() à reproduire avant bulk_create / bulk_update."""
+
+    # ---- outils ----------------------------------------------------------
+
+    def get_rows(self, request):
+        rows = request.data
+        max_rows = getattr(settings, 'BULK_MAX_ROWS', 5000)
+        if not isinstance(rows, list) or not rows:
+            raise serializers.ValidationError({'detail': "Une liste non vide est attendue."})
+        if len(rows) > max_rows:
+            raise serializers.ValidationError({'detail': f"{max_rows} lignes au plus par requête."})
+        return rows
+
+    def validate_rows(self, rows, instances=None):
+        serializer = BulkListSerializer(
+            child=self.get_serializer(), data=rows, instances=instances,
+            partial=instances is not None, context=self.get_serializer_context(),
+        )
+        serializer.is_valid()
+        errors = dict(serializer.row_errors)
+        valid = serializer.rows
+        errors.update(self.check_rows(valid, instances))
+        return [(index, data) for index, data in valid if index not in errors], errors
+
+    def write_chunks(self, items, write):
+        """
+        Applique write(objets) par paquets ; un paquet en conflit (IntegrityError)
+        est rejoué ligne par ligne, un point de sauvegarde par ligne, pour
+        n'écarter que les lignes fautives. Renvoie les index en échec.
+        """
+        failed = set()
+        for chunk in _chunks(items, getattr(settings, 'BULK_CHUNK_SIZE', 500)):
+            try:
+                with transaction.atomic():
+                    write([obj for _, obj in chunk])
+            except IntegrityError:
+                with transaction.atomic():
+                    for index, obj in chunk:
+                        try:
+                            with transaction.atomic():
+                                write([obj])
+                        except IntegrityError:
+                            failed.add(index)
+        return failed
+
+    def respond(self, results):
+        results.sort(key=lambda result: result['index'])
+        errors = sum(result['status'] == 'error' for result in results)
+        return Response(
+            {'ok': len(results) - errors, 'errors': errors, 'results': results},
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK,
+        )
+
+    def error_results(self, errors):
+        return [{'index': index, 'status': 'error', 'errors': detail} for index, detail in errors.items()]
+
+    # ---- méthodes HTTP ---------------------------------------------------
+
+    def post(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        valid, errors = self.validate_rows(self.get_rows(request))
+        objects = []
+        for index, data in valid:
+            obj = model(**data)
+            self.prepare_instance(obj)
+            objects.append((index, obj))
+
+        failed = self.write_chunks(objects, lambda chunk: model.objects.bulk_create(chunk))
+        results = self.error_results(errors)
+        for index, obj in objects:
+            if index in failed:
+                results.append({'index': index, 'status': 'error', 'errors': {'detail': "Conflit d'écriture."}})
+            else:
+                results.append({'index': index, 'status': 'created', 'id': obj.pk})
+        return self.respond(results)
+
+    def patch(self, request, *args, **kwargs):
+        rows = self.get_rows(request)
+        ids = [row.get('id') for row in rows if isinstance(row, dict)]
+        instances = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        valid, errors = self.validate_rows(rows, instances)
+
+        seen = set()
+        objects = []
+        fields = {'updated_at'}
+        now = timezone.now()
+        for index, data in valid:
+            pk = rows[index]['id']
+            if pk in seen:
+                errors[index] = {'id': ["Objet présent deux fois dans le lot."]}
+                continue
+            seen.add(pk)
+            obj = instances[pk]
+            for name, value in data.items():
+                setattr(obj, name, value)
+            self.prepare_instance(obj)
+            obj.updated_at = now
+            fields.update(data)
+            objects.append((index, obj))
+
+        model = self.get_queryset().model
+        fields = sorted(fields)
+        failed = self.write_chunks(objects, lambda chunk: model.objects.bulk_update(chunk, fields))
+        results = self.error_results(errors)
+        for index, obj in objects:
+            if index in failed:
+                results.append({'index': index, 'status': 'error', 'errors': {'detail': "Conflit d'écriture."}})
+            else:
+                results.append({'index': index, 'status': 'updated', 'id': obj.pk})
+        return self.respond(results)
+
+    def delete(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            raise serializers.ValidationError({'ids': ["Une liste d'identifiants entiers est attendue."]})
+        if len(ids) > getattr(settings, 'BULK_MAX_ROWS', 5000):
+            raise serializers.ValidationError({'ids': [f"{getattr(settings, 'BULK_MAX_ROWS', 5000)} au plus par requête."]})
+
+        existing = set()
+        for chunk in _chunks(ids, getattr(settings, 'BULK_CHUNK_SIZE', 500)):
+            queryset = self.get_queryset().filter(pk__in=chunk)
+            with transaction.atomic():
+                found = set(queryset.values_list('pk', flat=True))
+                queryset.delete()
+            existing |= found
+        return self.respond([
+            {'index': index, 'status': 'deleted', 'id': pk} if pk in existing
+            else {'index': index, 'status': 'error', 'id': pk, 'errors': {'id': ["Objet introuvable."]}}
+            for index, pk in enumerate(ids)
+        ])
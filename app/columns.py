@@ -0,0 +1,108 @@
+"""
+📐 COLONNES CHARGÉES D'APRÈS LE SERIALIZER (only())
+
+Une liste charge par défaut toutes les colonnes de chaque ligne, y compris
+les TextField (description, address...) que le serializer n'affiche pas :
+octets transférés et objets construits pour rien. serializer_columns()
+déduit des champs du serializer (et de leur `source`) les colonnes
+nécessaires ; ReadColumnsMixin les applique avec only() aux listes.
+
+Les SerializerMethodField ne disent pas ce qu'ils lisent : le serializer
+les déclare dans `column_sources` (() : annotation ou relation, aucune
+colonne). Un champ dont les colonnes ne peuvent pas être déduites (méthode
+non déclarée, source='*', propriété du modèle) désactive la restriction :
+toutes les colonnes sont chargées, comme avant.
+
+    class ProductListSerializer(serializers.ModelSerializer):
+        column_sources = {'in_stock': ('stock',), 'thumbnails': ('image',)}
+
+    class ProductViewApi(ReadColumnsMixin, viewsets.ModelViewSet):
+        ...
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+_cache = {}
+
+
+def _source_columns(model, source, select_related):
+    """Colonnes d'une source 'a.b.c', ou None si elle n'est pas un chemin de champs concrets."""
+    columns = []
+    path = []
+    for name in source.split('.'):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many or not field.concrete:
+            return None
+        path.append(name)
+        if not field.is_relation:
+            columns.append('__'.join(path))
+            return columns
+        # Clé étrangère : sa colonne, puis la table liée si elle est jointe
+        columns.append('__'.join(path))
+        related = select_related
+        for step in path:
+            related = related.get(step) if isinstance(related, dict) else related
+        if related is not True and not isinstance(related, dict):
+            return columns
+        model = field.related_model
+    return columns
+
+
+def serializer_columns(serializer_class, model, select_related=False):
+    """
+    Colonnes (chemins only()) lues par `serializer_class` sur `model`, ou None
+    si au moins un champ lit quelque chose qu'on ne sait pas déduire.
+    `select_related` : celui du queryset (tables liées jointes).
+    """
+    key = (serializer_class, model, repr(select_related))
+    if key in _cache:
+        return _cache[key]
+
+    declared = getattr(serializer_class, 'column_sources', {})
+    columns = {model._meta.pk.name}
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if name in declared:
+            columns.update(declared[name])
+            continue
+        if isinstance(field, serializers.HyperlinkedIdentityField):
+            columns.add(model._meta.pk.name if field.lookup_field == 'pk' else field.lookup_field)
+            continue
+        if isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            columns = None
+            break
+        found = _source_columns(model, field.source, select_related)
+        if found is None:
+            columns = None
+            break
+        columns.update(found)
+
+    _cache[key] = columns if columns is None else sorted(columns)
+    return _cache[key]
+
+
+def restrict_columns(queryset, serializer_class):
+    """queryset.only(...) sur les colonnes lues par le serializer, si elles sont déductibles."""
+    columns = serializer_columns(serializer_class, queryset.model, queryset.query.select_related)
+    return queryset if columns is None else queryset.only(*columns)
+
+
+class ReadColumnsMixin:
+    """
+    Mixin de ViewSet : pour les actions de `read_columns_actions` (listes par
+    défaut), ne charge que les colonnes du serializer de l'action.
+    """
+
+    read_columns_actions = ('list',)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'action', None) in self.read_columns_actions:
+            queryset = restrict_columns(queryset, self.get_serializer_class())
+        return queryset
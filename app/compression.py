@@ -0,0 +1,135 @@
+"""
+🗜️ COMPRESSION DES RÉPONSES (br / gzip)
+
+Négociation de Content-Encoding à partir de l'en-tête Accept-Encoding et
+compression des corps de réponse, y compris des StreamingHttpResponse.
+Utilisé par app.middleware.CompressionMiddleware.
+
+Brotli est optionnel (pip install Brotli) : sans lui, seul gzip est proposé.
+"""
+
+import gzip
+import zlib
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # Brotli non installé : gzip uniquement
+    brotli = None
+
+
+# Préférence du serveur à qualité égale
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# Contenus déjà compressés : les recompresser coûte du CPU pour rien
+DEFAULT_EXCLUDED_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff',
+    'application/zip', 'application/gzip', 'application/x-gzip',
+    'application/pdf', 'application/octet-stream',
+)
+
+
+def parse_accept_encoding(header):
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    qualities = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def negotiate_encoding(header):
+    """Meilleur encodage accepté par le client, ou None."""
+    if not header:
+        return None
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def is_excluded_type(content_type):
+    excluded = getattr(settings, 'COMPRESSION_EXCLUDED_TYPES', DEFAULT_EXCLUDED_TYPES)
+    content_type = content_type.lower()
+    return any(content_type.startswith(prefix) for prefix in excluded)
+
+
+def is_html(content_type):
+    """
+    Pages HTML (API navigable) : elles portent le jeton CSRF à côté de données
+    que l'utilisateur contrôle, ce que l'attaque BREACH exploite en mesurant
+    la taille compressée. Elles ne sont pas compressées.
+    """
+    return content_type.lower().startswith('text/html')
+
+
+def url_path_prefix(url):
+    """
+    Préfixe de chemin de MEDIA_URL / STATIC_URL comparable à request.path :
+    'static/' -> '/static/'. None pour une URL absolue sur un autre hôte (CDN).
+    """
+    if not url:
+        return None
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    return '/' + parts.path.lstrip('/')
+
+
+def peek_stream(chunks, min_size):
+    """
+    Lit un flux jusqu'à `min_size` octets : (morceaux lus, itérateur du reste),
+    le reste valant None si le flux s'est terminé avant le seuil.
+    """
+    chunks = iter(chunks)
+    head, size = [], 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            return head, chunks
+    return head, None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+    return gzip.compress(data, compresslevel=getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compresse un itérable de morceaux au fil de l'eau : chaque morceau est
+    vidé (flush) pour que le client reçoive les données sans attendre la fin.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        # wbits = 16 + MAX_WBITS : en-tête et trailer gzip
+        compressor = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
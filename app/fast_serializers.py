@@ -0,0 +1,180 @@
+"""
+⚡ SERIALIZERS RAPIDES EN LECTURE SEULE POUR LES LISTES
+
+Les ModelSerializer paient, pour chaque ligne et chaque champ, get_attribute()
++ to_representation(). Pour les grandes pages de liste, ces classes :
+1. récupèrent exactement les colonnes nécessaires avec values_list()
+   (jointures et agrégats faits par la base, pas de N+1)
+2. transforment chaque tuple avec une fonction de ligne précompilée
+3. produisent EXACTEMENT les mêmes données que le serializer DRF équivalent
+
+Chaque classe indique le serializer qu'elle remplace (drf_serializer) : la
+commande bench_list_serializers vérifie l'égalité des sorties.
+
+Désactivation : FAST_LIST_SERIALIZERS = False dans settings.py
+"""
+
+from decimal import Decimal
+from time import perf_counter
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from .images import FORMATS
+from .inventory import pending_stock
+from .serializer_profiling import current_profile
+from .serializers import OrderListSerializer, ProductListSerializer
+
+
+# Accepté par les convertisseurs <int:pk> ; découpé à sa dernière occurrence
+_PK_PLACEHOLDER = '9876543210'
+
+
+def _decimal_formatter():
+    """Équivalent de serializers.DecimalField.to_representation pour des valeurs déjà arrondies par la base."""
+    if api_settings.COERCE_DECIMAL_TO_STRING:
+        return lambda value: None if value is None else format(value, 'f')
+    return lambda value: value
+
+
+class FastListSerializer:
+    """
+    Base : une sous-classe définit `columns` (chemins values_list), éventuellement
+    `annotations`, et `build_row()` qui renvoie la fonction tuple -> dict.
+    """
+
+    drf_serializer = None
+    columns = ()
+    # Champs pouvant contenir un flottant (vérifiés par ORJSONRenderer) : aucun,
+    # les lignes ne contiennent que des chaînes, entiers, booléens et Decimal
+    float_fields = {}
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.row = self.build_row()
+
+    def get_annotations(self):
+        return {}
+
+    def get_queryset(self, queryset):
+        # prefetch_related n'a pas de sens sur values_list()
+        queryset = queryset.prefetch_related(None).annotate(**self.get_annotations())
+        # Meta.ordering est ignoré dès qu'il y a un GROUP BY : on le rend explicite
+        if not queryset.query.order_by and queryset.model._meta.ordering:
+            queryset = queryset.order_by(*queryset.model._meta.ordering)
+        return queryset.values_list(*self.columns)
+
+    def build_row(self):
+        raise NotImplementedError
+
+    def serialize(self, rows):
+        row = self.row
+        profile = current_profile()
+        if profile is None:
+            return ReturnList([row(values) for values in rows], serializer=self)
+
+        # Profilage : une entrée 'Classe.row' (pas de champs séparés), lecture des lignes comprise
+        start = perf_counter()
+        queries = profile.queries
+        rows = list(rows)
+        data = [row(values) for values in rows]
+        profile.record(f"{type(self).__name__}.row", perf_counter() - start, profile.queries - queries, len(rows))
+        return ReturnList(data, serializer=self)
+
+
+class ProductListFastSerializer(FastListSerializer):
+    """Remplace ProductListSerializer (GET /api/v1/product/)."""
+
+    drf_serializer = ProductListSerializer
+    columns = ('id', 'name', 'price', 'category__name', 'fast_available_stock', 'image')
+
+    def get_annotations(self):
+        # in_stock porte sur le stock disponible, pas sur l'instantané (app/inventory.py)
+        return {'fast_available_stock': F('stock') + pending_stock()}
+
+    def build_row(self):
+        price = _decimal_formatter()
+        request = self.context.get('request')
+        url = reverse('product-detail', kwargs={'pk': _PK_PLACEHOLDER}, request=request)
+        url_prefix, url_suffix = url.rsplit(_PK_PLACEHOLDER, 1)
+        thumbnail_urls = {
+            ext: reverse('product-image', kwargs={'pk': _PK_PLACEHOLDER, 'variant': 'thumb', 'ext': ext},
+                         request=request).rsplit(_PK_PLACEHOLDER, 1)
+            for ext in FORMATS
+        }
+
+        def row(values):
+            pk, name, raw_price, category_name, stock, image = values
+            return {
+                'id': pk,
+                'name': name,
+                'price': price(raw_price),
+                'category_name': category_name,
+                'in_stock': stock > 0,
+                'url': f"{url_prefix}{pk}{url_suffix}",
+                'thumbnails': {
+                    ext: f"{prefix}{pk}{suffix}" for ext, (prefix, suffix) in thumbnail_urls.items()
+                } if image else None,
+            }
+        return row
+
+
+class OrderListFastSerializer(FastListSerializer):
+    """Remplace OrderListSerializer (GET /api/v1/orders/)."""
+
+    drf_serializer = OrderListSerializer
+    columns = ('order_id', 'client__first_name', 'client__last_name', 'status', 'created_at',
+               'fast_items_count', 'fast_total_amount')
+
+    def get_annotations(self):
+        return {
+            'fast_items_count': Count('items'),
+            'fast_total_amount': Coalesce(
+                Sum(F('items__quantity') * F('items__product__price'),
+                    output_field=DecimalField(max_digits=20, decimal_places=2)),
+                Decimal('0'),
+                output_field=DecimalField(max_digits=20, decimal_places=2),
+            ),
+        }
+
+    def build_row(self):
+        created_at = serializers.DateTimeField().to_representation
+
+        def row(values):
+            order_id, first_name, last_name, status, created, items_count, total = values
+            return {
+                'order_id': str(order_id),
+                'client_name': f"{first_name or ''} {last_name or ''}".strip() or None,
+                'status': status,
+                'created_at': created_at(created),
+                'items_count': items_count,
+                # get_total_amount renvoie l'entier 0 quand il n'y a aucun article
+                'total_amount': total if items_count else 0,
+            }
+        return row
+
+
+class FastListMixin:
+    """
+    Mixin de ViewSet : list() passe par `fast_list_serializer_class` au lieu
+    du ModelSerializer, pagination et filtres compris.
+    """
+
+    fast_list_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_list_serializer_class is None or not getattr(settings, 'FAST_LIST_SERIALIZERS', True):
+            return super().list(request, *args, **kwargs)
+
+        fast_serializer = self.fast_list_serializer_class(context=self.get_serializer_context())
+        rows = fast_serializer.get_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.serialize(page))
+        return Response(fast_serializer.serialize(rows))
@@ -0,0 +1,153 @@
+"""
+🔁 CLÉS D'IDEMPOTENCE (réessais des clients mobiles)
+
+Un client qui renvoie POST /api/v1/orders/ après un délai dépassé ne doit
+pas créer une deuxième commande ni réserver deux fois le stock. Avec un
+en-tête `Idempotency-Key`, la première requête est exécutée et sa réponse
+mémorisée ; les suivantes (même utilisateur, même clé) la reçoivent telle
+quelle, sans rien réexécuter : une lecture par l'index unique (user, key).
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        ...
+
+- la clé est insérée dans la même transaction que le traitement, et n'est
+  visible qu'une fois validée avec sa réponse : deux envois simultanés ne
+  passent pas tous les deux (le second attend le commit du premier sur
+  l'index unique, puis reçoit sa réponse ; si le premier échoue, le second
+  s'exécute)
+- même clé, autre requête (corps brut ou URL différents) : 422
+- seules les réponses réussies (< 400) sont mémorisées : après une erreur,
+  la même clé peut être renvoyée
+- les clés expirent après IDEMPOTENCY_TTL ; la tâche 'idempotency.purge'
+  (ou `python manage.py purge_idempotency_keys`) supprime les expirées
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import QueryDict
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+from .tasks import enqueue
+
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+_last_purge_bucket = None
+
+
+def _file_digest(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return f"{upload.name}:{upload.size}:{digest.hexdigest()}"
+
+
+def request_fingerprint(request, scope):
+    """
+    Empreinte de la requête : action, chemin et corps brut (tel qu'envoyé,
+    fichiers compris). Si le flux a déjà été lu par un parseur multipart
+    (vérification CSRF...), les champs parsés, fichiers remplacés par leur
+    nom, taille et hash.
+    """
+    digest = hashlib.sha256(f"{scope}\n{request.path}\n".encode())
+    try:
+        digest.update(request.body)
+    except RawPostDataException:
+        data = request.data
+        if isinstance(data, QueryDict):
+            data = dict(data.lists())
+        files = {name: [_file_digest(upload) for upload in uploads] for name, uploads in request.FILES.lists()}
+        data = {name: value for name, value in data.items() if name not in files}
+        digest.update(json.dumps({'data': data, 'files': files}, sort_keys=True, cls=JSONEncoder).encode())
+    return digest.hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response({'error': "Clé d'idempotence déjà utilisée pour une autre requête"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(record.response, status=record.status_code, headers={REPLAY_HEADER: 'true'})
+
+
+def schedule_purge():
+    """Met en file une purge des clés expirées, au plus une par heure et par processus."""
+    global _last_purge_bucket
+    bucket = int(timezone.now().timestamp()) // 3600
+    if bucket == _last_purge_bucket:
+        return
+    _last_purge_bucket = bucket
+    transaction.on_commit(lambda: enqueue('idempotency.purge', idempotency_key=f"idempotency.purge:{bucket}"))
+
+
+def purge_expired_keys(batch=1000):
+    """Supprime les clés expirées par lots (index idempotency_expires_idx). Renvoie le nombre supprimé."""
+    purged = 0
+    now = timezone.now()
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list('pk', flat=True)[:batch])
+        if not ids:
+            return purged
+        purged += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+
+
+def idempotent(method):
+    """
+    Décorateur d'action de ViewSet : rejoue la réponse mémorisée si la requête
+    porte une clé déjà vue. Sans en-tête (ou anonyme), la vue s'exécute normalement.
+    """
+    scope = method.__qualname__
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return method(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': "Clé d'idempotence trop longue (255 caractères au plus)"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request, scope)
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+        if record is not None:
+            if record.expires_at > timezone.now():
+                return _replay(record, fingerprint)
+            record.delete()
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, fingerprint=fingerprint,
+                        expires_at=timezone.now() + getattr(settings, 'IDEMPOTENCY_TTL', timedelta(hours=24)),
+                    )
+            except IntegrityError:
+                # Même clé validée entre-temps par une requête concurrente (attendue
+                # sur l'index unique) : sa réponse
+                return _replay(IdempotencyKey.objects.get(user=request.user, key=key), fingerprint)
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code >= 400:
+                # Rien n'est mémorisé : la clé pourra être réutilisée
+                transaction.set_rollback(True)
+                return response
+            record.status_code = response.status_code
+            # Converti comme au rendu JSON (Decimal -> nombre...) : rejoué à l'identique
+            record.response = json.loads(json.dumps(response.data, cls=JSONEncoder))
+            record.save(update_fields=['status_code', 'response'])
+            schedule_purge()
+        return response
+
+    return wrapper
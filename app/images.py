@@ -0,0 +1,94 @@
+"""
+🖼️ VARIANTES D'IMAGES PRODUITS (miniatures WebP / JPEG)
+
+Les images uploadées (Product.image) sont servies en pleine résolution. Ce
+module produit des variantes redimensionnées :
+- tailles définies par PRODUCT_IMAGE_VARIANTS (côté max en pixels)
+- formats WebP et JPEG
+- métadonnées (EXIF, GPS, profil ICC) supprimées, orientation EXIF appliquée
+- cache disque : MEDIA_ROOT/variants/<variante>/<chemin de l'original>.<ext>
+
+Les variantes sont générées à l'upload (ProductViewApi) ou, à défaut, à la
+première demande (ProductImageView).
+"""
+
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+VARIANTS_DIR = 'variants'
+
+DEFAULT_VARIANTS = {
+    'thumb': 320,
+    'medium': 800,
+}
+
+# extension -> (format Pillow, type MIME)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpg': ('JPEG', 'image/jpeg'),
+}
+
+
+def get_variants():
+    return getattr(settings, 'PRODUCT_IMAGE_VARIANTS', DEFAULT_VARIANTS)
+
+
+def variant_name(name, variant, ext):
+    """'products/photo.png' -> 'variants/thumb/products/photo.webp'"""
+    stem, _ = os.path.splitext(name)
+    return f"{VARIANTS_DIR}/{variant}/{stem}.{ext}"
+
+
+def render_variant(source, max_size, ext):
+    """Redimensionne une image source et la ré-encode sans métadonnées."""
+    pil_format, _ = FORMATS[ext]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+        if pil_format == 'JPEG' and image.mode != 'RGB':
+            # Pas de transparence en JPEG : fond blanc
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+
+        buffer = BytesIO()
+        # Ni exif= ni icc_profile= : les métadonnées de l'original ne sont pas recopiées
+        image.save(buffer, pil_format, quality=getattr(settings, 'PRODUCT_IMAGE_QUALITY', 80), optimize=True)
+        return buffer.getvalue()
+
+
+def ensure_variant(name, variant, ext, storage=default_storage):
+    """
+    Renvoie le nom de la variante dans le stockage, en la générant si elle
+    n'existe pas encore ou si l'original est plus récent.
+    """
+    max_size = get_variants()[variant]
+    target = variant_name(name, variant, ext)
+
+    if storage.exists(target):
+        if storage.get_modified_time(target) >= storage.get_modified_time(name):
+            return target
+        storage.delete(target)
+
+    with storage.open(name, 'rb') as source:
+        data = render_variant(source, max_size, ext)
+    return storage.save(target, ContentFile(data))
+
+
+def generate_variants(name, storage=default_storage):
+    """Génère toutes les variantes (tailles x formats) d'une image."""
+    return [
+        ensure_variant(name, variant, ext, storage)
+        for variant in get_variants()
+        for ext in FORMATS
+    ]
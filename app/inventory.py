@@ -0,0 +1,265 @@
+"""
+📦 STOCK : journal de mouvements, compaction et alertes de stock bas
+
+Toutes les modifications de stock liées aux commandes passent par ici et
+sont des INSERT dans le journal append-only StockMovement (réservation,
+annulation, réapprovisionnement...) :
+
+    stock disponible = Product.stock (instantané) + Σ mouvements non compactés
+
+- pas d'UPDATE de la ligne produit à chaque commande : un produit très
+  demandé absorbe les réservations simultanées par des insertions (sur
+  PostgreSQL, un verrou consultatif par produit sérialise seulement la
+  vérification « stock suffisant », le temps d'un INSERT)
+- l'historique complet des mouvements est conservé
+- la compaction (tâche 'inventory.compact', mise en file quelques secondes
+  après un mouvement, ou `python manage.py compact_stock_ledger`) intègre
+  les mouvements en attente dans Product.stock par un UPDATE ensembliste
+- un StockAlert est écrit quand le stock disponible franchit le seuil de la
+  catégorie (LOW en descendant, RESTOCKED en remontant) : les outils de
+  réapprovisionnement lisent ce flux (?after=<id>) au lieu de parcourir
+  l'inventaire
+- tous les lecteurs (listes, détail, in_stock, stock bas) lisent le stock
+  disponible, jamais l'instantané seul : with_available_stock() en
+  sous-requête sur l'index partiel stock_movement_pending_idx
+- les produits en stock bas sont cherchés parmi ceux sous LOW_STOCK_CEILING
+  (index partiel product_low_stock_idx) ou ayant des mouvements en attente
+
+Product.stock n'est jamais écrasé pendant que des mouvements sont en
+attente : une saisie de stock (admin, API produits) passe par set_stock(),
+qui journalise la différence avec le disponible (mouvement d'ajustement).
+
+La compaction suppose un worker (`python manage.py run_jobs`, service
+`worker` de docker-compose.yml) ou `compact_stock_ledger` par cron ; sans
+elle le disponible reste juste, mais le journal en attente grossit.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import LOW_STOCK_CEILING, Product, StockAlert, StockMovement
+from .tasks import enqueue
+
+
+# Espace de noms des verrous consultatifs PostgreSQL (pg_advisory_xact_lock)
+_LOCK_NAMESPACE = 3815
+
+_last_compaction_bucket = None
+
+
+class InsufficientStock(Exception):
+    """Stock insuffisant pour la quantité demandée."""
+
+
+def _lock_products(product_ids):
+    """Sérialise les réservations des produits (par id croissant) jusqu'à la fin de la transaction."""
+    product_ids = sorted(product_ids)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(%s, id) FROM (SELECT unnest(%s::int[]) AS id ORDER BY id) AS ids',
+                [_LOCK_NAMESPACE, product_ids],
+            )
+    elif connection.features.has_select_for_update:
+        list(Product.objects.select_for_update().filter(pk__in=product_ids).order_by('pk').values_list('pk'))
+    # SQLite : une seule transaction d'écriture à la fois, rien à faire
+
+
+def pending_stock():
+    """Expression : somme des mouvements non compactés du produit (sous-requête, sans GROUP BY)."""
+    pending = (
+        StockMovement.objects.filter(product=OuterRef('pk'), compacted=False)
+        .order_by()
+        .values('product')
+        .annotate(total=Sum('delta'))
+        .values('total')
+    )
+    return Coalesce(Subquery(pending, output_field=IntegerField()), Value(0))
+
+
+def with_available_stock(queryset):
+    """Annote `available_stock` (instantané + mouvements en attente) en une requête."""
+    return queryset.annotate(available_stock=F('stock') + pending_stock())
+
+
+def available_stock(product_id):
+    return with_available_stock(Product.objects.filter(pk=product_id)).values_list('available_stock', flat=True).get()
+
+
+def record_movements(deltas, reason, order=None):
+    """
+    Ajoute au journal un mouvement par produit de `deltas` ({product_id:
+    delta}), dans la transaction de l'appelant et en un nombre constant de
+    requêtes, et renvoie {product_id: nouveau disponible}. Une sortie de
+    stock (delta < 0) non couverte par le disponible lève InsufficientStock
+    (premier produit en défaut, par id croissant) et n'écrit rien.
+    """
+    order_id = order.pk if order is not None else None
+    return journal_movements(
+        [(product_id, delta, order_id) for product_id, delta in sorted(deltas.items())], reason
+    )
+
+
+def journal_movements(rows, reason):
+    """
+    Comme record_movements(), pour des mouvements de plusieurs commandes :
+    `rows` est une liste de (product_id, delta, order_id). Les produits sont
+    verrouillés, le disponible vérifié et les alertes écrites sur la somme
+    des deltas de chaque produit.
+    """
+    rows = [(product_id, delta, order_id) for product_id, delta, order_id in rows if delta]
+    if not rows:
+        return {}
+    deltas = defaultdict(int)
+    for product_id, delta, _ in rows:
+        deltas[product_id] += delta
+    with transaction.atomic():
+        _lock_products(deltas)
+        current = {
+            pk: (before, threshold)
+            for pk, before, threshold in with_available_stock(Product.objects.filter(pk__in=list(deltas)))
+            .values_list('pk', 'available_stock', 'category__low_stock_threshold')
+        }
+        after = {}
+        alerts = []
+        for product_id in sorted(deltas):
+            before, threshold = current[product_id]
+            after[product_id] = before + deltas[product_id]
+            if after[product_id] < 0:
+                raise InsufficientStock(product_id)
+            if after[product_id] < threshold <= before:
+                alerts.append(StockAlert(product_id=product_id, kind=StockAlert.KindChoices.LOW,
+                                         stock=after[product_id], threshold=threshold))
+            elif before < threshold <= after[product_id]:
+                alerts.append(StockAlert(product_id=product_id, kind=StockAlert.KindChoices.RESTOCKED,
+                                         stock=after[product_id], threshold=threshold))
+        StockMovement.objects.bulk_create([
+            StockMovement(product_id=product_id, delta=delta, reason=reason, order_id=order_id)
+            for product_id, delta, order_id in rows
+        ], batch_size=1000)
+        if alerts:
+            StockAlert.objects.bulk_create(alerts)
+
+    schedule_compaction()
+    return after
+
+
+def record_movement(product, delta, reason, order=None):
+    """
+    Ajoute un mouvement au journal (dans la transaction de l'appelant) et
+    renvoie le nouveau stock disponible. Une sortie de stock (delta < 0)
+    lève InsufficientStock si le disponible ne la couvre pas.
+    """
+    after = record_movements({product.pk: delta}, reason, order)
+    return after[product.pk] if delta else available_stock(product.pk)
+
+
+def decrement_stock(product, quantity, order=None):
+    """Réserve `quantity` pour une commande. Lève InsufficientStock."""
+    return record_movement(product, -quantity, StockMovement.ReasonChoices.RESERVATION, order)
+
+
+def reserve_stock(quantities, order):
+    """Réserve les lignes d'une commande ({product_id: quantité}) en une fois. Lève InsufficientStock."""
+    return record_movements(
+        {product_id: -quantity for product_id, quantity in quantities.items()},
+        StockMovement.ReasonChoices.RESERVATION, order,
+    )
+
+
+def increment_stock(product, quantity, reason=StockMovement.ReasonChoices.RESTOCK, order=None):
+    """Remet `quantity` en stock (réapprovisionnement, annulation)."""
+    return record_movement(product, quantity, reason, order)
+
+
+def set_stock(product, value):
+    """
+    Fixe le stock disponible à `value` (saisie admin / API) : un mouvement
+    d'ajustement de la différence, pour que la compaction des mouvements en
+    attente ne s'applique pas par-dessus une valeur absolue. Renvoie le
+    nouveau disponible.
+    """
+    with transaction.atomic():
+        _lock_products([product.pk])
+        delta = value - available_stock(product.pk)
+        if not delta:
+            return value
+        return record_movement(product, delta, StockMovement.ReasonChoices.ADJUSTMENT)
+
+
+def schedule_compaction():
+    """
+    Met en file une compaction après INVENTORY_COMPACT_DELAY secondes : une
+    tâche par intervalle (clé d'idempotence), et une seule tentative
+    d'insertion par processus et par intervalle.
+    """
+    delay = getattr(settings, 'INVENTORY_COMPACT_DELAY', 10)
+    bucket = int(timezone.now().timestamp()) // delay
+    if bucket == _last_compaction_bucket:
+        return
+
+    def enqueue_compaction():
+        # Intervalle marqué seulement une fois la tâche insérée : une
+        # transaction annulée ne doit pas supprimer la compaction suivante
+        global _last_compaction_bucket
+        enqueue('inventory.compact', idempotency_key=f"inventory.compact:{bucket}", delay=delay)
+        _last_compaction_bucket = bucket
+
+    transaction.on_commit(enqueue_compaction)
+
+
+def compact_ledger(batch=1000):
+    """
+    Intègre les mouvements en attente dans Product.stock, par lots : un
+    UPDATE ensembliste des produits touchés puis le marquage des mouvements,
+    dans la même transaction (le disponible ne change jamais de valeur).
+    Renvoie le nombre de mouvements compactés.
+    """
+    compacted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockMovement.objects.filter(compacted=False)
+                .select_for_update(skip_locked=True)
+                .order_by('pk')
+                .values_list('pk', 'product_id', 'delta')[:batch]
+            )
+            if not rows:
+                return compacted
+            deltas = defaultdict(int)
+            for _, product_id, delta in rows:
+                deltas[product_id] += delta
+            Product.objects.filter(pk__in=list(deltas)).update(
+                stock=F('stock') + Case(
+                    *(When(pk=product_id, then=Value(delta)) for product_id, delta in deltas.items()),
+                    output_field=IntegerField(),
+                )
+            )
+            StockMovement.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(compacted=True)
+        compacted += len(rows)
+
+
+def low_stock_products():
+    """Produits dont le disponible est sous le seuil de leur catégorie, du plus épuisé au moins épuisé."""
+    # Candidats : instantané sous le plafond des seuils (index partiel) ou
+    # mouvements en attente (index partiel du journal) ; le seuil ne dépasse
+    # jamais LOW_STOCK_CEILING, aucun autre produit ne peut être en stock bas
+    candidates = Product.objects.filter(
+        Q(stock__lt=LOW_STOCK_CEILING)
+        | Q(pk__in=StockMovement.objects.filter(compacted=False).values('product_id'))
+    )
+    return (
+        with_available_stock(candidates)
+        .filter(available_stock__lt=F('category__low_stock_threshold'))
+        .order_by('available_stock', 'pk')
+    )
+
+
+def alerts_after(cursor, limit):
+    """Alertes d'id > cursor (flux incrémental)."""
+    return StockAlert.objects.filter(pk__gt=cursor).order_by('pk')[:limit]
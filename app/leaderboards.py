@@ -0,0 +1,120 @@
+"""
+🏆 CLASSEMENTS (catégories populaires, produits les plus vendus / mieux notés)
+
+Chaque classement est un instantané calculé périodiquement puis stocké dans
+la table LeaderboardSnapshot (LEADERBOARDS_SIZE premières lignes, noms
+inclus), partagée par le worker et tous les processus web : une requête API
+ne fait qu'une lecture par clé et un découpage [:limit].
+
+- les ventes viennent des agrégats journaliers (app/reports.py), jamais des
+  lignes de commande
+- fenêtres de temps configurables : LEADERBOARDS_WINDOWS = {'7d': 7, 'all': None}
+- instantanés recalculés par la tâche 'leaderboards.refresh' (mise en file
+  après chaque recalcul des agrégats de ventes) ou `python manage.py
+  refresh_leaderboards` ; absent ou plus vieux que LEADERBOARDS_TTL (avis et
+  produits changent sans recalcul des ventes, ou aucun worker), un instantané
+  est recalculé à la volée par la requête qui le lit
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, Sum
+from django.utils import timezone
+
+from .models import Category, DailyProductSales, LeaderboardSnapshot, Order, Review
+from .tasks import enqueue
+
+
+def get_windows():
+    return getattr(settings, 'LEADERBOARDS_WINDOWS', {'7d': 7, '30d': 30, 'all': None})
+
+
+def _size():
+    return getattr(settings, 'LEADERBOARDS_SIZE', 50)
+
+
+def _since_day(days):
+    return None if days is None else timezone.localdate() - timedelta(days=days - 1)
+
+
+def popular_categories(days):
+    """Catégories par nombre de produits (la fenêtre ne s'applique pas : état actuel)."""
+    rows = (
+        Category.objects.annotate(products_count=Count('products'))
+        .values('id', 'name', 'products_count')
+        .order_by('-products_count', 'id')[:_size()]
+    )
+    return list(rows)
+
+
+def top_sold_products(days):
+    """Produits par unités vendues (commandes non annulées) sur la fenêtre."""
+    queryset = DailyProductSales.objects.exclude(status=Order.StatusChoices.CANCELLED)
+    since = _since_day(days)
+    if since is not None:
+        queryset = queryset.filter(day__gte=since)
+    rows = (
+        queryset.values('product_id', product_name=F('product__name'))
+        .annotate(units=Sum('units'), revenue=Sum('revenue'))
+        .order_by('-units', 'product_id')[:_size()]
+    )
+    return list(rows)
+
+
+def top_rated_products(days):
+    """Produits par note moyenne (au moins LEADERBOARDS_MIN_REVIEWS avis sur la fenêtre)."""
+    queryset = Review.objects.all()
+    since = _since_day(days)
+    if since is not None:
+        queryset = queryset.filter(created_at__date__gte=since)
+    rows = (
+        queryset.values('product_id', product_name=F('product__name'))
+        .annotate(average_rating=Avg('rating'), reviews_count=Count('id'))
+        .filter(reviews_count__gte=getattr(settings, 'LEADERBOARDS_MIN_REVIEWS', 3))
+        .order_by('-average_rating', '-reviews_count', 'product_id')[:_size()]
+    )
+    return [{**row, 'average_rating': round(row['average_rating'], 2)} for row in rows]
+
+
+BOARDS = {
+    'categories': popular_categories,
+    'top-sold': top_sold_products,
+    'top-rated': top_rated_products,
+}
+
+
+def _as_json(rows):
+    """Decimal -> float : stockable en JSON, rendu comme le JSONEncoder de DRF le fait pour un Decimal."""
+    return [{key: float(value) if isinstance(value, Decimal) else value for key, value in row.items()} for row in rows]
+
+
+def compute(board, window):
+    """Recalcule un classement et enregistre son instantané."""
+    snapshot, _ = LeaderboardSnapshot.objects.update_or_create(
+        board=board, window=window,
+        defaults={'computed_at': timezone.now(), 'results': _as_json(BOARDS[board](get_windows()[window]))},
+    )
+    return snapshot
+
+
+def get_leaderboard(board, window, limit):
+    """Les `limit` premières lignes de l'instantané (recalculé s'il est absent ou périmé)."""
+    snapshot = LeaderboardSnapshot.objects.filter(board=board, window=window).first()
+    ttl = timedelta(seconds=getattr(settings, 'LEADERBOARDS_TTL', 3600))
+    if snapshot is None or snapshot.computed_at < timezone.now() - ttl:
+        snapshot = compute(board, window)
+    return {'computed_at': snapshot.computed_at, 'results': snapshot.results[:limit]}
+
+
+def refresh_all():
+    for board in BOARDS:
+        for window in get_windows():
+            compute(board, window)
+
+
+def schedule_refresh():
+    """Met en file un recalcul des classements ; un seul par minute (clé d'idempotence)."""
+    bucket = timezone.now().strftime('%Y%m%d%H%M')
+    enqueue('leaderboards.refresh', idempotency_key=f"leaderboards.refresh:{bucket}")
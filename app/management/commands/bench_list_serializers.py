@@ -0,0 +1,106 @@
+"""
+⚡ python manage.py bench_list_serializers [--sizes 100 500 1000] [--repeat 5]
+
+Compare, pour des pages de 100 à 1000 lignes, le débit (lignes/seconde) des
+ModelSerializer de liste et de leurs équivalents app/fast_serializers.py,
+JSON compris (JSONRenderer contre ORJSONRenderer). Les deux partent du
+queryset de la vue de liste (get_queryset + filter_queryset : jointures,
+stock disponible annoté, colonnes réduites), comme en production. Les
+données de test sont créées dans une transaction annulée à la fin : la base
+n'est pas modifiée.
+"""
+
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from app.fast_serializers import OrderListFastSerializer, ProductListFastSerializer
+from app.models import Category, Client, Order, OrderItem, Product
+from app.renderers import ORJSONRenderer
+from app.views import OrderViewSet, ProductViewApi
+
+
+class Command(BaseCommand):
+    help = "Benchmark des serializers de liste DRF contre les serializers rapides (lignes/seconde)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        with transaction.atomic():
+            self.create_fixtures(sizes[-1])
+            host = (settings.ALLOWED_HOSTS or ['localhost'])[0]
+            request = Request(APIRequestFactory().get('/api/v1/', HTTP_HOST=host))
+            context = {'request': request}
+
+            benchmarks = [
+                (ProductListFastSerializer, ProductViewApi),
+                (OrderListFastSerializer, OrderViewSet),
+            ]
+            for fast_class, viewset_class in benchmarks:
+                queryset = self.list_queryset(viewset_class, request)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"\n{fast_class.drf_serializer.__name__} vs {fast_class.__name__}"
+                ))
+                self.stdout.write(f"  {'lignes':>7} {'DRF lignes/s':>14} {'rapide lignes/s':>16} {'gain':>7}")
+                for size in sizes:
+                    self.run_benchmark(fast_class, queryset, size, context, options['repeat'])
+
+            transaction.set_rollback(True)
+
+    def create_fixtures(self, size):
+        user = User.objects.create(username='bench-list-serializers')
+        category = Category.objects.create(name='Bench')
+        client = Client.objects.create(first_name='Bench', last_name='Client', email='bench-list@example.com')
+        products = Product.objects.bulk_create(
+            Product(name=f"Bench {i:05d}", price=f"{i % 500}.99", category=category, stock=i % 7)
+            for i in range(size)
+        )
+        orders = Order.objects.bulk_create(Order(user=user, client=client) for _ in range(size))
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=products[(i + j) % size], quantity=j + 1)
+            for i, order in enumerate(orders)
+            for j in range(3)
+        )
+
+    @staticmethod
+    def list_queryset(viewset_class, request):
+        """Queryset que la vue sert à list() (FastListMixin part du même)"""
+        view = viewset_class(action='list', request=request, format_kwarg=None, args=(), kwargs={})
+        return view.filter_queryset(view.get_queryset())
+
+    def run_benchmark(self, fast_class, queryset, size, context, repeat):
+        def drf():
+            data = fast_class.drf_serializer(queryset[:size], many=True, context=context).data
+            JSONRenderer().render(data)
+            return data
+
+        def fast():
+            serializer = fast_class(context)
+            data = serializer.serialize(serializer.get_queryset(queryset)[:size])
+            ORJSONRenderer().render(data)
+            return data
+
+        if drf() != fast():
+            raise CommandError(f"{fast_class.__name__} ne produit pas la même sortie que {fast_class.drf_serializer.__name__}")
+
+        drf_time = median(self.timeit(drf) for _ in range(repeat))
+        fast_time = median(self.timeit(fast) for _ in range(repeat))
+        self.stdout.write(
+            f"  {size:>7} {size / drf_time:>14,.0f} {size / fast_time:>16,.0f} {drf_time / fast_time:>6.1f}x"
+        )
+
+    @staticmethod
+    def timeit(func):
+        start = perf_counter()
+        func()
+        return perf_counter() - start
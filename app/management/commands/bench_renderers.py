@@ -0,0 +1,95 @@
+"""
+🚀 python manage.py bench_renderers [--rows 1000 5000] [--repeat 5]
+
+Compare le débit de JSONRenderer (json stdlib) et d'ORJSONRenderer sur des
+pages de commandes et de produits du même format que les serializers
+(Decimal, UUID, datetime, objets imbriqués) et vérifie que les octets
+produits sont identiques. Comme dans les vues, les pages sont des
+ReturnList liées à leur serializer : ORJSONRenderer n'y cherche les
+flottants que dans les champs qui peuvent en contenir.
+"""
+
+import datetime
+import uuid
+from decimal import Decimal
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from app.renderers import ORJSONRenderer
+from app.serializers import OrderDetailSerializer, OrderItemListSerializer, ProductDetailSerializer
+
+
+def order_page(rows):
+    """Page de commandes au format OrderDetailSerializer (totaux Decimal, UUID, dates)."""
+    now = timezone.now()
+    return ReturnList([
+        {
+            'order_id': uuid.uuid4(),
+            'client_details': {'first_name': 'Aïcha', 'last_name': f"Client {i}", 'email': f"client{i}@example.com"},
+            'status': 'Pending',
+            'created_at': now - datetime.timedelta(minutes=i),
+            'items': ReturnList([
+                {'id': i * 10 + j, 'product_name': f"Produit {j}", 'quantity': j + 1,
+                 'unit_price': Decimal('19.99'), 'subtotal': Decimal('19.99') * (j + 1)}
+                for j in range(5)
+            ], serializer=OrderItemListSerializer(many=True)),
+            'total_amount': Decimal('299.85'),
+        }
+        for i in range(rows)
+    ], serializer=OrderDetailSerializer(many=True))
+
+
+def product_page(rows):
+    """Page de produits au format ProductDetailSerializer (prix en chaîne, fournisseurs imbriqués)."""
+    return ReturnList([
+        {
+            'id': i,
+            'name': f"Produit {i} – édition spéciale",
+            'price': f"{i % 500}.99",
+            'average_rating': 4.3,
+            'category': {'id': 1, 'name': 'Électronique', 'product_names': ['A', 'B', 'C']},
+            'supplier': [{'id': s, 'name': f"Fournisseur {s}", 'products_count': 12} for s in range(3)],
+            'stock': i % 40,
+        }
+        for i in range(rows)
+    ], serializer=ProductDetailSerializer(many=True))
+
+
+class Command(BaseCommand):
+    help = "Benchmark JSONRenderer contre ORJSONRenderer (octets identiques vérifiés)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        renderers = JSONRenderer(), ORJSONRenderer()
+        for label, build in (('commandes', order_page), ('produits', product_page)):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nPages de {label}"))
+            self.stdout.write(f"  {'lignes':>7} {'json Mo/s':>10} {'orjson Mo/s':>12} {'gain':>7}")
+            for rows in options['rows']:
+                data = build(rows)
+                outputs = [renderer.render(data) for renderer in renderers]
+                if outputs[0] != outputs[1]:
+                    raise CommandError(f"ORJSONRenderer ne produit pas la même sortie que JSONRenderer ({label})")
+
+                size_mb = len(outputs[0]) / 1_000_000
+                stdlib_time, orjson_time = (
+                    median(self.timeit(renderer.render, data) for _ in range(options['repeat']))
+                    for renderer in renderers
+                )
+                self.stdout.write(
+                    f"  {rows:>7} {size_mb / stdlib_time:>10.1f} {size_mb / orjson_time:>12.1f}"
+                    f" {stdlib_time / orjson_time:>6.1f}x"
+                )
+
+    @staticmethod
+    def timeit(func, data):
+        start = perf_counter()
+        func(data)
+        return perf_counter() - start
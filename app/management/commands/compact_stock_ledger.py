@@ -0,0 +1,27 @@
+"""
+📦 python manage.py compact_stock_ledger [--batch 1000]
+
+Intègre les mouvements de stock en attente (journal StockMovement) dans
+Product.stock. Normalement fait par la tâche 'inventory.compact' ; utile par
+cron si aucun worker ne tourne.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.inventory import compact_ledger
+
+
+class Command(BaseCommand):
+    help = "Compacte le journal des mouvements de stock dans Product.stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000, help="Mouvements compactés par transaction")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        compacted = compact_ledger(batch=options['batch'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{compacted} mouvement(s) compacté(s) en {time.perf_counter() - started:.2f} s"
+        ))
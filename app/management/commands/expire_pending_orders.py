@@ -0,0 +1,43 @@
+"""
+🛒 python manage.py expire_pending_orders [--ttl-hours 24] [--batch 500] [--max-batches N] [--dry-run]
+
+Annule par lots les commandes restées en attente plus longtemps que
+ORDERS_PENDING_TTL et rend leur stock réservé (voir app/orders.py). Les
+workers (run_jobs) mettent déjà en file la tâche 'orders.expire_pending'
+toutes les ORDERS_EXPIRE_INTERVAL ; sans worker, à planifier par cron :
+
+    */15 * * * * python manage.py expire_pending_orders
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.models import Order
+from app.orders import expire_pending_orders
+
+
+class Command(BaseCommand):
+    help = "Annule les commandes en attente expirées et rend leur stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-hours', type=float, help="Âge minimal (heures) ; défaut : ORDERS_PENDING_TTL")
+        parser.add_argument('--batch', type=int, help="Commandes par transaction ; défaut : ORDERS_EXPIRE_BATCH")
+        parser.add_argument('--max-batches', type=int, help="Nombre maximal de lots pour ce passage")
+        parser.add_argument('--dry-run', action='store_true', help="Compter sans rien annuler")
+
+    def handle(self, *args, **options):
+        ttl = timedelta(hours=options['ttl_hours']) if options['ttl_hours'] else None
+        if options['dry_run']:
+            cutoff = timezone.now() - (ttl or getattr(settings, 'ORDERS_PENDING_TTL', timedelta(hours=24)))
+            count = Order.objects.filter(status=Order.StatusChoices.PENDING, created_at__lt=cutoff).count()
+            self.stdout.write(f"{count} commande(s) en attente expirée(s)")
+            return
+
+        expired, elapsed = expire_pending_orders(ttl=ttl, batch=options['batch'], max_batches=options['max_batches'])
+        rate = expired / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{expired} commande(s) annulée(s) en {elapsed:.2f} s ({rate:.0f} commandes/s)"
+        ))
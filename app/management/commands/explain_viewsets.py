@@ -0,0 +1,105 @@
+"""
+🧭 python manage.py explain_viewsets [--only orders] [--limit 20] [--analyze]
+                                     [--format text|json] [--output plans.txt] [--verbose]
+
+Passe dans EXPLAIN les requêtes de chaque ViewSet (list, retrieve, filtres
+courants) et résume coût, lignes estimées, parcours séquentiels et index
+suggérés (voir app/query_plans.py). À lancer sur une copie des données de
+production : sur une petite base, le planificateur préfère souvent un
+parcours séquentiel même quand l'index existe.
+
+Le rapport est stable (scénarios et requêtes toujours dans le même ordre,
+pas de durées sans --analyze) : on le versionne ou on le compare avec diff
+avant / après une migration.
+
+    python manage.py explain_viewsets --output avant.txt
+    python manage.py migrate
+    python manage.py explain_viewsets --output apres.txt
+    diff avant.txt apres.txt
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from app.query_plans import explain_scenario, get_scenarios, representative_user
+
+
+class Command(BaseCommand):
+    help = "Audit des plans d'exécution des requêtes des ViewSets (EXPLAIN)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', action='append', default=[], help="Préfixe de scénario (ex. orders), répétable")
+        parser.add_argument('--limit', type=int, default=20, help="Taille de l'échantillon évalué (une page)")
+        parser.add_argument('--analyze', action='store_true', help="EXPLAIN ANALYZE (PostgreSQL) : exécute les requêtes")
+        parser.add_argument('--format', choices=['text', 'json'], default='text')
+        parser.add_argument('--output', help="Écrire le rapport dans ce fichier")
+        parser.add_argument('--verbose', action='store_true', help="Inclure le plan complet")
+
+    def handle(self, *args, **options):
+        analyze = options['analyze']
+        if analyze and connection.vendor != 'postgresql':
+            self.stderr.write(self.style.WARNING("--analyze ignoré : PostgreSQL uniquement"))
+            analyze = False
+
+        user = representative_user()
+        report = {}
+        for scenario in get_scenarios():
+            if options['only'] and not any(scenario.label.startswith(prefix) for prefix in options['only']):
+                continue
+            report[scenario.label] = explain_scenario(scenario, user, options['limit'], analyze)
+
+        if options['format'] == 'json':
+            output = json.dumps(
+                {
+                    'vendor': connection.vendor,
+                    'scenarios': {
+                        label: None if statements is None else [
+                            {**statement.as_dict(), **({'plan': statement.plan} if options['verbose'] else {})}
+                            for statement in statements
+                        ]
+                        for label, statements in report.items()
+                    },
+                },
+                indent=2, ensure_ascii=False,
+            )
+        else:
+            output = self.render_text(report, options['verbose'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def render_text(self, report, verbose):
+        lines = [f"# base : {connection.vendor}"]
+        seq_scans = suggestions = 0
+        for label, statements in report.items():
+            lines.append("")
+            if statements is None:
+                lines.append(f"== {label} : ignoré (aucune donnée)")
+                continue
+            lines.append(f"== {label} : {len(statements)} requête(s)")
+            for statement in statements:
+                summary = []
+                if statement.total_cost is not None:
+                    summary.append(f"coût={statement.total_cost} lignes={statement.plan_rows}")
+                if statement.actual_rows is not None:
+                    summary.append(f"réel={statement.actual_rows} lignes en {statement.actual_ms} ms")
+                lines.append(f"-- {statement.shape[:160]}")
+                if summary:
+                    lines.append(f"   {' '.join(summary)}")
+                for table in statement.seq_scans:
+                    lines.append(f"   ! parcours séquentiel : {table}")
+                for suggestion in statement.suggestions:
+                    lines.append(f"   > {suggestion}")
+                if verbose:
+                    lines.extend(f"     | {line}" for line in statement.plan)
+                seq_scans += len(statement.seq_scans)
+                suggestions += len(statement.suggestions)
+        lines.append("")
+        lines.append(f"# {seq_scans} parcours séquentiel(s), {suggestions} suggestion(s)")
+        return "\n".join(lines)
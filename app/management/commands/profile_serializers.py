@@ -0,0 +1,63 @@
+"""
+⏱️ python manage.py profile_serializers [--path /api/v1/orders/ ...] [--user admin]
+
+Appelle les endpoints de l'API en interne et affiche, pour chacun, le temps
+cumulé et le nombre de requêtes SQL par champ de serializer.
+
+Les listes produits / commandes passent par les ModelSerializer pendant le
+profilage (détail par champ) ; --fast les profile telles qu'elles sont
+servies (app/fast_serializers.py, une entrée par serializer).
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from app.serializer_profiling import profile_serializers
+
+
+DEFAULT_PATHS = [
+    '/api/v1/categorie/list/',
+    '/api/v1/suppliers/',
+    '/api/v1/client/',
+    '/api/v1/product/',
+    '/api/v1/review/',
+    '/api/v1/orders/',
+]
+
+
+class Command(BaseCommand):
+    help = "Profile le temps et les requêtes SQL par champ de serializer sur les endpoints de l'API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', help="Endpoint à profiler (répétable)")
+        parser.add_argument('--user', help="Nom d'utilisateur avec lequel s'authentifier")
+        parser.add_argument('--host', default=(settings.ALLOWED_HOSTS or ['localhost'])[0])
+        parser.add_argument('--limit', type=int, default=15, help="Nombre de champs affichés par endpoint")
+        parser.add_argument('--fast', action='store_true',
+                            help="Garder les serializers rapides des listes (FAST_LIST_SERIALIZERS)")
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST=options['host'])
+        if options['user']:
+            try:
+                client.force_login(User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur '{options['user']}' introuvable")
+
+        fast_lists = options['fast'] and getattr(settings, 'FAST_LIST_SERIALIZERS', True)
+        for path in options['paths'] or DEFAULT_PATHS:
+            with override_settings(FAST_LIST_SERIALIZERS=fast_lists), profile_serializers() as profile:
+                response = client.get(path, HTTP_ACCEPT='application/json')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n{path} -> {response.status_code}, {profile.queries} requêtes SQL"
+            ))
+            rows = profile.rows()[:options['limit']]
+            if not rows:
+                self.stdout.write("  (aucun serializer profilé)")
+                continue
+            self.stdout.write(f"  {'champ':<50} {'appels':>7} {'ms':>9} {'requêtes':>9}")
+            for key, calls, ms, queries in rows:
+                self.stdout.write(f"  {key:<50} {calls:>7} {ms:>9.2f} {queries:>9}")
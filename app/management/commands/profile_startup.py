@@ -0,0 +1,57 @@
+"""
+🚀 python manage.py profile_startup [--runs 3] [--top 25] [--format text|json]
+
+Mesure le démarrage à froid d'un processus Django (voir app/startup.py) :
+durée des phases settings / apps / urls / wsgi, modules les plus lents à
+importer (temps propre, hors sous-modules) et total par paquet. Avec
+--runs N, la mesure la plus rapide est gardée (cache disque chaud).
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.startup import measure_startup
+
+
+class Command(BaseCommand):
+    help = "Profile le temps de démarrage à froid (imports et phases de Django)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help="Démarrages mesurés ; le plus rapide est gardé")
+        parser.add_argument('--top', type=int, default=25, help="Nombre de modules affichés")
+        parser.add_argument('--format', choices=['text', 'json'], default='text')
+
+    def handle(self, *args, **options):
+        profile = min(
+            (measure_startup() for _ in range(max(options['runs'], 1))),
+            key=lambda run: run['phases']['total'],
+        )
+        modules = profile['modules'][:options['top']]
+
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps(
+                {**profile, 'modules': [
+                    {'module': module, 'self': own, 'cumulative': cumulative} for module, own, cumulative in modules
+                ]},
+                indent=2,
+            ))
+            return
+
+        budget = getattr(settings, 'STARTUP_BUDGET', None)
+        total = profile['phases']['total']
+        self.stdout.write(self.style.MIGRATE_HEADING("Phases"))
+        for phase, seconds in profile['phases'].items():
+            self.stdout.write(f"  {phase:<10} {seconds * 1000:8.1f} ms")
+        if budget:
+            style = self.style.SUCCESS if total <= budget else self.style.ERROR
+            self.stdout.write(style(f"  budget     {budget * 1000:8.1f} ms"))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nModules (temps propre, {len(modules)} plus lents)"))
+        for module, own, cumulative in modules:
+            self.stdout.write(f"  {own * 1000:8.1f} ms  (cumulé {cumulative * 1000:8.1f} ms)  {module}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nPaquets"))
+        for package, seconds in list(profile['packages'].items())[:options['top']]:
+            self.stdout.write(f"  {seconds * 1000:8.1f} ms  {package}")
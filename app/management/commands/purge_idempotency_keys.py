@@ -0,0 +1,21 @@
+"""
+🔁 python manage.py purge_idempotency_keys [--batch 1000]
+
+Supprime les clés d'idempotence expirées (IDEMPOTENCY_TTL). Normalement fait
+par la tâche 'idempotency.purge' ; utile par cron si aucun worker ne tourne.
+"""
+
+from django.core.management.base import BaseCommand
+
+from app.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Supprime les clés d'idempotence expirées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000, help="Clés supprimées par requête")
+
+    def handle(self, *args, **options):
+        purged = purge_expired_keys(batch=options['batch'])
+        self.stdout.write(self.style.SUCCESS(f"{purged} clé(s) d'idempotence supprimée(s)"))
@@ -0,0 +1,19 @@
+"""
+🏆 python manage.py refresh_leaderboards
+
+Recalcule tous les classements (toutes fenêtres) et enregistre leurs
+instantanés. À lancer après un déploiement ou par cron si aucun worker ne
+tourne.
+"""
+
+from django.core.management.base import BaseCommand
+
+from app.leaderboards import BOARDS, get_windows, refresh_all
+
+
+class Command(BaseCommand):
+    help = "Recalcule les instantanés des classements"
+
+    def handle(self, *args, **options):
+        refresh_all()
+        self.stdout.write(self.style.SUCCESS(f"{len(BOARDS) * len(get_windows())} classement(s) recalculé(s)"))
@@ -0,0 +1,22 @@
+"""
+📊 python manage.py refresh_sales_rollups [--full]
+
+Recalcule les agrégats de ventes journaliers (voir app/reports.py) : par
+défaut seuls les jours modifiés depuis le dernier passage, --full pour tout
+l'historique (après un changement de prix à refléter, par exemple).
+"""
+
+from django.core.management.base import BaseCommand
+
+from app.reports import refresh_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcule les agrégats de ventes journaliers (incrémental par défaut)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recalculer tout l'historique")
+
+    def handle(self, *args, **options):
+        days = refresh_sales_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"{days} jour(s) recalculé(s)"))
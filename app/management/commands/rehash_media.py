@@ -0,0 +1,69 @@
+"""
+🔐 python manage.py rehash_media [--dry-run] [--delete-originals] [--batch 500]
+
+Migre les images produits existantes vers le stockage adressé par contenu
+(app/storage.py) : chaque fichier est recopié sous son hash (une seule fois
+par contenu), Product.image est mis à jour en lot, puis les variantes sont
+mises en file. --delete-originals supprime les anciens fichiers devenus
+inutilisés.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.models import Product
+from app.storage import hashed_name, is_hashed_name
+from app.tasks import enqueue
+
+
+class Command(BaseCommand):
+    help = "Renomme les images produits existantes selon le hash de leur contenu (déduplication)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Afficher sans rien modifier")
+        parser.add_argument('--delete-originals', action='store_true', help="Supprimer les anciens fichiers")
+        parser.add_argument('--batch', type=int, default=500)
+
+    def handle(self, *args, **options):
+        storage = Product._meta.get_field('image').storage
+        dry_run = options['dry_run']
+
+        renamed = {}  # ancien nom -> nom haché
+        missing = []
+        products = Product.objects.exclude(image='').only('pk', 'image').order_by('pk')
+        for old_name in products.values_list('image', flat=True).distinct():
+            if is_hashed_name(old_name) or old_name in renamed:
+                continue
+            if not storage.exists(old_name):
+                missing.append(old_name)
+                continue
+            with storage.open(old_name, 'rb') as content:
+                new_name = hashed_name(old_name, content) if dry_run else storage.save(old_name, content)
+            renamed[old_name] = new_name
+            self.stdout.write(f"  {old_name} -> {new_name}")
+
+        for name in missing:
+            self.stdout.write(self.style.WARNING(f"  fichier introuvable : {name}"))
+
+        distinct_files = len(set(renamed.values()))
+        self.stdout.write(f"{len(renamed)} fichier(s) -> {distinct_files} fichier(s) unique(s)")
+        if dry_run or not renamed:
+            return
+
+        to_update = []
+        for product in products.filter(image__in=list(renamed)).iterator(chunk_size=options['batch']):
+            product.image.name = renamed[product.image.name]
+            to_update.append(product)
+        with transaction.atomic():
+            Product.objects.bulk_update(to_update, ['image'], batch_size=options['batch'])
+        self.stdout.write(self.style.SUCCESS(f"{len(to_update)} produit(s) mis à jour"))
+
+        for new_name in set(renamed.values()):
+            enqueue('images.generate_variants', {'name': new_name}, idempotency_key=f"images.generate_variants:{new_name}")
+
+        if options['delete_originals']:
+            still_used = set(Product.objects.filter(image__in=list(renamed)).values_list('image', flat=True))
+            for old_name in renamed:
+                if old_name not in still_used:
+                    storage.delete(old_name)
+            self.stdout.write(f"{len(set(renamed) - still_used)} ancien(s) fichier(s) supprimé(s)")
@@ -0,0 +1,104 @@
+"""
+⚙️ python manage.py run_jobs [--workers 2] [--batch 10] [--poll 1.0] [--once]
+
+Lance un ou plusieurs processus workers qui exécutent les tâches de la table
+Job (voir app/tasks.py). --once vide la file puis s'arrête (cron, tests).
+
+Chaque worker remet en file les tâches bloquées (worker mort) au démarrage
+puis toutes les JOBS_SWEEP_INTERVAL secondes, et met en file les tâches
+périodiques (expiration des paniers abandonnés, une par intervalle).
+"""
+
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from app.orders import schedule_expiry
+from app.tasks import claim_jobs, logger, purge_finished_jobs, requeue_stale_jobs, run_job, worker_id
+
+
+def sweep(name):
+    """
+    Remet en file les tâches des workers disparus, purge les anciennes et
+    met en file les tâches périodiques.
+    """
+    requeued = requeue_stale_jobs()
+    purged = purge_finished_jobs()
+    schedule_expiry()
+    if requeued or purged:
+        logger.info("Worker %s : %s tâche(s) bloquée(s) remise(s) en file, %s ancienne(s) supprimée(s)",
+                    name, requeued, purged)
+
+
+def work(batch, poll, once):
+    """Boucle d'un worker : réserver, exécuter, attendre s'il n'y a rien à faire."""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    name = worker_id()
+    sweep_interval = getattr(settings, 'JOBS_SWEEP_INTERVAL', 60)
+    next_sweep = 0.0
+    processed = 0
+    while not stopping:
+        try:
+            if time.monotonic() >= next_sweep:
+                sweep(name)
+                next_sweep = time.monotonic() + sweep_interval
+            jobs = claim_jobs(name, batch)
+        except DatabaseError:
+            # Base momentanément indisponible / verrouillée : on réessaie plus tard
+            logger.warning("Worker %s : réservation impossible", name, exc_info=True)
+            connections.close_all()
+            time.sleep(poll)
+            continue
+        for job in jobs:
+            if run_job(job) is not None:
+                processed += 1
+        if not jobs:
+            if once:
+                break
+            time.sleep(poll)
+    return processed
+
+
+def _child(batch, poll, once):
+    # Connexions héritées du parent inutilisables après fork
+    connections.close_all()
+    work(batch, poll, once)
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches de fond en file (table Job)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Nombre de processus workers")
+        parser.add_argument('--batch', type=int, default=10, help="Tâches réservées à la fois par worker")
+        parser.add_argument('--poll', type=float, default=1.0, help="Attente (s) quand la file est vide")
+        parser.add_argument('--once', action='store_true', help="Vider la file puis s'arrêter")
+
+    def handle(self, *args, **options):
+        batch, poll, once = options['batch'], options['poll'], options['once']
+        if options['workers'] <= 1:
+            processed = work(batch, poll, once)
+            self.stdout.write(self.style.SUCCESS(f"{processed} tâche(s) exécutée(s)"))
+            return
+
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_child, args=(batch, poll, once), daemon=False)
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"{len(processes)} workers démarrés")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
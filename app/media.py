@@ -0,0 +1,162 @@
+"""
+📦 SERVICE DES FICHIERS MÉDIA (images produits, variantes)
+
+Trois modes (MEDIA_SERVE_MODE) :
+- 'x-accel'    : nginx envoie le fichier (X-Accel-Redirect), le worker Python
+                 est libéré immédiatement ; nginx gère Range et sendfile
+- 'x-sendfile' : idem pour Apache (mod_xsendfile) / lighttpd
+- 'django'     : déploiement autonome ; FileResponse (sendfile zéro-copie
+                 via wsgi.file_wrapper quand le serveur le permet), avec
+                 requêtes Range (206), ETag / Last-Modified et 304
+
+Les fichiers nommés par leur contenu (app/storage.py) et leurs variantes
+sont envoyés avec Cache-Control: immutable, max-age d'un an. Une URL stable
+dont le contenu peut changer (variante servie par produit, ProductImageView)
+passe REVALIDATE : le client revalide avec l'ETag à chaque usage (304).
+
+Exemple nginx pour 'x-accel' (MEDIA_ACCEL_PREFIX = '/protected-media/') :
+
+    location /protected-media/ {
+        internal;
+        alias /app/media/;
+        expires 1d;
+    }
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from .storage import is_hashed_name
+
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+IMMUTABLE = {'public': True, 'max_age': 365 * 24 * 3600, 'immutable': True}
+REVALIDATE = {'public': True, 'no_cache': True}
+
+
+class RangeFile:
+    """
+    Fichier limité à [start, start + length) : read() s'arrête à la fin de la
+    plage, fileno() permet au serveur WSGI de faire un sendfile() partiel.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    'bytes=0-499' -> (0, 500). None si l'en-tête est absent ou non géré
+    (plages multiples...) : réponse complète. ValueError si non satisfiable.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # 'bytes=-500' : les 500 derniers octets
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("Plage non satisfiable")
+    return start, end - start + 1
+
+
+def media_response(request, name, cache_control=None):
+    """Réponse servant le fichier média `name` (chemin relatif à MEDIA_ROOT)."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    if cache_control is None:
+        cache_control = (
+            IMMUTABLE if is_hashed_name(name)
+            else {'public': True, 'max_age': getattr(settings, 'MEDIA_CACHE_MAX_AGE', 86400)}
+        )
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        patch_cache_control(not_modified, **cache_control)
+        return not_modified
+
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'django')
+    if mode == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/') + name)
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = _file_response(request, full_path, stat.st_size, content_type, etag, stat.st_mtime)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+def _file_response(request, full_path, size, content_type, etag, mtime):
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # If-Range : la plage n'est valable que si le fichier n'a pas changé
+    if not if_range or if_range == etag or parse_http_date_safe(if_range) == int(mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        return FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    start, length = byte_range
+    response = FileResponse(RangeFile(open(full_path, 'rb'), start, length), content_type=content_type, status=206)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+    return response
+
+
+def serve(request, path):
+    """Vue : GET {MEDIA_URL}<path>"""
+    return media_response(request, path)
@@ -0,0 +1,131 @@
+"""
+🧩 MIDDLEWARES DU PROJET
+
+- QueryInspectorMiddleware : signale les requêtes SQL lentes et répétées (N+1)
+- SerializerProfilingMiddleware : temps et requêtes par champ de serializer
+- CompressionMiddleware : compression br / gzip négociée des réponses
+"""
+
+from itertools import chain
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from .compression import (compress, compress_stream, is_excluded_type, is_html, negotiate_encoding,
+                          peek_stream, url_path_prefix)
+from .query_inspector import NPlusOneError, logger, record_queries
+from .serializer_profiling import profile_serializers
+
+
+class QueryInspectorMiddleware:
+    """
+    🔎 Détecteur N+1 par requête HTTP (développement / staging)
+
+    Désactivé (QUERY_INSPECTOR_ENABLED = False), le middleware se retire de
+    la chaîne au démarrage : aucun coût par requête.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.raise_on_repeat = getattr(settings, 'QUERY_INSPECTOR_RAISE', False)
+
+    def __call__(self, request):
+        with record_queries() as recorder:
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(recorder.total)
+        repeated = recorder.repeated()
+        if repeated or recorder.slow_queries:
+            report = recorder.report(f"{request.method} {request.path} :")
+            logger.warning(report)
+            if repeated and self.raise_on_repeat:
+                raise NPlusOneError(report)
+        return response
+
+
+class SerializerProfilingMiddleware:
+    """
+    ⏱️ Ajoute un en-tête Server-Timing avec les champs de serializer les plus
+    coûteux de la réponse (SERIALIZER_PROFILING = True).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERIALIZER_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile_serializers() as profile:
+            response = self.get_response(request)
+        if profile.fields:
+            response['Server-Timing'] = profile.server_timing()
+        return response
+
+
+class CompressionMiddleware:
+    """
+    🗜️ Compresse les réponses de l'API (br si disponible, sinon gzip)
+
+    Ne compresse pas :
+    - les réponses plus petites que COMPRESSION_MIN_SIZE octets (flux compris)
+    - les fichiers média / statiques et les types déjà compressés (images...)
+    - les pages HTML (BREACH, voir compression.is_html)
+    - les réponses partielles (Range) ou déjà encodées
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.excluded_prefixes = tuple(
+            prefix for prefix in map(url_path_prefix, (settings.MEDIA_URL, settings.STATIC_URL)) if prefix
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            response.has_header('Content-Encoding')
+            or response.status_code == 206
+            or request.path.startswith(self.excluded_prefixes)
+            or is_excluded_type(response.get('Content-Type', ''))
+            or is_html(response.get('Content-Type', ''))
+        ):
+            return response
+
+        # Le contenu dépend désormais d'Accept-Encoding, même s'il n'est pas compressé ici
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            length = response.get('Content-Length')
+            if length is not None and int(length) < self.min_size:
+                return response
+            head, rest = peek_stream(response.streaming_content, self.min_size)
+            if rest is None:
+                # Flux plus court que le seuil : envoyé tel quel
+                response.streaming_content = head
+                return response
+            response.streaming_content = compress_stream(chain(head, rest), encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < self.min_size:
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Un ETag fort ne correspond plus aux octets envoyés
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
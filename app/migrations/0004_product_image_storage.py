@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:40
+
+import app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(blank=True, storage=app.storage.product_image_storage, upload_to='products/'),
+        ),
+    ]
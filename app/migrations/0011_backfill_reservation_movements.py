@@ -0,0 +1,26 @@
+"""
+Réservations des commandes antérieures au journal de stock : rien à reprendre.
+
+Cette migration journalisait, pour chaque commande encore annulable, une
+réservation déjà compactée de la quantité commandée, en supposant que la
+création de commande avait décrémenté Product.stock. Ce n'était pas le cas :
+POST /orders/ (OrderCreateSerializer) ne touchait pas au stock, et les
+lignes ajoutées par add_item / OrderItemViewSet, elles décrémentées, ne se
+distinguent pas des autres en base. L'annulation rendait donc du stock
+jamais retiré.
+
+Les commandes antérieures au journal n'ont aucun mouvement : release_stock
+(solde des mouvements) n'en rend rien. Migration conservée vide pour ne pas
+rompre la chaîne des dépendances.
+"""
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_idempotency_keys'),
+    ]
+
+    operations = []
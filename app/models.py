@@ -1,7 +1,15 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 import uuid
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator
+from django.db.models.functions import Lower
+from django.utils import timezone
+from .storage import product_image_storage
+
+# Plafond des seuils de stock bas : l'index partiel product_low_stock_idx ne
+# couvre que stock < LOW_STOCK_CEILING (voir app/inventory.py)
+LOW_STOCK_CEILING = 50
 
 # Catégorie de produits
 class BaseModel(models.Model):
@@ -15,14 +23,20 @@ class BaseModel(models.Model):
 class Category(BaseModel):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
+    # En dessous, les produits de la catégorie sont en stock bas
+    low_stock_threshold = models.PositiveIntegerField(default=10, validators=[MaxValueValidator(LOW_STOCK_CEILING)])
     
 
     def __str__(self):
         return self.name
     
-    def save(self,  *args, **kwargs):
+    def set_default_description(self):
+        # Aussi appelé par l'écriture en masse (bulk_create n'appelle pas save)
         if not self.description:
             self.description =  f"Description de la catégorie : {self.name}."
+
+    def save(self,  *args, **kwargs):
+        self.set_default_description()
         return super().save( *args, **kwargs)
 
 # Produit vendu dans la boutique
@@ -31,7 +45,8 @@ class Product(BaseModel):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="products")
-    image = models.ImageField(upload_to="products/", blank=True)
+    # Fichiers nommés par leur hash : dédupliqués, URLs immuables (app/storage.py)
+    image = models.ImageField(upload_to="products/", blank=True, storage=product_image_storage)
     stock = models.PositiveIntegerField(default=0)
     supplier=models.ManyToManyField('Supplier',related_name='products')
     
@@ -39,7 +54,10 @@ class Product(BaseModel):
         ordering=['name']
         verbose_name='Produit'
         verbose_name_plural='Produits'
-        indexes =[models.Index(fields=['name', 'category'], name='product_name_category_idx')]
+        indexes =[models.Index(fields=['name', 'category'], name='product_name_category_idx'),
+                  # Index partiel : seuls les quelques produits presque épuisés y figurent
+                  models.Index(fields=['stock'], name='product_low_stock_idx',
+                               condition=models.Q(stock__lt=LOW_STOCK_CEILING))]
         
     # def clean(self):
     #     self.name = " ".join(self.name.split()).strip()
@@ -53,9 +71,53 @@ class Product(BaseModel):
     #     self.full_clean()
     #     return super().save( *args, **kwargs)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_stock = instance.__dict__.get('stock')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Product.stock (instantané) n'est écrit que par la compaction du journal :
+        # enregistrer une instance existante ne doit pas écraser une compaction
+        # concurrente. Un stock modifié sur l'instance (ou 'stock' dans
+        # update_fields) est le disponible voulu : journalisé par set_stock()
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            self._saved_stock = self.stock
+            return
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            stock_changed = (
+                'stock' in self.__dict__
+                and self.stock != getattr(self, '_saved_stock', self.stock)
+            )
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'stock'
+            ]
+        else:
+            stock_changed = 'stock' in update_fields
+            update_fields = [name for name in update_fields if name != 'stock']
+        kwargs['update_fields'] = update_fields
+        if not stock_changed:
+            return super().save(*args, **kwargs)
+
+        from .inventory import set_stock
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            set_stock(self, self.stock)
+        self._saved_stock = self.stock
+
     @property
     def in_stock(self):
-        return self.stock > 0
+        # Stock disponible (instantané + mouvements en attente, voir app/inventory.py) :
+        # annoté par les vues, sinon une requête
+        available = getattr(self, 'available_stock', None)
+        if available is None:
+            pending = self.stock_movements.filter(compacted=False).aggregate(total=models.Sum('delta'))['total']
+            available = self.stock + (pending or 0)
+        return available > 0
 
 
     def __str__(self):
@@ -69,14 +131,22 @@ class Order(BaseModel):
         CANCELLED = 'Cancelled', 'Cancelled'
 
     order_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    client =models.ForeignKey('Client',on_delete=models.CASCADE, related_name='orders')
+    # Pas d'index simple : couverts par les index composites (user|client, -created_at)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    client =models.ForeignKey('Client',on_delete=models.CASCADE, related_name='orders', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
     products = models.ManyToManyField(Product, through="OrderItem", related_name="orders")
     
     class Meta:
         ordering=['-created_at']
+        indexes = [
+            # Commandes en attente les plus anciennes (expiration des paniers)
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # my_orders / commandes d'un client, déjà triées (Meta.ordering)
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            models.Index(fields=['client', '-created_at'], name='order_client_created_idx'),
+        ]
         
     @property
     def total_price(self):
@@ -107,7 +177,8 @@ class OrderItem(BaseModel):
 
 # Avis laissé par un utilisateur sur un produit
 class Review(BaseModel):
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
+    # Pas d'index simple : couvert par (product, -created_at) et unique_together
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews', db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     rating = models.PositiveIntegerField()
     comment = models.TextField(blank=True)
@@ -119,6 +190,8 @@ class Review(BaseModel):
     class Meta:
         unique_together = ('product', 'user')
         ordering = ['-created_at']
+        # Avis d'un produit, déjà triés (Meta.ordering)
+        indexes = [models.Index(fields=['product', '-created_at'], name='review_product_created_idx')]
 
 
 
@@ -136,6 +209,19 @@ class Client(BaseModel):
         self.email = self.email
         
         return super().save(*args,**kwargs)
+
+    @classmethod
+    def email_owners(cls, emails):
+        """
+        {email en minuscules: pk du client} pour ceux de `emails` déjà utilisés,
+        sans tenir compte de la casse : la vérification de save() en une
+        requête pour un lot.
+        """
+        return dict(
+            cls.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in={email.lower() for email in emails})
+            .values_list('email_lower', 'pk')
+        )
     
     @property
     def orders_subtotal(self):
@@ -161,3 +247,159 @@ class Supplier(BaseModel):
 
     def __str__(self):
         return self.name
+
+
+# Tâche de fond exécutée par les workers (voir app/tasks.py)
+class Job(BaseModel):
+    class StatusChoices(models.TextChoices):
+        QUEUED = 'Queued', 'Queued'
+        RUNNING = 'Running', 'Running'
+        DONE = 'Done', 'Done'
+        FAILED = 'Failed', 'Failed'
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=StatusChoices.choices, default=StatusChoices.QUEUED)
+    # Deux enqueue() avec la même clé ne créent qu'une seule tâche
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['run_after']
+        indexes = [models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx')]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+# Agrégats de ventes journaliers, recalculés par app/reports.py
+class DailyProductSales(models.Model):
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_sales')
+    status = models.CharField(max_length=10, choices=Order.StatusChoices.choices)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Commandes distinctes contenant le produit ce jour-là
+    orders_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        unique_together = ('day', 'product', 'status')
+        indexes = [models.Index(fields=['day', 'category'], name='daily_sales_day_category_idx')]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id} ({self.status})"
+
+
+class DailyOrderSummary(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Order.StatusChoices.choices)
+    orders_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-day']
+        unique_together = ('day', 'status')
+
+    def __str__(self):
+        return f"{self.day} ({self.status})"
+
+
+# Dernier updated_at pris en compte par un recalcul incrémental
+class ReportWatermark(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} : {self.value}"
+
+
+# Instantané d'un classement (app/leaderboards.py), lu par tous les processus web
+class LeaderboardSnapshot(models.Model):
+    board = models.CharField(max_length=20)
+    window = models.CharField(max_length=20)
+    computed_at = models.DateTimeField()
+    results = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['board', 'window'], name='leaderboard_board_window_uniq')]
+
+    def __str__(self):
+        return f"{self.board} ({self.window})"
+
+
+# Franchissement d'un seuil de stock bas (flux incrémental, voir app/inventory.py)
+class StockAlert(models.Model):
+    class KindChoices(models.TextChoices):
+        LOW = 'low', 'Stock bas'
+        RESTOCKED = 'restocked', 'Réapprovisionné'
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_alerts')
+    kind = models.CharField(max_length=10, choices=KindChoices.choices)
+    stock = models.PositiveIntegerField()
+    threshold = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Le flux se lit par id croissant (curseur ?after=<id>)
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.product_id} {self.kind} ({self.stock}/{self.threshold})"
+
+
+# Mouvement de stock (journal append-only, voir app/inventory.py)
+# Stock disponible = Product.stock (instantané) + somme des mouvements non compactés
+class StockMovement(models.Model):
+    class ReasonChoices(models.TextChoices):
+        RESERVATION = 'reservation', 'Réservation (commande)'
+        CANCELLATION = 'cancellation', 'Annulation'
+        RESTOCK = 'restock', 'Réapprovisionnement'
+        ADJUSTMENT = 'adjustment', 'Ajustement'
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    delta = models.IntegerField()  # négatif : sortie de stock
+    reason = models.CharField(max_length=12, choices=ReasonChoices.choices)
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements')
+    # True une fois intégré à Product.stock par la compaction
+    compacted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # Index partiel : seuls les mouvements en attente de compaction
+            models.Index(fields=['product'], name='stock_movement_pending_idx',
+                         condition=models.Q(compacted=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.delta:+d} ({self.reason})"
+
+
+# Réponse mémorisée d'une requête portant un en-tête Idempotency-Key (voir app/idempotency.py)
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # Empreinte (action, chemin, corps) : une clé réutilisée pour une autre requête est refusée
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [models.Index(fields=['expires_at'], name='idempotency_expires_idx')]
+
+    def __str__(self):
+        return f"{self.user_id} {self.key} ({self.status_code})"
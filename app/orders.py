@@ -0,0 +1,156 @@
+"""
+🛒 TRANSITIONS D'ÉTAT DES COMMANDES (confirmation, annulation)
+
+Opérations ensemblistes, valables pour une commande comme pour des milliers
+(expiration des paniers abandonnés) :
+- un seul UPDATE conditionnel sur le statut (seules les commandes encore
+  dans un état de départ autorisé changent ; colonnes status / updated_at
+  uniquement)
+- à l'annulation, le stock réservé est rendu par un seul INSERT groupé dans
+  le journal des mouvements (app/inventory.py) : pour chaque commande et
+  produit, l'opposé du solde de ses mouvements. On ne rend donc que ce qui
+  a réellement été réservé, et jamais deux fois.
+
+Les paniers abandonnés (commandes en attente depuis plus de
+ORDERS_PENDING_TTL) sont annulés par lots par expire_pending_orders :
+tâche 'orders.expire_pending', mise en file toutes les ORDERS_EXPIRE_INTERVAL
+par les workers (schedule_expiry), ou `python manage.py expire_pending_orders`.
+"""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .inventory import journal_movements
+from .models import Order, OrderItem, StockMovement
+from .reports import schedule_sales_refresh
+from .tasks import enqueue
+
+
+CANCELLABLE = [Order.StatusChoices.PENDING, Order.StatusChoices.CONFIRMED]
+
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def order_total():
+    """Expression : montant d'une commande (Σ quantité × prix), 0 sans ligne."""
+    return Coalesce(
+        Sum(F('items__quantity') * F('items__product__price'), output_field=_MONEY),
+        Decimal('0'), output_field=_MONEY,
+    )
+
+
+def client_spent():
+    """Expression : total des commandes d'un client, en sous-requête (aucune commande chargée)."""
+    spent = (
+        OrderItem.objects.filter(order__client=OuterRef('pk'))
+        .values('order__client')
+        .annotate(spent=Sum(F('quantity') * F('product__price'), output_field=_MONEY))
+        .values('spent')
+    )
+    return Coalesce(Subquery(spent, output_field=_MONEY), Decimal('0'), output_field=_MONEY)
+
+
+def _transition(queryset, from_statuses, to_status, skip_locked):
+    """Verrouille puis fait passer en `to_status` les commandes encore en `from_statuses`."""
+    ids = list(
+        queryset.filter(status__in=from_statuses)
+        .select_for_update(skip_locked=skip_locked)
+        .order_by()
+        .values_list('pk', flat=True)
+    )
+    if ids:
+        Order.objects.filter(pk__in=ids).update(status=to_status, updated_at=timezone.now())
+    return ids
+
+
+def confirm_orders(order_ids):
+    """Confirme les commandes en attente parmi `order_ids`. Renvoie les ids confirmés."""
+    with transaction.atomic():
+        confirmed = _transition(
+            Order.objects.filter(pk__in=order_ids), [Order.StatusChoices.PENDING], Order.StatusChoices.CONFIRMED, False
+        )
+    if confirmed:
+        schedule_sales_refresh()
+    return confirmed
+
+
+def release_stock(order_ids):
+    """
+    Rend au stock le solde réservé des commandes (un INSERT groupé, produits
+    verrouillés par journal_movements). Renvoie {product_id: nouveau disponible}.
+    """
+    balances = (
+        StockMovement.objects.filter(order_id__in=order_ids)
+        .values('order_id', 'product_id')
+        .annotate(balance=Sum('delta'))
+        .filter(balance__lt=0)
+        .order_by()
+    )
+    return journal_movements(
+        [(row['product_id'], -row['balance'], row['order_id']) for row in balances],
+        StockMovement.ReasonChoices.CANCELLATION,
+    )
+
+
+def cancel_orders(order_ids, skip_locked=False):
+    """
+    Annule les commandes annulables parmi `order_ids` et rend leur stock,
+    dans une seule transaction. skip_locked : ignore les commandes en cours
+    de modification ailleurs au lieu de les attendre (traitements de masse).
+    Renvoie les ids annulés.
+    """
+    with transaction.atomic():
+        cancelled = _transition(
+            Order.objects.filter(pk__in=order_ids), CANCELLABLE, Order.StatusChoices.CANCELLED, skip_locked
+        )
+        if cancelled:
+            release_stock(cancelled)
+    if cancelled:
+        schedule_sales_refresh()
+    return cancelled
+
+
+def expire_pending_orders(ttl=None, batch=None, max_batches=None):
+    """
+    Annule les commandes en attente créées il y a plus de `ttl`, par lots de
+    `batch` (index order_status_created_idx) : chaque lot est une transaction
+    courte, les commandes verrouillées ailleurs sont laissées pour le
+    passage suivant. Renvoie (commandes annulées, durée en secondes).
+    """
+    ttl = ttl or getattr(settings, 'ORDERS_PENDING_TTL', timedelta(hours=24))
+    batch = batch or getattr(settings, 'ORDERS_EXPIRE_BATCH', 500)
+    cutoff = timezone.now() - ttl
+    started = time.perf_counter()
+    expired = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            Order.objects.filter(status=Order.StatusChoices.PENDING, created_at__lt=cutoff)
+            .order_by('created_at')
+            .values_list('pk', flat=True)[:batch]
+        )
+        if not ids:
+            break
+        cancelled = cancel_orders(ids, skip_locked=True)
+        batches += 1
+        expired += len(cancelled)
+        if not cancelled:
+            break  # uniquement des commandes verrouillées ailleurs : au prochain passage
+    return expired, time.perf_counter() - started
+
+
+def schedule_expiry():
+    """
+    Met en file l'expiration des paniers abandonnés : une tâche par
+    intervalle ORDERS_EXPIRE_INTERVAL (clé d'idempotence), quel que soit le
+    nombre de workers qui l'appellent (run_jobs, à chaque balayage).
+    """
+    interval = getattr(settings, 'ORDERS_EXPIRE_INTERVAL', timedelta(minutes=15))
+    bucket = int(timezone.now().timestamp() // interval.total_seconds())
+    return enqueue('orders.expire_pending', idempotency_key=f"orders.expire_pending:{bucket}")
@@ -0,0 +1,17 @@
+"""
+📄 PAGINATION
+
+Pagination par curseur (keyset) : la page N ne coûte pas plus cher que la
+première, contrairement à OFFSET, et s'appuie sur les index
+(client|user, -created_at).
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class RecentFirstCursorPagination(CursorPagination):
+    """Plus récents d'abord : ?cursor=... renvoyé dans next / previous"""
+    ordering = '-created_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
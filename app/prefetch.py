@@ -0,0 +1,51 @@
+"""
+🔗 PRÉCHARGEMENT DES N PREMIERS OBJETS LIÉS PAR PARENT
+
+`obj.products.all()[:5]` dans un serializer ignore tout prefetch_related et
+lance une requête par objet. prefetch_top() charge les N premiers objets liés
+de tous les parents en UNE requête : Django filtre avec une fonction de
+fenêtre (ROW_NUMBER() OVER (PARTITION BY parent ORDER BY ...)) sur
+PostgreSQL comme sur SQLite.
+
+    # vue
+    queryset = Supplier.objects.prefetch_related(prefetch_top(Supplier, 'products', 5))
+
+    # imbriqué : catégorie de chaque produit
+    Product.objects.select_related('category').prefetch_related(
+        prefetch_top(Category, 'products', 5, prefix='category__'))
+
+    # serializer : lit le prefetch s'il est là, sinon une seule requête
+    top_related(obj, 'products', 5)
+"""
+
+from django.db.models import Prefetch
+
+
+def top_attr(lookup):
+    """Attribut où prefetch_top() range les objets : 'products' -> 'top_products'."""
+    return f"top_{lookup}"
+
+
+def prefetch_top(model, lookup, limit, queryset=None, ordering=None, prefix=''):
+    """
+    Prefetch des `limit` premiers `lookup` de chaque `model`, triés selon
+    `ordering` (par défaut le Meta.ordering du modèle lié). `queryset` permet
+    d'ajouter select_related / only / annotations ; `prefix` d'atteindre
+    `model` depuis un autre queryset (ex. 'category__' depuis Product).
+    """
+    if queryset is None:
+        queryset = model._meta.get_field(lookup).related_model.objects.all()
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    return Prefetch(prefix + lookup, queryset=queryset[:limit], to_attr=top_attr(lookup))
+
+
+def top_related(obj, lookup, limit, ordering=None):
+    """Les `limit` premiers `lookup` de obj : depuis prefetch_top() si préchargés."""
+    prefetched = getattr(obj, top_attr(lookup), None)
+    if prefetched is not None:
+        return prefetched[:limit]
+    queryset = getattr(obj, lookup).all()
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    return list(queryset[:limit])
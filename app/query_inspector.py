@@ -0,0 +1,150 @@
+"""
+🔎 DÉTECTEUR DE REQUÊTES LENTES ET RÉPÉTÉES (N+1)
+
+Enregistre les requêtes SQL exécutées pendant une requête HTTP (ou un bloc de
+test), les regroupe par "forme" (le SQL sans ses valeurs) et signale :
+- les formes répétées plus de QUERY_INSPECTOR_REPEAT_THRESHOLD fois (N+1)
+- les requêtes plus lentes que QUERY_INSPECTOR_SLOW_MS millisecondes
+
+Chaque forme signalée est accompagnée de la pile Python du projet qui l'a
+déclenchée (en général un get_xxx() de serializer).
+
+UTILISATION DANS LES TESTS :
+---------------------------
+    from app.query_inspector import assert_no_n_plus_one
+
+    with assert_no_n_plus_one():
+        self.client.get('/api/v1/orders/')
+"""
+
+import logging
+import os
+import re
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('app.queries')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r'IN \((?:\?, )*\?\)')
+_SPACES = re.compile(r'\s+')
+
+_SKIPPED_FILES = {__file__, os.path.join(os.path.dirname(__file__), 'middleware.py')}
+
+
+class NPlusOneError(AssertionError):
+    """Levée quand une forme de requête est répétée trop souvent."""
+
+
+def fingerprint(sql):
+    """
+    Réduit une requête SQL à sa forme : valeurs et listes IN (...) remplacées
+    par des '?', pour que "WHERE id = 1" et "WHERE id = 2" soient identiques.
+    """
+    sql = sql.replace('%s', '?')
+    sql = _LITERALS.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _project_stack(limit=6):
+    """
+    Frames de la pile appartenant au projet, plus la frame la plus profonde
+    hors ORM (ex. rest_framework/fields.py pour un champ source='a.b').
+    """
+    base_dir = str(settings.BASE_DIR)
+    stack = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename not in _SKIPPED_FILES
+        and f'django{os.sep}db{os.sep}' not in frame.filename
+    ]
+    frames = [
+        frame for frame in stack
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename
+    ][-limit:]
+    if stack and (not frames or stack[-1] is not frames[-1]):
+        frames.append(stack[-1])
+    return [
+        f"{os.path.relpath(frame.filename, base_dir) if frame.filename.startswith(base_dir) else frame.filename}"
+        f":{frame.lineno} in {frame.name}"
+        for frame in frames
+    ]
+
+
+class QueryRecorder:
+    """
+    Wrapper d'exécution Django (connection.execute_wrapper) qui compte les
+    requêtes par forme et garde la pile de la première occurrence.
+    """
+
+    def __init__(self, repeat_threshold=None, slow_ms=None):
+        self.repeat_threshold = repeat_threshold or getattr(settings, 'QUERY_INSPECTOR_REPEAT_THRESHOLD', 3)
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(settings, 'QUERY_INSPECTOR_SLOW_MS', 100)
+        self.counts = defaultdict(int)
+        self.durations = defaultdict(float)
+        self.stacks = {}
+        self.slow_queries = []
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (perf_counter() - start) * 1000
+            shape = fingerprint(sql)
+            self.total += 1
+            self.counts[shape] += 1
+            self.durations[shape] += elapsed_ms
+            # La pile n'est capturée qu'au moment où la forme devient suspecte
+            if self.counts[shape] == 2:
+                self.stacks[shape] = _project_stack()
+            if self.slow_ms and elapsed_ms >= self.slow_ms:
+                self.slow_queries.append((elapsed_ms, shape, _project_stack()))
+
+    def repeated(self):
+        """Formes répétées au moins repeat_threshold fois, les plus fréquentes d'abord."""
+        return sorted(
+            (
+                (count, shape, self.durations[shape], self.stacks.get(shape, []))
+                for shape, count in self.counts.items()
+                if count >= self.repeat_threshold
+            ),
+            key=lambda entry: entry[0],
+            reverse=True,
+        )
+
+    def report(self, label=''):
+        lines = [f"{label} {self.total} requêtes SQL, {len(self.counts)} formes distinctes".strip()]
+        for count, shape, duration, stack in self.repeated():
+            lines.append(f"  [{count}x, {duration:.1f} ms] {shape[:200]}")
+            lines.extend(f"      {frame}" for frame in stack)
+        for elapsed_ms, shape, stack in self.slow_queries:
+            lines.append(f"  [lente {elapsed_ms:.1f} ms] {shape[:200]}")
+            lines.extend(f"      {frame}" for frame in stack)
+        return "\n".join(lines)
+
+
+@contextmanager
+def record_queries(repeat_threshold=None, slow_ms=None):
+    """Enregistre les requêtes de toutes les connexions pendant le bloc."""
+    recorder = QueryRecorder(repeat_threshold, slow_ms)
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def assert_no_n_plus_one(repeat_threshold=None):
+    """Fait échouer un test si une forme de requête est répétée (N+1)."""
+    with record_queries(repeat_threshold, slow_ms=0) as recorder:
+        yield recorder
+    if recorder.repeated():
+        raise NPlusOneError(recorder.report("Requêtes répétées détectées :"))
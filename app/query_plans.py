@@ -0,0 +1,275 @@
+"""
+🧭 PLANS D'EXÉCUTION DES QUERYSETS DES VIEWSETS
+
+Construit le queryset de chaque ViewSet (list / retrieve / actions) comme
+le ferait une vraie requête, l'évalue sur un échantillon borné pour
+déclencher aussi les prefetch_related, puis passe chaque requête SQL
+distincte dans EXPLAIN et résume le plan : coût, lignes estimées (et
+réelles avec ANALYZE), parcours séquentiels (tables lues en entier au lieu
+d'un index) et index suggérés d'après les colonnes filtrées.
+
+Utilisé par `python manage.py explain_viewsets`. Le résumé complet
+nécessite PostgreSQL ; sous SQLite, seuls le plan et les parcours
+séquentiels sont disponibles.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection, transaction
+from django.db.models import Count
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .models import Client, Order, OrderItem, Product, Review, Supplier
+from .query_inspector import fingerprint
+
+
+@dataclass
+class Scenario:
+    """Un accès d'un ViewSet : action, filtres représentatifs, objet échantillon."""
+    label: str
+    viewset: type
+    action: str
+    sample: object = None  # modèle dont un pk est pris pour retrieve
+    filters: dict = field(default_factory=dict)
+
+
+@dataclass
+class Statement:
+    """Une requête SQL distincte d'un scénario et le résumé de son plan."""
+    sql: str
+    params: tuple
+    plan: list = field(default_factory=list)
+    seq_scans: list = field(default_factory=list)
+    suggestions: list = field(default_factory=list)
+    total_cost: float = None
+    plan_rows: int = None
+    actual_rows: int = None
+    actual_ms: float = None
+
+    @property
+    def shape(self):
+        return fingerprint(self.sql)
+
+    def as_dict(self):
+        data = {
+            'sql': self.shape,
+            'total_cost': self.total_cost,
+            'plan_rows': self.plan_rows,
+            'seq_scans': self.seq_scans,
+            'suggestions': self.suggestions,
+        }
+        if self.actual_rows is not None:
+            data.update(actual_rows=self.actual_rows, actual_ms=self.actual_ms)
+        return data
+
+
+def get_scenarios():
+    from .views import ClientViewSet, OrderItemViewSet, OrderViewSet, ProductViewApi, ReviewViewSet, SupplierViewSet
+
+    return [
+        Scenario('orders.list', OrderViewSet, 'list'),
+        Scenario('orders.retrieve', OrderViewSet, 'retrieve', sample=Order),
+        Scenario('orders.my_orders', OrderViewSet, 'my_orders', filters={'user': 'request.user'}),
+        Scenario('orders.by_client', OrderViewSet, 'list', filters={'client': Client}),
+        Scenario('clients.list', ClientViewSet, 'list'),
+        Scenario('clients.retrieve', ClientViewSet, 'retrieve', sample=Client),
+        Scenario('products.list', ProductViewApi, 'list'),
+        Scenario('products.retrieve', ProductViewApi, 'retrieve', sample=Product),
+        Scenario('reviews.list', ReviewViewSet, 'list'),
+        Scenario('reviews.by_product', ReviewViewSet, 'list', filters={'product': Product}),
+        Scenario('order-items.list', OrderItemViewSet, 'list'),
+        Scenario('order-items.by_order', OrderItemViewSet, 'list', filters={'order': Order}),
+        Scenario('suppliers.list', SupplierViewSet, 'list'),
+        Scenario('suppliers.retrieve', SupplierViewSet, 'retrieve', sample=Supplier),
+    ]
+
+
+def representative_user():
+    """L'utilisateur ayant le plus de commandes : le cas le plus coûteux de my_orders."""
+    row = Order.objects.values('user').annotate(orders=Count('pk')).order_by('-orders').first()
+    return User.objects.get(pk=row['user']) if row else AnonymousUser()
+
+
+def _sample_pk(model):
+    # Objet le plus référencé plutôt que le premier venu
+    if model is Order:
+        row = OrderItem.objects.values('order').annotate(n=Count('pk')).order_by('-n').first()
+        return row and row['order']
+    if model is Product:
+        row = Review.objects.values('product').annotate(n=Count('pk')).order_by('-n').first()
+        if row:
+            return row['product']
+    if model is Client:
+        row = Order.objects.values('client').annotate(n=Count('pk')).order_by('-n').first()
+        return row and row['client']
+    return model.objects.order_by('pk').values_list('pk', flat=True).first()
+
+
+def build_queryset(scenario, user):
+    """Queryset tel que le ViewSet le construit pour cette action, ou None sans données."""
+    request = Request(APIRequestFactory().get('/'))
+    request.user = user
+    view = scenario.viewset(action=scenario.action, request=request, args=(), kwargs={}, format_kwarg=None)
+    queryset = view.get_queryset()
+    if scenario.action == 'list' and getattr(view, 'fast_list_serializer_class', None):
+        # list() passe par le serializer rapide (values_list + annotations) ;
+        # sans requête HTTP réelle, les URLs construites sont relatives
+        queryset = view.fast_list_serializer_class(context={'request': None}).get_queryset(queryset)
+
+    filters = {}
+    for name, value in scenario.filters.items():
+        if value == 'request.user':
+            value = user.pk
+        elif isinstance(value, type):
+            value = _sample_pk(value)
+            if value is None:
+                return None
+        filters[name] = value
+    if scenario.sample is not None:
+        pk = _sample_pk(scenario.sample)
+        if pk is None:
+            return None
+        filters['pk'] = pk
+    return queryset.filter(**filters)
+
+
+class _Capture:
+    """execute_wrapper : garde chaque requête SELECT distincte (SQL + paramètres)."""
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            self.statements.setdefault(fingerprint(sql), Statement(sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+
+def capture_statements(queryset, limit):
+    """Évalue queryset[:limit] (prefetch compris) et renvoie les requêtes exécutées."""
+    capture = _Capture()
+    with connection.execute_wrapper(capture):
+        list(queryset[:limit])
+    return list(capture.statements.values())
+
+
+# Colonnes comparées dans un « Filter » PostgreSQL : (user_id = 3),
+# ((status)::text = 'Pending'::text)... après suppression des conversions ::type
+_CAST = re.compile(r'::(?:character varying|timestamp with time zone|double precision|\w+)(?:\[\])?')
+_FILTER_COLUMN = re.compile(r'"?(\w+)"?\)?\s*(?:=|<>|<=|>=|<|>|~~\*?|IS\b)', re.IGNORECASE)
+
+
+def filter_columns(condition):
+    columns = []
+    for column in _FILTER_COLUMN.findall(_CAST.sub('', condition or '')):
+        if column not in columns and not column.isdigit():
+            columns.append(column)
+    return columns
+
+
+def indexed_prefixes(table):
+    """Premières colonnes de chaque index (et clé primaire / unique) de la table."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return {
+        tuple(info['columns']) for info in constraints.values()
+        if info['columns'] and (info['index'] or info['primary_key'] or info['unique'])
+    }
+
+
+def _suggest(table, columns):
+    """Index suggéré si aucun index existant ne commence par la première colonne filtrée."""
+    if not columns or any(prefix[0] == columns[0] for prefix in indexed_prefixes(table)):
+        return None
+    return f"index sur {table} ({', '.join(columns)})"
+
+
+def _explain_postgresql(statement, analyze):
+    options = 'FORMAT JSON, ANALYZE, BUFFERS' if analyze else 'FORMAT JSON'
+    with transaction.atomic(), connection.cursor() as cursor:
+        # ANALYZE exécute la requête : annulée dans tous les cas
+        cursor.execute(f'EXPLAIN ({options}) {statement.sql}', statement.params)
+        result = cursor.fetchone()[0]
+        transaction.set_rollback(True)
+    root = (json.loads(result) if isinstance(result, str) else result)[0]['Plan']
+
+    statement.total_cost = round(root['Total Cost'], 2)
+    statement.plan_rows = root['Plan Rows']
+    if analyze:
+        statement.actual_rows = root['Actual Rows']
+        statement.actual_ms = round(root['Actual Total Time'], 2)
+
+    def walk(node, depth):
+        relation = f" on {node['Relation Name']}" if 'Relation Name' in node else ''
+        index = f" using {node['Index Name']}" if 'Index Name' in node else ''
+        line = f"{'  ' * depth}{node['Node Type']}{relation}{index} (cost={node['Total Cost']:.2f} rows={node['Plan Rows']})"
+        if analyze:
+            line += f" (actual rows={node['Actual Rows']})"
+        statement.plan.append(line)
+
+        if node['Node Type'] == 'Seq Scan':
+            table = node['Relation Name']
+            statement.seq_scans.append(table)
+            suggestion = _suggest(table, filter_columns(node.get('Filter')))
+            if suggestion:
+                statement.suggestions.append(suggestion)
+            elif not node.get('Filter'):
+                statement.suggestions.append(f"{table} lue entièrement : liste sans filtre ni pagination ?")
+        if node['Node Type'] == 'Sort' and node.get('Plans', [{}])[0].get('Node Type') == 'Seq Scan':
+            statement.suggestions.append(f"tri sur {', '.join(node.get('Sort Key', []))} : index dans cet ordre ?")
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+
+
+def _explain_sqlite(statement):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement.sql, statement.params)
+        rows = cursor.fetchall()
+    # (id, parent, notused, detail) : "SCAN app_order" / "SEARCH app_order USING INDEX ..."
+    statement.plan = [row[-1] for row in rows]
+    # Sous-requêtes matérialisées (CO-ROUTINE qualify, (subquery-1)) : pas des tables
+    coroutines = {line.split()[1] for line in statement.plan if line.startswith('CO-ROUTINE ')}
+    for line in statement.plan:
+        if line.startswith('SCAN ') and 'USING' not in line and 'CONSTANT' not in line:
+            table = line.split()[1]
+            if table not in coroutines and not table.startswith('('):
+                statement.seq_scans.append(table)
+        if 'TEMP B-TREE FOR ORDER BY' in line:
+            statement.suggestions.append("tri sans index (TEMP B-TREE) : index dans l'ordre du ORDER BY ?")
+
+
+def explain(statement, analyze=False):
+    """
+    Remplit le résumé du plan. PostgreSQL : coût, estimation de lignes,
+    (réel avec analyze), parcours séquentiels et index suggérés. SQLite :
+    plan et parcours séquentiels seulement (EXPLAIN QUERY PLAN).
+    """
+    if connection.vendor == 'postgresql':
+        _explain_postgresql(statement, analyze)
+    elif connection.vendor == 'sqlite':
+        _explain_sqlite(statement)
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + statement.sql, statement.params)
+            statement.plan = [' | '.join(str(value) for value in row) for row in cursor.fetchall()]
+    statement.seq_scans = sorted(set(statement.seq_scans))
+    statement.suggestions = sorted(set(statement.suggestions))
+    return statement
+
+
+def explain_scenario(scenario, user, limit=20, analyze=False):
+    """
+    Requêtes du scénario avec leur plan, triées par forme (rapport stable,
+    comparable avec diff), ou None s'il n'y a pas de données échantillon.
+    """
+    queryset = build_queryset(scenario, user)
+    if queryset is None:
+        return None
+    statements = [explain(statement, analyze) for statement in capture_statements(queryset, limit)]
+    return sorted(statements, key=lambda statement: statement.shape)
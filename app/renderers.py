@@ -0,0 +1,222 @@
+"""
+🚀 RENDERER ET PARSER JSON RAPIDES (orjson)
+
+Remplacent rest_framework.renderers.JSONRenderer / parsers.JSONParser avec
+une sortie identique octet pour octet :
+- Decimal   -> nombre (comme le JSONEncoder de DRF)
+- UUID      -> chaîne
+- datetime  -> isoformat(), 'Z' pour UTC (OPT_UTC_Z), comme le JSONEncoder
+               de DRF ; DATETIME_FORMAT ne s'applique qu'aux champs de
+               serializer
+- U+2028 / U+2029 échappés comme le fait DRF
+
+Les cas que orjson ne gère pas à l'identique repassent par l'implémentation
+DRF : indentation demandée, JSON non compact, ASCII forcé, entiers > 64 bits,
+NaN / Infinity (null chez orjson ; erreur ou NaN chez DRF selon STRICT_JSON)
+et flottants écrits en notation scientifique par Python (1e+16 contre 1e16).
+Ces flottants sont cherchés d'après les types : Decimal dans default(),
+float dans les seuls champs de serializer qui peuvent en produire.
+"""
+
+import math
+from decimal import Decimal
+from types import UnionType
+from typing import Union, get_args, get_origin
+
+import orjson
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_drf_default = JSONEncoder().default
+
+# datetime écrits par orjson (isoformat(), 'Z' pour UTC comme DRF). Hors
+# TIME_ZONE = 'UTC', les datetime locaux peuvent porter un décalage à la
+# seconde près (heure solaire des dates anciennes) qu'orjson tronque : ils
+# repassent alors par default()
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+_LOCAL_OPTIONS = _OPTIONS | orjson.OPT_PASSTHROUGH_DATETIME
+
+# Champs dont la représentation ne contient jamais de flottant (chaîne,
+# entier, booléen, Decimal rendu par default()...) : non parcourus
+_FLOAT_FREE_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.DateField,
+    serializers.DateTimeField, serializers.DecimalField, serializers.DurationField, serializers.FileField,
+    serializers.IntegerField, serializers.ManyRelatedField, serializers.RelatedField, serializers.TimeField,
+    serializers.UUIDField,
+)
+
+# Spécification « tout parcourir » (valeur de type inconnu)
+_WALK = None
+
+_spec_cache = {}
+
+# Valeurs sans flottant, écartées sans autre test
+_SCALARS = frozenset({str, int, bool, type(None)})
+# Types de retour annoncés sans flottant (Decimal : vérifié par default())
+_FLOAT_FREE_TYPES = _SCALARS | {Decimal}
+
+
+def _same_as_repr(value):
+    """True si orjson écrit ce flottant comme repr() (donc comme json.dumps)."""
+    return value == 0 or 1e-4 <= abs(value) < 1e16
+
+
+def _unsafe_float(value):
+    return not math.isfinite(value) or not _same_as_repr(value)
+
+
+def _float_free_type(annotation):
+    """True si une annotation de type exclut tout flottant : str, int, Decimal..., list[str], dict[str, int] | None."""
+    origin = get_origin(annotation)
+    if origin is None:
+        return annotation in _FLOAT_FREE_TYPES
+    if origin not in (list, tuple, dict, set, frozenset, Union, UnionType):
+        return False
+    return all(arg is Ellipsis or _float_free_type(arg) for arg in get_args(annotation))
+
+
+def _float_spec(serializer):
+    """
+    Champs d'un serializer pouvant produire un flottant : {nom: spécification
+    du champ}, _WALK pour une valeur à parcourir entièrement. Un
+    SerializerMethodField en est exclu si sa méthode annonce un type de
+    retour sans flottant (`def get_in_stock(self, obj) -> bool`). Un
+    serializer qui connaît ses sorties l'indique dans `float_fields`
+    (app/fast_serializers.py).
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    declared = getattr(serializer, 'float_fields', None)
+    if declared is not None:
+        return declared
+    # Par classe, comme les colonnes de app/columns.py : un serializer par
+    # commande (get_items) ne reconstruit pas la spécification
+    spec = _spec_cache.get(type(serializer))
+    if spec is None:
+        spec = _spec_cache[type(serializer)] = _build_float_spec(serializer)
+    return spec
+
+
+def _build_float_spec(serializer):
+    spec = {}
+    for name, field in serializer.fields.items():
+        if field.write_only or isinstance(field, _FLOAT_FREE_FIELDS):
+            continue
+        if isinstance(field, serializers.BaseSerializer):
+            nested = _float_spec(field)
+            if nested:
+                spec[name] = nested
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            method = getattr(serializer, field.method_name, None)
+            annotations = getattr(method, '__annotations__', {})
+            if 'return' in annotations and _float_free_type(annotations['return']):
+                continue
+        spec[name] = _WALK
+    return spec
+
+
+def _check_values(values, spec, stack):
+    """True si une des valeurs est un flottant problématique ; les conteneurs sont empilés avec `spec`."""
+    for value in values:
+        if type(value) in _SCALARS:
+            continue
+        if isinstance(value, float):
+            if _unsafe_float(value):
+                return True
+        elif isinstance(value, (dict, list, tuple)):
+            stack.append((value, spec))
+    return False
+
+
+def _has_unsafe_float(data):
+    """
+    True si `data` contient un flottant qu'orjson n'écrit pas comme DRF. Les
+    données d'un serializer (ReturnDict / ReturnList, y compris dans une
+    réponse paginée) ne sont parcourues que dans les champs dont le type
+    peut produire un flottant.
+    """
+    stack = []
+    if _check_values([data], _WALK, stack):
+        return True
+    while stack:
+        item, spec = stack.pop()
+        if spec is _WALK:
+            serializer = getattr(item, 'serializer', None)
+            if serializer is not None:
+                spec = _float_spec(serializer)
+        if spec is _WALK:
+            if _check_values(item.values() if isinstance(item, dict) else item, _WALK, stack):
+                return True
+        elif isinstance(item, dict):
+            for name, field_spec in spec.items():
+                if _check_values([item.get(name)], field_spec, stack):
+                    return True
+        else:
+            # Lignes d'un serializer (many=True) : un champ à la fois sur toutes les lignes
+            for name, field_spec in spec.items():
+                if _check_values([row.get(name) for row in item], field_spec, stack):
+                    return True
+    return False
+
+
+def default(obj):
+    """Types non natifs pour orjson : mêmes conversions que le JSONEncoder de DRF."""
+    if isinstance(obj, Decimal):
+        value = float(obj)
+        if _unsafe_float(value):
+            # Decimal('NaN'), 1E+20... : rendu par DRF (erreur, NaN ou notation de repr())
+            raise TypeError("Flottant écrit autrement par DRF")
+        return value
+    return _drf_default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer basé sur orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (
+            self.get_indent(accepted_media_type, renderer_context) is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        options = _OPTIONS if settings.TIME_ZONE == 'UTC' else _LOCAL_OPTIONS
+        try:
+            ret = orjson.dumps(data, default=default, option=options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if _has_unsafe_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Séparateurs de ligne JavaScript, échappés par DRF (voir JSONRenderer.render)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser basé sur orjson (corps UTF-8 uniquement, sinon parser DRF)."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,144 @@
+"""
+📊 AGRÉGATS DE VENTES JOURNALIERS
+
+Les endpoints /api/v1/reports/... ne lisent que les tables d'agrégats
+DailyProductSales et DailyOrderSummary, jamais Order / OrderItem.
+
+Recalcul incrémental : seuls les jours (date de création des commandes)
+touchés par des commandes ou lignes modifiées depuis le dernier passage
+(watermark sur updated_at) sont recalculés. Le coût est donc proportionnel
+aux nouvelles données, pas à l'historique.
+
+- python manage.py refresh_sales_rollups [--full]
+- tâche de fond 'reports.refresh_sales', mise en file après chaque
+  modification de commande (schedule_sales_refresh)
+
+Limite : le chiffre d'affaires utilise le prix actuel du produit (les lignes
+ne stockent pas de prix unitaire) ; `refresh_sales_rollups --full` recalcule
+tout l'historique après un changement de prix à refléter.
+"""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import DailyOrderSummary, DailyProductSales, Order, OrderItem, ReportWatermark
+from .tasks import enqueue
+
+
+WATERMARK = 'sales_rollups'
+
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _day_filter(days, field):
+    """Q(field dans l'un des jours), en plages [début, fin) utilisables par un index."""
+    tz = timezone.get_current_timezone()
+    return reduce(or_, (
+        Q(**{
+            f"{field}__gte": datetime.combine(day, time.min, tzinfo=tz),
+            f"{field}__lt": datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz),
+        })
+        for day in days
+    ))
+
+
+def changed_days(since):
+    """Jours de commande touchés par une modification postérieure à `since`."""
+    if since is None:
+        return set(
+            Order.objects.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()
+        )
+    order_days = (
+        Order.objects.filter(updated_at__gt=since)
+        .annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()
+    )
+    item_days = (
+        OrderItem.objects.filter(updated_at__gt=since)
+        .annotate(day=TruncDate('order__created_at')).values_list('day', flat=True).distinct()
+    )
+    return set(order_days) | set(item_days)
+
+
+def rebuild_days(days):
+    """Recalcule entièrement les agrégats des jours donnés (supprime puis réinsère)."""
+    days = sorted(days)
+    if not days:
+        return 0
+
+    product_rows = (
+        OrderItem.objects.filter(_day_filter(days, 'order__created_at'))
+        .values('product_id', day=TruncDate('order__created_at'),
+                category_id=F('product__category_id'), status=F('order__status'))
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum(F('quantity') * F('product__price'), output_field=_MONEY),
+            orders_count=Count('order_id', distinct=True),
+        )
+        .order_by()
+    )
+    summary_rows = (
+        Order.objects.filter(_day_filter(days, 'created_at'))
+        .values('status', day=TruncDate('created_at'))
+        .annotate(
+            orders_count=Count('pk', distinct=True),
+            units=Coalesce(Sum('items__quantity'), 0),
+            revenue=Coalesce(
+                Sum(F('items__quantity') * F('items__product__price'), output_field=_MONEY),
+                Decimal('0'), output_field=_MONEY,
+            ),
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        DailyProductSales.objects.filter(day__in=days).delete()
+        DailyOrderSummary.objects.filter(day__in=days).delete()
+        DailyProductSales.objects.bulk_create(
+            (DailyProductSales(**row) for row in product_rows), batch_size=1000
+        )
+        DailyOrderSummary.objects.bulk_create(
+            (DailyOrderSummary(**row) for row in summary_rows), batch_size=1000
+        )
+    return len(days)
+
+
+def refresh_sales_rollups(full=False):
+    """
+    Recalcul incrémental depuis le watermark. Le nouveau watermark recule de
+    REPORTS_WATERMARK_OVERLAP pour ne pas manquer les transactions longues
+    validées après coup (recalculer un jour deux fois est sans effet).
+    """
+    started = timezone.now()
+    ReportWatermark.objects.get_or_create(name=WATERMARK)
+    with transaction.atomic():
+        # Verrou : deux recalculs simultanés s'exécutent l'un après l'autre
+        watermark = ReportWatermark.objects.select_for_update().get(name=WATERMARK)
+        refreshed = rebuild_days(changed_days(None if full else watermark.value))
+
+        overlap = getattr(settings, 'REPORTS_WATERMARK_OVERLAP', timedelta(minutes=5))
+        watermark.value = started - overlap
+        watermark.save(update_fields=['value'])
+    return refreshed
+
+
+def schedule_sales_refresh(deleted_day=None):
+    """
+    Met en file un recalcul dans la minute : toutes les modifications d'une
+    même minute partagent la même tâche (clé d'idempotence). `deleted_day` :
+    jour d'une commande supprimée, invisible pour le watermark.
+    """
+    bucket = timezone.now().strftime('%Y%m%d%H%M')
+    if deleted_day is None:
+        enqueue('reports.refresh_sales', idempotency_key=f"reports.refresh_sales:{bucket}", delay=60)
+    else:
+        day = deleted_day.isoformat()
+        enqueue('reports.refresh_sales', {'days': [day]},
+                idempotency_key=f"reports.refresh_sales:{bucket}:{day}", delay=60)
@@ -0,0 +1,122 @@
+"""
+⏱️ PROFILAGE DES SERIALIZERS PAR CHAMP
+
+Mesure, pour chaque champ de serializer (y compris les SerializerMethodField),
+le temps cumulé et le nombre de requêtes SQL déclenchées sur l'ensemble d'une
+réponse. Le temps d'un serializer imbriqué inclut celui de ses propres champs.
+
+Activation :
+- SERIALIZER_PROFILING = True : en-tête Server-Timing sur chaque réponse
+- python manage.py profile_serializers : tableau complet par endpoint
+"""
+
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+from rest_framework import serializers
+
+
+_current_profile = ContextVar('serializer_profile', default=None)
+
+
+class SerializerProfile:
+    """Statistiques cumulées par champ : 'Serializer.champ' -> [appels, secondes, requêtes]."""
+
+    def __init__(self):
+        self.fields = defaultdict(lambda: [0, 0.0, 0])
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def record(self, key, elapsed, queries, calls=1):
+        stats = self.fields[key]
+        stats[0] += calls
+        stats[1] += elapsed
+        stats[2] += queries
+
+    def rows(self):
+        """(champ, appels, millisecondes, requêtes), les plus coûteux d'abord."""
+        return sorted(
+            ((key, calls, seconds * 1000, queries) for key, (calls, seconds, queries) in self.fields.items()),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+
+    def server_timing(self, limit=10):
+        """Valeur d'en-tête Server-Timing (lisible dans l'onglet réseau du navigateur)."""
+        return ", ".join(
+            f'{key};dur={ms:.2f};desc="{calls}x, {queries} sql"'
+            for key, calls, ms, queries in self.rows()[:limit]
+        )
+
+
+@contextmanager
+def profile_serializers():
+    """Active le profilage des ProfiledModelSerializer pendant le bloc."""
+    profile = SerializerProfile()
+    token = _current_profile.set(profile)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(profile))
+            yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def current_profile():
+    """Profil actif (dans un bloc profile_serializers()), sinon None."""
+    return _current_profile.get()
+
+
+class _TimedField:
+    """
+    Champ tel que le voit Serializer.to_representation : get_attribute() et
+    to_representation() chronométrés sous la clé 'Serializer.champ', le reste
+    délégué au champ.
+    """
+
+    def __init__(self, field, profile, key):
+        self._field = field
+        self._profile = profile
+        self._key = key
+
+    def __getattr__(self, name):
+        return getattr(self._field, name)
+
+    def _timed(self, method, value, calls):
+        start = perf_counter()
+        queries = self._profile.queries
+        try:
+            return method(value)
+        finally:
+            self._profile.record(self._key, perf_counter() - start, self._profile.queries - queries, calls)
+
+    def get_attribute(self, instance):
+        return self._timed(self._field.get_attribute, instance, calls=1)
+
+    def to_representation(self, value):
+        # Même appel que get_attribute() : pas compté une seconde fois
+        return self._timed(self._field.to_representation, value, calls=0)
+
+
+class ProfiledModelSerializer(serializers.ModelSerializer):
+    """
+    Base des ModelSerializer du projet : sans profil actif, rien ne change ;
+    avec un profil, la boucle de Serializer.to_representation parcourt des
+    champs chronométrés.
+    """
+
+    @property
+    def _readable_fields(self):
+        fields = super()._readable_fields
+        profile = _current_profile.get()
+        if profile is None:
+            return fields
+        prefix = type(self).__name__
+        return (_TimedField(field, profile, f"{prefix}.{field.field_name}") for field in fields)
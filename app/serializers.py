@@ -27,16 +27,28 @@ ORDRE D'IMPLÉMENTATION :
 7. OrderItem (TODO - À FAIRE)
 """
 
+from collections import defaultdict
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import Product,Category,Supplier,OrderItem,Order,Client,Review,User
-from django.db.models import Avg
+from django.conf import settings
+from .models import Product,Category,Supplier,OrderItem,Order,Client,Review,User,StockAlert,StockMovement
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework.reverse import reverse
+from .images import FORMATS
+from .prefetch import top_related
+from .leaderboards import get_windows
+from .inventory import InsufficientStock, available_stock, reserve_stock, set_stock
+from django.db import transaction
+from .serializer_profiling import ProfiledModelSerializer
 
 
 # ============================================================================
 # 📁 CATEGORY SERIALIZERS (EXEMPLE COMPLET - ÉTUDIEZ-LE)
 # ============================================================================
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ProfiledModelSerializer):
    
     class Meta:
         model = Category
@@ -49,19 +61,23 @@ class CategorySerializer(serializers.ModelSerializer):
         return value.strip().title() 
    
 
-class CategoryListSerializer(serializers.ModelSerializer):
+class CategoryListSerializer(ProfiledModelSerializer):
     products_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
         fields = ['id','name', 'description','products_count','created_at']
     
-    def get_products_count(self, obj):
+    def get_products_count(self, obj) -> int:
         return obj.products.count()
    
    
     
-class CategoryDetailSerializer(serializers.HyperlinkedModelSerializer):
+# Nombre de produits listés dans les détails catégorie / fournisseur
+PRODUCT_NAMES_LIMIT = 5
+
+
+class CategoryDetailSerializer(ProfiledModelSerializer):
     product_names = serializers.SerializerMethodField()
 
     class Meta:
@@ -71,8 +87,9 @@ class CategoryDetailSerializer(serializers.HyperlinkedModelSerializer):
             'url':{'view_name':'category-detail','lookup_field':'pk'}
         }
         
-    def get_product_names(self, obj):
-        return [ product.name  for product in obj.products.all()[:5]]
+    def get_product_names(self, obj) -> list[str]:
+        # Préchargés par prefetch_top(Category, 'products', PRODUCT_NAMES_LIMIT) dans les vues
+        return [ product.name  for product in top_related(obj, 'products', PRODUCT_NAMES_LIMIT)]
     
     
 
@@ -86,7 +103,7 @@ class CategoryDetailSerializer(serializers.HyperlinkedModelSerializer):
 # - Validation : email doit être valide (déjà géré par EmailField)
 # - Validation : name doit faire au moins 2 caractères
 
-class SupplierCreateSerializer(serializers.ModelSerializer):
+class SupplierCreateSerializer(ProfiledModelSerializer):
     """
     ✍️ TODO : Compléter ce serializer pour créer un fournisseur
     """
@@ -107,19 +124,24 @@ class SupplierCreateSerializer(serializers.ModelSerializer):
 # - Champs : id, name, email, products_count
 # - products_count : utiliser SerializerMethodField pour compter les produits
 
-class SupplierListSerializer(serializers.ModelSerializer):
+class SupplierListSerializer(ProfiledModelSerializer):
     """
     📋 TODO : Serializer pour lister les fournisseurs
     """
     # TODO: Ajouter products_count avec SerializerMethodField
     products_count = serializers.SerializerMethodField()
+    # Colonnes lues par les champs méthode (voir app/columns.py)
+    column_sources = {'products_count': ()}
     
     class Meta:
         model = Supplier
         fields = ['id', 'name', 'email', 'products_count']  # TODO: Compléter
     
     # TODO: Implémenter get_products_count
-    def get_products_count(self, obj):
+    def get_products_count(self, obj) -> int:
+        # Annoté par SupplierViewSet.get_queryset (list)
+        if hasattr(obj, 'products_count'):
+            return obj.products_count
         return obj.products.count()
 
 
@@ -128,7 +150,7 @@ class SupplierListSerializer(serializers.ModelSerializer):
 # - Tous les champs du modèle
 # - Ajouter la liste des produits fournis (nom et prix seulement)
 
-class SupplierDetailSerializer(serializers.HyperlinkedModelSerializer):
+class SupplierDetailSerializer(ProfiledModelSerializer):
     """
     🔍 TODO : Serializer pour les détails complets d'un fournisseur
     """
@@ -145,10 +167,13 @@ class SupplierDetailSerializer(serializers.HyperlinkedModelSerializer):
         
     # TODO: Implémenter get_products
     
-    def get_products(self, obj):
-        return [product.name for product in obj.products.all()[:5] ]
+    def get_products(self, obj) -> list[str]:
+        # Préchargés par prefetch_top(Supplier, 'products', PRODUCT_NAMES_LIMIT) dans les vues
+        return [product.name for product in top_related(obj, 'products', PRODUCT_NAMES_LIMIT) ]
     
-    def get_products_count(self, obj):
+    def get_products_count(self, obj) -> int:
+        if hasattr(obj, 'products_count'):
+            return obj.products_count
         return obj.products.count()
   
 
@@ -162,7 +187,7 @@ class SupplierDetailSerializer(serializers.HyperlinkedModelSerializer):
 # - ClientListSerializer : id, first_name, last_name, email, orders_count
 # - ClientDetailSerializer : tous les champs + liste des commandes
 
-class ClientCreateSerializer(serializers.ModelSerializer):
+class ClientCreateSerializer(ProfiledModelSerializer):
     """
     ✍️ TODO : À compléter
     """
@@ -182,11 +207,21 @@ class ClientCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Le nom doit contenir au moins 2 caractères.")
         return value
 
+
+class ClientBulkSerializer(ClientCreateSerializer):
+    """
+    ✍️ Ligne d'une écriture en masse de clients : sans le UniqueValidator
+    (une requête par ligne) ; l'unicité de l'email, insensible à la casse,
+    est vérifiée pour tout le lot par ClientBulkView.check_rows.
+    """
+    class Meta(ClientCreateSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
     
     
 
 
-class ClientListSerializer(serializers.ModelSerializer):
+class ClientListSerializer(ProfiledModelSerializer):
     """
     📋 TODO : À compléter
     """
@@ -194,16 +229,20 @@ class ClientListSerializer(serializers.ModelSerializer):
     orders_count =serializers.SerializerMethodField()
     # TODO: Ajouter full_name (combinaison de first_name et last_name)
     full_name =serializers.SerializerMethodField()
+    # Colonnes lues par les champs méthode (voir app/columns.py)
+    column_sources = {'orders_count': (), 'full_name': ('first_name', 'last_name')}
     
     class Meta:
         model = Client
         fields = [ 'first_name', 'last_name', 'email', 'phone_number', 'address','orders_count','full_name']   # TODO
         
-    def get_orders_count(self, obj):
-        
+    def get_orders_count(self, obj) -> int:
+        # Annoté par ClientViewSet.get_queryset (list)
+        if hasattr(obj, 'orders_count'):
+            return obj.orders_count
         return obj.orders.count()
     
-    def get_full_name(self, obj):
+    def get_full_name(self, obj) -> str:
         first_name=obj.first_name or""
         last_name=obj.last_name or ""
         full_name=f"{first_name} {last_name}".strip()
@@ -211,7 +250,7 @@ class ClientListSerializer(serializers.ModelSerializer):
         return full_name
 
 
-class ClientDetailSerializer(serializers.ModelSerializer):
+class ClientDetailSerializer(ProfiledModelSerializer):
     """
     🔍 TODO : À compléter
     """
@@ -226,17 +265,23 @@ class ClientDetailSerializer(serializers.ModelSerializer):
         
         
     def get_orders_list(self, obj):
-        return [ {               "id": order.id,                "user": order.user.username if order.user else None,
-                "client": f"{order.client.first_name} {order.client.last_name}",
+        # `recent_orders` : préchargé et borné par ClientViewSet (les N plus récentes)
+        orders = getattr(obj, 'recent_orders', None)
+        if orders is None:
+            orders = obj.orders.select_related('user').order_by('-created_at')[:getattr(settings, 'CLIENT_RECENT_ORDERS', 5)]
+        return [ {               "id": order.pk,                "user": order.user.username if order.user else None,
+                "client": f"{obj.first_name} {obj.last_name}",
                 "status": order.status,
                 "created_at": order.created_at.isoformat() if hasattr(order, 'created_at') else None,
                 "total": str(order.total) if hasattr(order, 'total') else None
             }
-                for order in obj.orders.all()[:5]]
+                for order in orders]
     
         
     def get_total_price(self, obj):    
-        
+        # Annoté en base par ClientViewSet (client_spent) : pas de chargement des commandes
+        if hasattr(obj, 'orders_total'):
+            return obj.orders_total
         return obj.orders_subtotal
     
 
@@ -253,7 +298,7 @@ class ClientDetailSerializer(serializers.ModelSerializer):
 #   * Validation : stock >= 0
 #   * Validation : name doit faire au moins 3 caractères
 
-class ProductCreateSerializer(serializers.ModelSerializer):
+class ProductCreateSerializer(ProfiledModelSerializer):
     """
     ✍️ TODO : Serializer pour créer un produit
     
@@ -281,6 +326,22 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         if attrs <=0:
             raise serializers.ValidationError(" Validation : stock >= 0")
         return attrs
+
+    def update(self, instance, validated_data):
+        # Stock saisi = disponible voulu : journalisé comme ajustement (app/inventory.py),
+        # jamais écrit dans l'instantané sous des mouvements en attente
+        stock = validated_data.pop('stock', None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if stock is not None:
+                set_stock(instance, stock)
+        return instance
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'stock' in data:
+            data['stock'] = available_stock(instance.pk)
+        return data
     # TODO: validate_name
     def validate_name(self, value):
         # Nettoyer le nom
@@ -293,7 +354,7 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         return cleaned_name
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(ProfiledModelSerializer):
     """
     📋 TODO : Serializer pour lister les produits
     
@@ -305,17 +366,74 @@ class ProductListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     # TODO: Ajouter in_stock
     in_stock = serializers.SerializerMethodField()
+    # Miniatures (WebP + repli JPEG) générées par app/images.py
+    thumbnails = serializers.SerializerMethodField()
+    # Colonnes lues par les champs méthode (voir app/columns.py)
+    column_sources = {'in_stock': ('stock',), 'thumbnails': ('image',)}
     
     class Meta:
         model = Product
-        fields = ['id', 'name', 'price', 'category_name','in_stock','url']  # TODO: Compléter
+        fields = ['id', 'name', 'price', 'category_name','in_stock','url','thumbnails']  # TODO: Compléter
         # extra_kwagrs={'url':{'view_name':'','lookup_field':'pk'}}
-    def get_in_stock(self,obj):
+    def get_in_stock(self,obj) -> bool:
         
         return obj.in_stock
 
+    def get_thumbnails(self, obj) -> dict[str, str] | None:
+        if not obj.image:
+            return None
+        request = self.context.get('request')
+        return {
+            ext: reverse('product-image', kwargs={'pk': obj.pk, 'variant': 'thumb', 'ext': ext}, request=request)
+            for ext in FORMATS
+        }
+
+
+class LowStockProductSerializer(ProfiledModelSerializer):
+    """
+    📉 Produit sous le seuil de stock bas de sa catégorie
+    """
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    threshold = serializers.IntegerField(source='category.low_stock_threshold', read_only=True)
+    # Stock disponible, annoté par low_stock_products()
+    stock = serializers.IntegerField(source='available_stock', read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'stock', 'threshold', 'category', 'category_name']
+
+
+class StockAlertSerializer(ProfiledModelSerializer):
+    """
+    📉 Franchissement d'un seuil de stock (flux /product/stock-alerts/)
+    """
+    class Meta:
+        model = StockAlert
+        fields = ['id', 'product', 'kind', 'stock', 'threshold', 'created_at']
+
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class StockMovementSerializer(ProfiledModelSerializer):
+    """
+    📦 Mouvement du journal de stock
+    """
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'delta', 'reason', 'order', 'compacted', 'created_at']
+
+
+class ProductIdsSerializer(serializers.Serializer):
+    """📦 Identifiants pour la lecture groupée : ?ids=3,1,2 ou {"ids": [3, 1, 2]}"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Taille maximale lue dans les settings à chaque requête
+        self.fields['ids'] = serializers.ListField(
+            child=serializers.IntegerField(min_value=1), allow_empty=False,
+            max_length=getattr(settings, 'PRODUCT_BATCH_MAX', 200),
+        )
+
+
+class ProductDetailSerializer(ProfiledModelSerializer):
     """
     🔍 TODO : Serializer pour les détails d'un produit
     
@@ -333,20 +451,43 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     average_rating=serializers.SerializerMethodField()
     # TODO: reviews_count
     reviews_count =serializers.SerializerMethodField()
+    # Instantané + mouvements pas encore compactés (app/inventory.py) ; `stock`
+    # aussi : l'instantané seul est en retard jusqu'à la compaction
+    available_stock = serializers.SerializerMethodField()
+    stock = serializers.SerializerMethodField(method_name='get_available_stock')
     
     class Meta:
         model = Product
         fields = '__all__'
         
+    @staticmethod
+    def annotate_queryset(queryset):
+        """Moyenne et nombre d'avis en sous-requêtes : aucune requête par produit."""
+        reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+        return queryset.annotate(
+            review_average=Subquery(reviews.annotate(value=Avg('rating')).values('value')),
+            review_count=Coalesce(Subquery(reviews.annotate(value=Count('pk')).values('value')), 0),
+        )
+
     def get_average_rating(self, obj):
         """Calcule la moyenne des notes pour ce produit."""
-        avg = obj.reviews.aggregate(Avg('rating'))['rating__avg']
+        if hasattr(obj, 'review_average'):
+            avg = obj.review_average
+        else:
+            avg = obj.reviews.aggregate(Avg('rating'))['rating__avg']
         return round(avg, 1) if avg else 0.0
 
-    def get_reviews_count(self, obj):
+    def get_reviews_count(self, obj) -> int:
         """Renvoie le nombre d'avis liés à ce produit."""
+        if hasattr(obj, 'review_count'):
+            return obj.review_count
         return obj.reviews.count()
 
+    def get_available_stock(self, obj) -> int:
+        if hasattr(obj, 'available_stock'):
+            return obj.available_stock
+        return available_stock(obj.pk)
+
 
 # ============================================================================
 # 📁 REVIEW SERIALIZERS
@@ -360,7 +501,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
 # - ReviewListSerializer : id, product_name, user_name, rating, created_at
 # - ReviewDetailSerializer : tous les champs avec détails du produit
 
-class ReviewCreateSerializer(serializers.ModelSerializer):
+class ReviewCreateSerializer(ProfiledModelSerializer):
     """
     ✍️ TODO : À compléter
     """
@@ -379,7 +520,7 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
     # TODO: validate_comment (min 10 caractères)
 
 
-class ReviewListSerializer(serializers.ModelSerializer):
+class ReviewListSerializer(ProfiledModelSerializer):
     """
     📋 TODO : À compléter
     """
@@ -393,7 +534,7 @@ class ReviewListSerializer(serializers.ModelSerializer):
         fields = ['id','product_name','username','rating','comment','created_at'] # TODO
 
 
-class ReviewDetailSerializer(serializers.ModelSerializer):
+class ReviewDetailSerializer(ProfiledModelSerializer):
     """
     🔍 TODO : À compléter
     """
@@ -437,17 +578,41 @@ class ReviewDetailSerializer(serializers.ModelSerializer):
 
 # serializers.py
 
-class OrderItemCreateSerializer(serializers.ModelSerializer):
+class PrefetchedProductField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField qui lit d'abord les produits chargés par la liste (`prefetched`)."""
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched is not None and not isinstance(data, bool):
+            try:
+                return self.prefetched[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class OrderItemListCreateSerializer(serializers.ListSerializer):
+    """Lignes d'une commande : produits chargés en une requête (in_bulk), pas un SELECT par ligne."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            ids = {str(item.get('product')) for item in data if isinstance(item, dict)}
+            self.child.fields['product'].prefetched = Product.objects.in_bulk([int(pk) for pk in ids if pk.isdigit()])
+        return super().to_internal_value(data)
+
+
+class OrderItemCreateSerializer(ProfiledModelSerializer):
     """🎁 Serializer minimal pour créer les items en même temps que la commande"""
-    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
-    quantity = serializers.IntegerField()
+    product = PrefetchedProductField(queryset=Product.objects.all())
+    quantity = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = OrderItem
         fields = ['product', 'quantity']
+        list_serializer_class = OrderItemListCreateSerializer
 
 
-class OrderCreateSerializer(serializers.ModelSerializer):
+class OrderCreateSerializer(ProfiledModelSerializer):
     items = OrderItemCreateSerializer(many=True, write_only=True)
 
     class Meta:
@@ -456,14 +621,29 @@ class OrderCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
-        order = Order.objects.create(**validated_data)
+        # Commande, lignes et réservations de stock : tout ou rien, en un
+        # nombre constant de requêtes. Produits verrouillés par id croissant :
+        # pas d'interblocage entre deux commandes
+        quantities = defaultdict(int)
         for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
+            quantities[item_data['product'].pk] += item_data['quantity']
+        with transaction.atomic():
+            order = Order.objects.create(**validated_data)
+            try:
+                reserve_stock(quantities, order)
+            except InsufficientStock as exc:
+                raise serializers.ValidationError({'items': f"Stock insuffisant pour le produit {exc.args[0]}"})
+            OrderItem.objects.bulk_create([OrderItem(order=order, **item_data) for item_data in items_data])
         return order
 
 
 
-class OrderListSerializer(serializers.ModelSerializer):
+class OrderIdsSerializer(serializers.Serializer):
+    """🛒 Liste d'identifiants de commandes pour les opérations en masse"""
+    order_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=1000)
+
+
+class OrderListSerializer(ProfiledModelSerializer):
     """
     📋 Serializer léger pour lister les commandes
     """
@@ -479,7 +659,7 @@ class OrderListSerializer(serializers.ModelSerializer):
     # def get_order_id(self, obj):
     #     return getattr(obj, 'order_id', obj.id)
 
-    def get_client_name(self, obj):
+    def get_client_name(self, obj) -> str | None:
         client = getattr(obj, 'client', None)
         if not client:
             return None
@@ -487,12 +667,12 @@ class OrderListSerializer(serializers.ModelSerializer):
         last = getattr(client, 'last_name', '') or ''
         return f"{first} {last}".strip() or None
 
-    def get_items_count(self, obj):
+    def get_items_count(self, obj) -> int:
         if hasattr(obj, 'items'):
             return obj.items.count()
         return obj.orderitem_set.count() if hasattr(obj, 'orderitem_set') else 0
 
-    def get_total_amount(self, obj):
+    def get_total_amount(self, obj) -> Decimal | int:
         # Preferer une propriété 'total' si présente sur le modèle
         total = getattr(obj, 'total', None)
         if total is not None:
@@ -513,7 +693,7 @@ class OrderListSerializer(serializers.ModelSerializer):
         return s
 
 
-class OrderDetailSerializer(serializers.ModelSerializer):
+class OrderDetailSerializer(ProfiledModelSerializer):
     """
     🔍 Serializer détaillé pour une commande
     """
@@ -533,7 +713,7 @@ class OrderDetailSerializer(serializers.ModelSerializer):
         serializer = OrderItemListSerializer(items_qs.all(), many=True, context=self.context)
         return serializer.data
 
-    def get_total_amount(self, obj):
+    def get_total_amount(self, obj) -> Decimal | int:
         total = getattr(obj, 'total', None)
         if total is not None:
             return total
@@ -564,7 +744,7 @@ class OrderDetailSerializer(serializers.ModelSerializer):
 # - OrderItemDetailSerializer : tous les champs avec détails
 
 
-class OrderItemListSerializer(serializers.ModelSerializer):
+class OrderItemListSerializer(ProfiledModelSerializer):
     """
     📋 Serializer pour lister les lignes d'une commande
     """
@@ -576,10 +756,10 @@ class OrderItemListSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ['id', 'product_name', 'quantity', 'unit_price', 'subtotal']
 
-    def get_unit_price(self, obj):
+    def get_unit_price(self, obj) -> Decimal | None:
         return getattr(obj, 'unit_price', None) or getattr(obj.product, 'price', None)
 
-    def get_subtotal(self, obj):
+    def get_subtotal(self, obj) -> Decimal | int:
         # Preferer une propriété 'subtotal' si présente sur le modèle
         subtotal = getattr(obj, 'subtotal', None)
         if subtotal is not None:
@@ -592,7 +772,7 @@ class OrderItemListSerializer(serializers.ModelSerializer):
             return 0
 
 
-class OrderItemDetailSerializer(serializers.ModelSerializer):
+class OrderItemDetailSerializer(ProfiledModelSerializer):
     """
     🔍 Serializer détaillé pour une ligne de commande
     """
@@ -602,3 +782,37 @@ class OrderItemDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = '__all__'
+
+
+# ============================================================================
+# 📊 RAPPORTS DE VENTES
+# ============================================================================
+
+class ReportQuerySerializer(serializers.Serializer):
+    """
+    📊 Paramètres de requête des rapports : ?start=2024-01-01&end=2024-01-31&status=Confirmed&limit=10
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=Order.StatusChoices.choices, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError("start doit précéder end")
+        return attrs
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """
+    🏆 Paramètres des classements : ?window=30d&limit=10
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Fenêtres et taille lues dans les settings à chaque requête
+        windows = list(get_windows())
+        self.fields['window'] = serializers.ChoiceField(choices=windows, default=windows[-1])
+        self.fields['limit'] = serializers.IntegerField(
+            min_value=1, max_value=getattr(settings, 'LEADERBOARDS_SIZE', 50), default=10
+        )
@@ -0,0 +1,82 @@
+"""
+🚀 TEMPS DE DÉMARRAGE D'UN PROCESSUS (démarrage à froid, autoscaling)
+
+Un nouveau worker ne sert sa première requête qu'après avoir importé
+Django, les settings, les modèles, les URLs (donc les vues et serializers)
+et la pile de middlewares. measure_startup() lance un interpréteur neuf
+(`python -X importtime`) et renvoie :
+- la durée de chaque phase : settings, apps (django.setup : AppConfig et
+  modèles), urls (ROOT_URLCONF, vues, serializers), wsgi (middlewares)
+- le temps d'import propre de chaque module, et le total par paquet
+
+Utilisé par `python manage.py profile_startup` et par le test de budget
+(STARTUP_BUDGET) dans app/tests.py.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+
+# Exécuté dans l'interpréteur neuf : une ligne JSON {phase: secondes} sur stdout
+_PROBE = """
+import json, time
+started = time.perf_counter()
+phases = {}
+
+def phase(name, func):
+    start = time.perf_counter()
+    func()
+    phases[name] = time.perf_counter() - start
+
+import django
+from django.conf import settings
+phase('settings', lambda: settings.INSTALLED_APPS)
+phase('apps', django.setup)
+from django.urls import get_resolver
+phase('urls', lambda: get_resolver().url_patterns)
+from django.core.wsgi import get_wsgi_application
+phase('wsgi', get_wsgi_application)
+phases['total'] = time.perf_counter() - started
+print(json.dumps(phases))
+"""
+
+# « import time:       412 |        913 |   django.db.models »
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def parse_importtime(output):
+    """Lignes de -X importtime -> [(module, propre en s, cumulé en s)]."""
+    modules = []
+    for line in output.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6))
+    return modules
+
+
+def measure_startup(settings_module=None):
+    """
+    Démarre un interpréteur neuf avec les settings du projet et renvoie
+    {'phases': {phase: s}, 'modules': [(module, propre, cumulé)], 'packages': {paquet: s}}.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module or settings.SETTINGS_MODULE}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    packages = defaultdict(float)
+    for module, own, _ in modules:
+        packages[module.split('.')[0]] += own
+    return {
+        'phases': phases,
+        'modules': sorted(modules, key=lambda row: row[1], reverse=True),
+        'packages': dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+    }
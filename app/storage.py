@@ -0,0 +1,89 @@
+"""
+🔐 STOCKAGE ADRESSÉ PAR CONTENU (images produits)
+
+Les fichiers sont enregistrés sous le hash SHA-256 de leur contenu :
+
+    products/Capture.png  ->  products/3f/3fa1c0...e9.png
+
+- la même image uploadée pour 50 produits n'est stockée qu'une fois
+- un nom = un contenu : l'URL ne change jamais de contenu et peut être
+  mise en cache indéfiniment (Cache-Control: immutable, voir app/media.py)
+- les fichiers existants sont migrés par `python manage.py rehash_media`
+"""
+
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+HASH_LENGTH = 32  # 128 bits, largement suffisant contre les collisions
+
+# Nom produit par ce stockage (aussi pour les variantes dérivées)
+HASHED_NAME = re.compile(r'(^|/)([0-9a-f]{2})/\2[0-9a-f]{%d}\.\w+$' % (HASH_LENGTH - 2))
+
+
+def content_hash(content):
+    sha = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks() if hasattr(content, 'chunks') else iter(lambda: content.read(64 * 1024), b''):
+        sha.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return sha.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, content):
+    """'products/photo.PNG' + contenu -> 'products/3f/3fa1...e9.png'"""
+    directory, filename = os.path.split(name)
+    digest = content_hash(content)
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join(directory, digest[:2], f"{digest}{ext}")
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage qui nomme les fichiers par leur contenu et ne les écrit qu'une fois."""
+
+    def get_available_name(self, name, max_length=None):
+        # Nom déterministe : jamais de suffixe "_aBc123" ajouté
+        return name
+
+    def _save(self, name, content):
+        name = hashed_name(name, content)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name  # contenu déjà stocké : dédupliqué
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+
+        # Écriture dans un fichier temporaire puis renommage atomique : deux
+        # uploads simultanés du même contenu écrivent le même fichier final
+        tmp_path = f"{full_path}.{uuid.uuid4().hex}.tmp"
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), tmp_path)
+        else:
+            with open(tmp_path, 'wb') as tmp:
+                for chunk in content.chunks():
+                    tmp.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        os.replace(tmp_path, full_path)
+        return name
+
+
+def product_image_storage():
+    """Stockage de Product.image (callable : non figé dans les migrations)."""
+    return ContentAddressedStorage()
@@ -0,0 +1,236 @@
+"""
+⚙️ FILE DE TÂCHES EN BASE DE DONNÉES (sans broker externe)
+
+Les traitements lourds (variantes d'images, recalcul d'agrégats, exports)
+sont mis en file dans la table Job au lieu d'être exécutés dans la requête
+HTTP, puis exécutés par `python manage.py run_jobs --workers N`.
+
+- enqueue() écrit la tâche dans la transaction de l'appelant : les workers
+  ne la voient qu'après son commit, et jamais si elle est annulée
+- clé d'idempotence : une seule tâche par clé
+- réessais avec backoff exponentiel jusqu'à max_attempts
+- tâches RUNNING sans signe de vie depuis JOBS_STALE_AFTER (worker mort)
+  remises en file par les workers, toutes les JOBS_SWEEP_INTERVAL
+- JOBS_EAGER = True : exécution dans le processus après le commit (dev / tests)
+
+DÉCLARER UNE TÂCHE :
+-------------------
+    @task('images.generate_variants')
+    def generate_image_variants(name):
+        ...
+
+    enqueue('images.generate_variants', {'name': name}, idempotency_key=f"images:{name}")
+"""
+
+import logging
+import os
+import socket
+import traceback
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger('app.tasks')
+
+_handlers = {}
+
+
+def task(name):
+    """Décorateur : enregistre une fonction comme gestionnaire de tâche."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(name, payload=None, idempotency_key=None, delay=0, max_attempts=5):
+    """
+    Met une tâche en file et la renvoie. Si une tâche avec la même clé
+    d'idempotence existe déjà, elle est renvoyée telle quelle (ou remise en
+    file si elle avait définitivement échoué).
+    """
+    if name not in _handlers:
+        raise ValueError(f"Tâche inconnue : {name}")
+
+    job = Job(
+        name=name,
+        payload=payload or {},
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        job = Job.objects.get(idempotency_key=idempotency_key)
+        if job.status == Job.StatusChoices.FAILED:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.StatusChoices.QUEUED, attempts=0, run_after=timezone.now(), updated_at=timezone.now()
+            )
+        return job
+
+    if getattr(settings, 'JOBS_EAGER', False):
+        transaction.on_commit(lambda: run_now(job))
+    return job
+
+
+def claim_jobs(worker, limit=10):
+    """
+    Réserve jusqu'à `limit` tâches prêtes pour ce worker. SKIP LOCKED évite
+    que les workers PostgreSQL se bloquent entre eux ; la mise à jour
+    conditionnelle garantit qu'une tâche n'est prise qu'une fois partout.
+    """
+    now = timezone.now()
+    claimed = []
+    with transaction.atomic():
+        candidates = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.StatusChoices.QUEUED, run_after__lte=now)
+            .order_by('run_after')[:limit]
+        )
+        for job in candidates:
+            won = Job.objects.filter(pk=job.pk, status=Job.StatusChoices.QUEUED).update(
+                status=Job.StatusChoices.RUNNING, locked_by=worker, attempts=job.attempts + 1, updated_at=now
+            )
+            if won:
+                job.status, job.locked_by, job.attempts = Job.StatusChoices.RUNNING, worker, job.attempts + 1
+                claimed.append(job)
+    return claimed
+
+
+def run_now(job):
+    """Réserve une tâche en file pour ce processus et l'exécute (JOBS_EAGER)."""
+    worker = worker_id()
+    won = Job.objects.filter(pk=job.pk, status=Job.StatusChoices.QUEUED).update(
+        status=Job.StatusChoices.RUNNING, locked_by=worker, attempts=F('attempts') + 1, updated_at=timezone.now()
+    )
+    if won:
+        job.refresh_from_db(fields=['status', 'locked_by', 'attempts'])
+        return run_job(job)
+    return None
+
+
+def run_job(job):
+    """
+    Exécute une tâche réservée et enregistre son résultat (succès, réessai ou
+    échec). Renvoie None sans l'exécuter si elle n'est plus réservée par ce
+    worker : restée trop longtemps dans son lot, elle a été remise en file
+    (requeue_stale_jobs) et peut déjà tourner ailleurs.
+    """
+    # Signe de vie au démarrage : updated_at date du début de la tâche, pas de la réservation du lot
+    started = Job.objects.filter(pk=job.pk, status=Job.StatusChoices.RUNNING, locked_by=job.locked_by).update(
+        updated_at=timezone.now()
+    )
+    if not started:
+        logger.warning("Tâche %s (%s) reprise par un autre worker, ignorée", job.name, job.pk)
+        return None
+
+    handler = _handlers.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"Aucun gestionnaire pour la tâche {job.name}")
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        attempts = max(job.attempts, 1)
+        if attempts >= job.max_attempts:
+            logger.error("Tâche %s (%s) en échec définitif :\n%s", job.name, job.pk, error)
+            updates = {'status': Job.StatusChoices.FAILED}
+        else:
+            # 2, 4, 8... secondes, plafonné à une heure
+            updates = {
+                'status': Job.StatusChoices.QUEUED,
+                'run_after': timezone.now() + timedelta(seconds=min(2 ** attempts, 3600)),
+            }
+        Job.objects.filter(pk=job.pk).update(last_error=error, updated_at=timezone.now(), **updates)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status=Job.StatusChoices.DONE, last_error='', updated_at=timezone.now())
+    return True
+
+
+def requeue_stale_jobs(stale_after=None):
+    """
+    Remet en file les tâches RUNNING sans signe de vie depuis `stale_after` :
+    worker disparu, ou tâche restée dans le lot d'un worker occupé (run_job
+    ne l'exécutera pas). JOBS_STALE_AFTER doit dépasser la plus longue tâche.
+    """
+    stale_after = stale_after or getattr(settings, 'JOBS_STALE_AFTER', timedelta(minutes=10))
+    return Job.objects.filter(
+        status=Job.StatusChoices.RUNNING, updated_at__lt=timezone.now() - stale_after
+    ).update(status=Job.StatusChoices.QUEUED, locked_by='', updated_at=timezone.now())
+
+
+def purge_finished_jobs(keep=None):
+    """Supprime les tâches terminées depuis plus de JOBS_KEEP_DONE."""
+    keep = keep or getattr(settings, 'JOBS_KEEP_DONE', timedelta(days=7))
+    deleted, _ = Job.objects.filter(
+        status=Job.StatusChoices.DONE, updated_at__lt=timezone.now() - keep
+    ).delete()
+    return deleted
+
+
+# ============================================================================
+# 📋 GESTIONNAIRES DE TÂCHES
+# ============================================================================
+
+@task('images.generate_variants')
+def generate_image_variants(name):
+    """Miniatures WebP / JPEG d'une image produit (voir app/images.py)."""
+    from .images import generate_variants
+    generate_variants(name)
+
+
+@task('reports.refresh_sales')
+def refresh_sales(days=None):
+    """
+    Agrégats de ventes journaliers (voir app/reports.py). `days` : jours
+    (ISO) à recalculer en plus, ceux que le watermark ne peut pas voir
+    (commande ou ligne supprimée).
+    """
+    from .leaderboards import schedule_refresh
+    from .reports import rebuild_days, refresh_sales_rollups
+    if days:
+        rebuild_days({date.fromisoformat(day) for day in days})
+    refresh_sales_rollups()
+    schedule_refresh()
+
+
+@task('leaderboards.refresh')
+def refresh_leaderboards():
+    """Instantanés des classements (voir app/leaderboards.py)."""
+    from .leaderboards import refresh_all
+    refresh_all()
+
+
+@task('inventory.compact')
+def compact_inventory():
+    """Intègre les mouvements de stock en attente dans Product.stock (voir app/inventory.py)."""
+    from .inventory import compact_ledger
+    compact_ledger()
+
+
+@task('orders.expire_pending')
+def expire_pending():
+    """Annule les paniers abandonnés et rend leur stock (voir app/orders.py)."""
+    from .orders import expire_pending_orders
+    expired, elapsed = expire_pending_orders()
+    logger.info("%s commande(s) en attente expirée(s) en %.2f s", expired, elapsed)
+
+
+@task('idempotency.purge')
+def purge_idempotency_keys():
+    """Supprime les clés d'idempotence expirées (voir app/idempotency.py)."""
+    from .idempotency import purge_expired_keys
+    purge_expired_keys()
@@ -1,5 +1,60 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
+from decimal import Decimal
+from io import BytesIO, StringIO
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework import serializers, status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from . import inventory, throttling
+from .columns import serializer_columns
+from .compression import SUPPORTED_ENCODINGS, negotiate_encoding, url_path_prefix
+from .idempotency import request_fingerprint
+from .images import variant_name
+from .media import media_response
+from .middleware import CompressionMiddleware
+from .inventory import InsufficientStock, available_stock, compact_ledger, record_movements
+from .models import (LOW_STOCK_CEILING, Category, Client, DailyOrderSummary, Job, LeaderboardSnapshot, Order, OrderItem,
+                     Product, ReportWatermark, StockAlert, StockMovement, Supplier)
+from .orders import cancel_orders, expire_pending_orders
+from .query_inspector import assert_no_n_plus_one
+from .prefetch import top_related
+from .query_plans import filter_columns, get_scenarios
+from .renderers import ORJSONRenderer, _float_spec
+from .reports import WATERMARK, refresh_sales_rollups
+from .serializer_profiling import profile_serializers
+from .serializers import (PRODUCT_NAMES_LIMIT, ClientListSerializer, ProductDetailSerializer, ProductListSerializer,
+                          SupplierListSerializer)
+from .startup import measure_startup
+from .tasks import claim_jobs, enqueue, refresh_sales, requeue_stale_jobs, run_job
+
 # from django.urls import reverse
-# from rest_framework import status
+# from rest_framework import serializers, status
 # from rest_framework.test import APITestCase
 # from .models import Category
 # from django.contrib.auth.models import User
@@ -46,7 +101,1137 @@
 #         response = self.client.delete(self.delete_url)
 #         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 #         self.assertFalse(Category.objects.filter(pk=self.category.pk).exists())
-p ="fhh".split()
-n=" ".join(p)
-print(p)
-print(n)
\ No newline at end of file
+
+class StartupBudgetTestCase(SimpleTestCase):
+    """🚀 Démarrage à froid d'un processus (voir app/startup.py)"""
+
+    # Mesure en temps réel, sensible à la machine : lancée à la demande
+    # (STARTUP_BUDGET_TEST=1 python manage.py test app), pas à chaque exécution
+    @skipUnless(os.environ.get('STARTUP_BUDGET_TEST'), "STARTUP_BUDGET_TEST non défini")
+    def test_cold_start_under_budget(self):
+        """✅ Interpréteur neuf -> application WSGI prête en moins de STARTUP_BUDGET"""
+        # Le plus rapide de deux démarrages : le premier peut payer le cache disque
+        total = min(measure_startup()['phases']['total'] for _ in range(2))
+        self.assertLess(total, settings.STARTUP_BUDGET, f"démarrage en {total:.2f} s")
+
+    def test_serializer_classes_resolved_without_import(self):
+        """✅ Serializer par action lu dans un dictionnaire préparé au chargement"""
+        from .serializers import ProductCreateSerializer, ProductDetailSerializer, ProductListSerializer
+        from .views import ProductViewApi
+
+        for action, expected in [('list', ProductListSerializer), ('create', ProductCreateSerializer),
+                                 ('partial_update', ProductCreateSerializer), ('retrieve', ProductDetailSerializer),
+                                 ('batch', ProductDetailSerializer)]:
+            self.assertIs(ProductViewApi(action=action).get_serializer_class(), expected)
+
+
+class RendererTestCase(SimpleTestCase):
+    """🚀 ORJSONRenderer : mêmes octets que le JSONRenderer de DRF"""
+
+    def assert_same_bytes(self, data, strict=True):
+        drf, fast = JSONRenderer(), ORJSONRenderer()
+        drf.strict = fast.strict = strict
+        self.assertEqual(fast.render(data), drf.render(data))
+
+    def test_types_converted_like_drf(self):
+        self.assert_same_bytes({
+            'decimal': Decimal('12.50'),
+            'uuid': UUID('12345678-1234-5678-1234-567812345678'),
+            'aware': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'offset': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=2))),
+            'naive': datetime(2024, 5, 1, 12, 30),
+            'text': "ligne\u2028suivante\u2029fin", 'ids': [1, 2, 3],
+        })
+        self.assert_same_bytes({'none': None, 'decimal': Decimal('0.10')})
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S'})
+    def test_raw_datetimes_ignore_datetime_format(self):
+        self.assert_same_bytes([datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone.utc), datetime(2024, 5, 1)])
+
+    def test_floats_formatted_like_repr(self):
+        self.assert_same_bytes([1e16, 1.5e-7, 1e-5, 0.0001, 123.25, -0.0, 1e300, {'e': [2e22]}])
+        self.assert_same_bytes({'total': Decimal('12345678901234567890.5')})
+        self.assert_same_bytes({'name': "1e5, 0.00001", 'price': 0.5})
+
+    def test_non_finite_floats(self):
+        for value in (float('nan'), float('inf'), Decimal('NaN')):
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({'value': value})
+        self.assert_same_bytes({'values': [float('nan'), float('-inf'), None]}, strict=False)
+
+    def test_serializer_floats_checked_by_field_type(self):
+        class MeasureSerializer(serializers.Serializer):
+            name = serializers.CharField()
+            value = serializers.FloatField()
+
+        for value in (1e16, 1e-5, float('nan'), 2.5):
+            data = MeasureSerializer([{'name': "a", 'value': value}], many=True).data
+            self.assert_same_bytes(data, strict=False)
+            self.assert_same_bytes({'count': 1, 'next': None, 'results': data}, strict=False)
+        self.assert_same_bytes({'big': Decimal('1E+20'), 'small': Decimal('0.00001')})
+
+    def test_float_free_fields_not_walked(self):
+        # Champs typés (CharField...) et méthodes annotées sans flottant : rien à parcourir
+        self.assertEqual(_float_spec(ProductListSerializer(many=True)), {})
+        self.assertEqual(_float_spec(ProductDetailSerializer()), {'average_rating': None})
+
+    def test_null_keeps_fast_path(self):
+        class LabelSerializer(serializers.Serializer):
+            name = serializers.CharField(allow_null=True)
+            price = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+
+        data = LabelSerializer([{'name': None, 'price': None}, {'name': "a", 'price': Decimal('1.50')}], many=True).data
+        with mock.patch.object(JSONRenderer, 'render', side_effect=AssertionError):
+            ORJSONRenderer().render({'next': None, 'results': data, 'value': 0.5})
+
+    @override_settings(TIME_ZONE='Europe/Paris')
+    def test_local_offsets_with_seconds(self):
+        # Heure solaire de Paris avant 1911 : +00:09:21, tronqué par orjson
+        self.assert_same_bytes({'at': datetime(1900, 1, 1, tzinfo=ZoneInfo('Europe/Paris'))})
+        self.assert_same_bytes({'at': datetime(2024, 5, 1, 12, 30, tzinfo=ZoneInfo('Europe/Paris'))})
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionTestCase(SimpleTestCase):
+    """🗜️ CompressionMiddleware : négociation, seuil et exclusions"""
+
+    body = b'{"name": "produit"}' * 20
+
+    def respond(self, response, path='/api/v1/product/', accept_encoding='gzip'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate_encoding('gzip;q=0.5, identity'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, br;q=0'))
+        self.assertIsNone(negotiate_encoding('identity'))
+        self.assertEqual(negotiate_encoding('*'), SUPPORTED_ENCODINGS[0])
+        self.assertEqual(negotiate_encoding('*;q=0.5, gzip;q=0.8'), 'gzip')
+        self.assertIsNone(negotiate_encoding('*;q=0'))
+
+    def test_compressed_with_vary(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_not_compressed(self):
+        cases = [
+            (HttpResponse(self.body[:99], content_type='application/json'), '/api/v1/product/', 'gzip'),
+            (HttpResponse(self.body, content_type='application/json'), '/api/v1/product/', 'gzip;q=0'),
+            (HttpResponse(self.body, content_type='image/png'), '/api/v1/product/', 'gzip'),
+            (HttpResponse(self.body, content_type='text/html; charset=utf-8'), '/api/v1/product/', 'gzip'),
+            (HttpResponse(self.body, content_type='text/css'), '/static/app.css', 'gzip'),
+            (HttpResponse(self.body, content_type='application/json'), '/media/data.json', 'gzip'),
+        ]
+        for response, path, accept_encoding in cases:
+            with self.subTest(path=path, content_type=response['Content-Type'], accept_encoding=accept_encoding):
+                self.assertFalse(self.respond(response, path, accept_encoding).has_header('Content-Encoding'))
+
+    def test_excluded_prefixes_normalised(self):
+        self.assertEqual(url_path_prefix('static/'), '/static/')
+        self.assertEqual(url_path_prefix('/media/'), '/media/')
+        self.assertIsNone(url_path_prefix('https://cdn.example.com/static/'))
+
+    def test_streaming_threshold(self):
+        short = self.respond(StreamingHttpResponse([b'{"a": ', b'1}'], content_type='application/json'))
+        self.assertFalse(short.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(short.streaming_content), b'{"a": 1}')
+
+        long = self.respond(StreamingHttpResponse([self.body, self.body], content_type='application/json'))
+        self.assertEqual(long['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(long.streaming_content)), self.body * 2)
+
+
+def legacy_order(user, client, quantities):
+    """Commande d'avant le journal de stock : lignes créées sans toucher au stock"""
+    order = Order.objects.create(user=user, client=client)
+    for product, quantity in quantities.items():
+        OrderItem.objects.create(order=order, product=product, quantity=quantity)
+    return order
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class ShopTestCase(APITestCase):
+    """
+    Jeu de données commun : un administrateur, une catégorie, des produits et
+    un client. Sans limitation de débit, seaux vidés à chaque test.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "secret")
+        cls.category = Category.objects.create(name="Electronique", low_stock_threshold=5)
+        cls.products = [
+            Product.objects.create(name=f"Produit {index}", price="10.00", category=cls.category, stock=20)
+            for index in range(4)
+        ]
+        cls.shop_client = Client.objects.create(first_name="Ada", last_name="Lovelace", email="ada@example.com")
+
+    def setUp(self):
+        throttling.reset()
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def create_order(self, quantities, **extra):
+        """POST /orders/ avec {produit: quantité}"""
+        return self.client.post(reverse('order-list'), {
+            'user': self.admin.pk, 'client': self.shop_client.pk, 'status': Order.StatusChoices.PENDING,
+            'items': [{'product': product.pk, 'quantity': quantity} for product, quantity in quantities.items()],
+        }, format='json', **extra)
+
+
+class OrderQueriesTestCase(ShopTestCase):
+    """🔍 Requêtes des commandes : aucune forme répétée par ligne (N+1)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for _ in range(4):
+            order = Order.objects.create(user=cls.admin, client=cls.shop_client)
+            for product in cls.products:
+                OrderItem.objects.create(order=order, product=product, quantity=1)
+        cls.order = order
+
+    def test_list_without_n_plus_one(self):
+        with assert_no_n_plus_one():
+            response = self.client.get(reverse('order-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_without_n_plus_one(self):
+        with assert_no_n_plus_one():
+            response = self.client.get(reverse('order-detail', args=[self.order.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['items']), len(self.products))
+
+    def test_detail_queries_do_not_grow_with_items(self):
+        # Commande (+ user, client), lignes, produits annotés du stock disponible,
+        # orders_count du client, ids de `products` : constant quel que soit le nombre de lignes
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('order-detail', args=[self.order.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_item_detail_without_query_per_product(self):
+        # in_stock lit le disponible annoté, mouvements en attente compris
+        record_movements({self.products[0].pk: -20}, StockMovement.ReasonChoices.RESERVATION)
+        item = self.order.items.get(product=self.products[0])
+        # Ligne (+ commande, client), produit annoté, lignes de la commande, leurs produits
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('orderitem-detail', args=[item.pk]))
+        self.assertFalse(response.data['product']['in_stock'])
+        self.assertEqual(response.data['order']['items_count'], len(self.products))
+
+    def test_create_without_n_plus_one(self):
+        with assert_no_n_plus_one():
+            response = self.create_order({product: 2 for product in self.products})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(item['quantity'] for item in response.data['items']), [2] * len(self.products))
+
+
+class ClientDetailTestCase(ShopTestCase):
+    """👤 Détail client : commandes récentes bornées, historique paginé"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_client = Client.objects.create(first_name="Alan", last_name="Turing", email="alan@example.com")
+        now = timezone.now()
+        cls.orders = []
+        for index in range(8):
+            order = Order.objects.create(user=cls.admin, client=cls.shop_client)
+            OrderItem.objects.create(order=order, product=cls.products[index % 4], quantity=index + 1)
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=index))
+            cls.orders.append(order)
+        order = Order.objects.create(user=cls.admin, client=cls.other_client)
+        OrderItem.objects.create(order=order, product=cls.products[0], quantity=1)
+
+    def retrieve(self, client):
+        return self.client.get(reverse('client-detail', args=[client.pk]))
+
+    def test_recent_orders_bounded(self):
+        response = self.retrieve(self.shop_client)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recent = response.data['orders_list']
+        self.assertEqual([order['id'] for order in recent], [order.pk for order in self.orders[:5]])
+        self.assertEqual([Decimal(order['total']) for order in recent], [Decimal(10 * n) for n in range(1, 6)])
+        # Total de tout l'historique, pas seulement des commandes affichées
+        self.assertEqual(Decimal(response.data['total_price']), Decimal('360.00'))
+
+    def test_queries_independent_of_history(self):
+        with CaptureQueriesContext(connection) as small:
+            self.retrieve(self.other_client)
+        with CaptureQueriesContext(connection) as large:
+            self.retrieve(self.shop_client)
+        self.assertEqual(len(large), len(small))
+
+    def test_history_paginated(self):
+        url = reverse('client-orders', args=[self.shop_client.pk])
+        first = self.client.get(url, {'page_size': 5})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        second = self.client.get(first.data['next'])
+        self.assertIsNone(second.data['next'])
+        ids = [order['order_id'] for order in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, [str(order.pk) for order in self.orders])
+
+
+class TopRelatedTestCase(ShopTestCase):
+    """🔗 N premiers produits par catégorie / fournisseur : une requête pour tous les parents"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.products += [
+            Product.objects.create(name=f"Produit {index}", price="10.00", category=cls.category, stock=20)
+            for index in range(4, 8)
+        ]
+        cls.small_category = Category.objects.create(name="Livres")
+        Product.objects.create(name="Livre", price="10.00", category=cls.small_category, stock=20)
+        cls.suppliers = [Supplier.objects.create(name=f"Fournisseur {index}") for index in range(3)]
+        cls.suppliers[0].products.set(cls.products)
+        cls.suppliers[1].products.set(cls.products[:1])
+        cls.products[0].supplier.set(cls.suppliers)
+        cls.products[1].supplier.set(cls.suppliers[:1])
+        cls.first_names = [f"Produit {index}" for index in range(PRODUCT_NAMES_LIMIT)]
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_category_detail(self):
+        response, large = self.count_queries(reverse('category-detail', args=[self.category.pk]))
+        self.assertEqual(response.data['product_names'], self.first_names)
+        _, small = self.count_queries(reverse('category-detail', args=[self.small_category.pk]))
+        self.assertEqual(large, small)
+
+    def test_supplier_detail(self):
+        response, large = self.count_queries(reverse('supplier-detail', args=[self.suppliers[0].pk]))
+        self.assertEqual(response.data['products'], self.first_names)
+        self.assertEqual(response.data['products_count'], 8)
+        _, small = self.count_queries(reverse('supplier-detail', args=[self.suppliers[1].pk]))
+        self.assertEqual(large, small)
+
+    def test_product_detail_nested_suppliers(self):
+        # Trois fournisseurs imbriqués ou un seul : même nombre de requêtes
+        response, many = self.count_queries(reverse('product-detail', args=[self.products[0].pk]))
+        self.assertEqual([supplier['products'] for supplier in response.data['supplier']],
+                         [self.first_names, ["Produit 0"], ["Produit 0"]])
+        _, one = self.count_queries(reverse('product-detail', args=[self.products[1].pk]))
+        self.assertEqual(many, one)
+
+    def test_fallback_without_prefetch(self):
+        with self.assertNumQueries(1):
+            names = [product.name for product in top_related(self.category, 'products', 3)]
+        self.assertEqual(names, self.first_names[:3])
+
+
+class ProductBatchTestCase(ShopTestCase):
+    """📦 Lecture groupée de produits : ordre demandé, ids manquants, requêtes fixes"""
+
+    url = reverse('product-batch')
+
+    def test_request_order_and_missing_ids(self):
+        ids = [self.products[2].pk, self.products[0].pk, 999999, self.products[2].pk]
+        response = self.client.get(self.url, {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([product['id'] for product in response.data['results']],
+                         [self.products[2].pk, self.products[0].pk])
+        self.assertEqual(response.data['missing'], [999999])
+
+        response = self.client.post(self.url, {'ids': ids[::-1]}, format='json')
+        self.assertEqual([product['id'] for product in response.data['results']],
+                         [self.products[2].pk, self.products[0].pk])
+
+    def test_invalid_ids_rejected(self):
+        for params in ({'ids': '1,abc'}, {'ids': '0'}, {}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+        with override_settings(PRODUCT_BATCH_MAX=2):
+            response = self.client.post(self.url, {'ids': [1, 2, 3]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_queries_independent_of_batch_size(self):
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(self.url, {'ids': str(self.products[0].pk)})
+        with CaptureQueriesContext(connection) as all_products:
+            self.client.get(self.url, {'ids': ','.join(str(product.pk) for product in self.products)})
+        self.assertEqual(len(all_products), len(one))
+
+
+@override_settings(FAST_LIST_SERIALIZERS=False)
+class ReadColumnsTestCase(ShopTestCase):
+    """📐 Listes : only() déduit du serializer, aucune colonne chargée après coup"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Product.objects.update(description="x" * 1000)
+        for index in range(3):
+            Supplier.objects.create(name=f"Fournisseur {index}", address="x" * 1000)
+            Client.objects.create(first_name="Client", last_name=str(index), email=f"client{index}@example.com")
+
+    def test_column_sets(self):
+        self.assertEqual(serializer_columns(SupplierListSerializer, Supplier), ['email', 'id', 'name'])
+        self.assertEqual(serializer_columns(ProductListSerializer, Product, {'category': {}}),
+                         ['category', 'category__name', 'id', 'image', 'name', 'price', 'stock'])
+        self.assertEqual(serializer_columns(ClientListSerializer, Client),
+                         ['address', 'email', 'first_name', 'id', 'last_name', 'phone_number'])
+
+    def test_undeclared_method_field_loads_every_column(self):
+        class Undeclared(SupplierListSerializer):
+            column_sources = {}
+
+        self.assertIsNone(serializer_columns(Undeclared, Supplier))
+
+    def test_lists_without_deferred_loads(self):
+        # Une colonne lue mais absente de only() : une requête par ligne
+        for name, model, skipped in [('product-list', Product, 'description'), ('supplier-list', Supplier, 'address'),
+                                     ('client-list', Client, None)]:
+            with assert_no_n_plus_one() as recorder:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), model.objects.count())
+            if skipped:
+                column = f'"{model._meta.db_table}"."{skipped}"'
+                self.assertFalse([shape for shape in recorder.counts if column in shape], name)
+
+
+class QueryPlansTestCase(ShopTestCase):
+    """🧭 Audit des plans : chaque scénario expliqué, rapport stable"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        supplier = Supplier.objects.create(name="Fournisseur")
+        supplier.products.set(cls.products)
+        order = Order.objects.create(user=cls.admin, client=cls.shop_client)
+        OrderItem.objects.create(order=order, product=cls.products[0], quantity=1)
+
+    def explain_json(self, *args):
+        stdout = StringIO()
+        call_command('explain_viewsets', '--format', 'json', *args, stdout=stdout)
+        return json.loads(stdout.getvalue())
+
+    def test_every_scenario_explained(self):
+        report = self.explain_json()
+        self.assertEqual(report['vendor'], connection.vendor)
+        self.assertEqual(set(report['scenarios']), {scenario.label for scenario in get_scenarios()})
+        for label, statements in report['scenarios'].items():
+            self.assertTrue(statements, label)
+            for statement in statements:
+                self.assertTrue(statement['sql'].startswith('SELECT'), label)
+        # Diffable : deux passages identiques
+        self.assertEqual(self.explain_json('--only', 'orders'), self.explain_json('--only', 'orders'))
+
+    def test_filter_columns(self):
+        self.assertEqual(filter_columns("((status)::text = 'Pending'::text)"), ['status'])
+        self.assertEqual(filter_columns('((user_id = 3) AND (created_at < now()))'), ['user_id', 'created_at'])
+        self.assertEqual(filter_columns(None), [])
+
+
+class FastListSerializersTestCase(ShopTestCase):
+    """⚡ Listes rapides : même JSON que les ModelSerializer qu'elles remplacent"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Product.objects.filter(pk=cls.products[0].pk).update(image='products/ab/photo.png')
+        Product.objects.filter(pk=cls.products[1].pk).update(stock=0)
+        anonymous = Client.objects.create(first_name="", last_name="", email="anonyme@example.com")
+        Order.objects.create(user=cls.admin, client=anonymous)  # sans article, sans nom
+        order = Order.objects.create(user=cls.admin, client=cls.shop_client, status=Order.StatusChoices.CONFIRMED)
+        OrderItem.objects.create(order=order, product=cls.products[0], quantity=3)
+        OrderItem.objects.create(order=order, product=cls.products[2], quantity=1)
+
+    def assert_same_as_drf(self, url):
+        fast = self.client.get(url).json()
+        with self.settings(FAST_LIST_SERIALIZERS=False):
+            drf = self.client.get(url).json()
+        self.assertEqual(fast, drf)
+        return fast
+
+    def test_products(self):
+        data = self.assert_same_as_drf(reverse('product-list'))
+        self.assertEqual({product['id']: product['thumbnails'] is None for product in data},
+                         {product.pk: product is not self.products[0] for product in self.products})
+
+    def test_orders(self):
+        data = self.assert_same_as_drf(reverse('order-list'))
+        self.assertEqual(sorted((order['client_name'] or '', order['items_count']) for order in data),
+                         [('', 0), ('Ada Lovelace', 2)])
+
+
+class SerializerProfilingTestCase(ShopTestCase):
+    """⏱️ Profilage par champ : mêmes réponses, temps attribués aux champs"""
+
+    def profiled_fields(self, url):
+        unprofiled = self.client.get(url).json()
+        with profile_serializers() as profile:
+            response = self.client.get(url)
+        self.assertEqual(response.json(), unprofiled)
+        return {key: calls for key, calls, _, _ in profile.rows()}
+
+    def test_fields_timed_per_row(self):
+        fields = self.profiled_fields(reverse('category-detail', args=[self.category.pk]))
+        self.assertEqual(fields['CategoryDetailSerializer.product_names'], 1)
+        self.assertEqual(fields['CategoryDetailSerializer.url'], 1)
+
+    @override_settings(FAST_LIST_SERIALIZERS=False)
+    def test_model_serializer_list(self):
+        fields = self.profiled_fields(reverse('product-list'))
+        self.assertEqual(fields['ProductListSerializer.thumbnails'], len(self.products))
+
+    def test_fast_list_timed_as_a_whole(self):
+        fields = self.profiled_fields(reverse('product-list'))
+        self.assertEqual(fields, {'ProductListFastSerializer.row': len(self.products)})
+
+
+class BulkClientTestCase(ShopTestCase):
+    """📦 Écriture en masse des clients : un résultat par ligne"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('bulk-clients')
+        self.other = Client.objects.create(first_name="Bob", last_name="Martin", email="bob@example.com")
+
+    def results(self, response):
+        return [(result['status'], sorted(result.get('errors', {}))) for result in response.data['results']]
+
+    def test_post_reports_each_row(self):
+        response = self.client.post(self.url, [
+            {'first_name': "Grace", 'last_name': "Hopper", 'email': "grace@example.com"},
+            {'first_name': "Sans", 'last_name': "Email"},
+            {'first_name': "Ada", 'last_name': "Bis", 'email': "ADA@example.com"},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(self.results(response), [('created', []), ('error', ['email']), ('error', ['email'])])
+        self.assertTrue(Client.objects.filter(email="grace@example.com").exists())
+
+    def test_patch_checks_final_emails_of_the_batch(self):
+        # Changement de casse de son propre email : accepté ; prendre l'email
+        # d'un client du lot qui le garde : refusé
+        response = self.client.patch(self.url, [
+            {'id': self.shop_client.pk, 'email': "ADA@example.com"},
+            {'id': self.other.pk, 'email': "ada@example.com"},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(self.results(response), [('updated', []), ('error', ['email'])])
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.email, "bob@example.com")
+
+    def test_patch_conflicting_chunk_retried_row_by_row(self):
+        # Échange d'emails : accepté par check_rows, refusé par la contrainte
+        # d'unicité ; les autres lignes du paquet sont écrites quand même
+        third = Client.objects.create(first_name="Alan", last_name="Turing", email="alan@example.com")
+        response = self.client.patch(self.url, [
+            {'id': self.shop_client.pk, 'email': "bob@example.com"},
+            {'id': self.other.pk, 'email': "ada@example.com"},
+            {'id': third.pk, 'last_name': "Mathison"},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(self.results(response), [('error', ['detail']), ('error', ['detail']), ('updated', [])])
+        third.refresh_from_db()
+        self.assertEqual(third.last_name, "Mathison")
+
+
+class BulkWriteTestCase(ShopTestCase):
+    """📦 Écriture en masse des catégories et fournisseurs : 207 si une ligne échoue"""
+
+    def statuses(self, response):
+        return [(result['index'], result['status']) for result in response.data['results']]
+
+    @override_settings(BULK_CHUNK_SIZE=2)
+    def test_create_categories(self):
+        url = reverse('bulk-categories')
+        response = self.client.post(url, [{'name': "maison"}, {'name': "ab"}, {}, {'name': "jardin", 'description': "Outils"}],
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data['ok'], response.data['errors']), (2, 2))
+        self.assertEqual(self.statuses(response), [(0, 'created'), (1, 'error'), (2, 'error'), (3, 'created')])
+        self.assertEqual(sorted(response.data['results'][2]['errors']), ['name'])
+        # Effets de bord de Category.save() reproduits pour bulk_create
+        self.assertEqual(Category.objects.get(pk=response.data['results'][0]['id']).description,
+                         "Description de la catégorie : Maison.")
+        self.assertEqual(Category.objects.get(name="Jardin").description, "Outils")
+
+        response = self.client.post(url, [{'name': "cuisine"}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_suppliers(self):
+        suppliers = [Supplier.objects.create(name=f"Fournisseur {index}") for index in range(2)]
+        response = self.client.patch(reverse('bulk-suppliers'), [
+            {'id': suppliers[0].pk, 'contact_name': "Alice"},
+            {'id': 999999, 'name': "Inconnu"},
+            {'id': suppliers[1].pk, 'name': "X"},
+            {'id': suppliers[0].pk, 'contact_name': "Encore"},
+            {'name': "Sans id"},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(self.statuses(response),
+                         [(0, 'updated'), (1, 'error'), (2, 'error'), (3, 'error'), (4, 'error')])
+        self.assertEqual([sorted(result.get('errors', {})) for result in response.data['results']],
+                         [[], ['id'], ['name'], ['id'], ['id']])
+        self.assertEqual(list(Supplier.objects.order_by('pk').values_list('name', 'contact_name')),
+                         [("Fournisseur 0", "Alice"), ("Fournisseur 1", "")])
+
+    def test_delete_reports_missing_ids(self):
+        supplier = Supplier.objects.create(name="Fournisseur")
+        url = reverse('bulk-suppliers')
+        response = self.client.delete(url, {'ids': [supplier.pk, 999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(self.statuses(response), [(0, 'deleted'), (1, 'error')])
+        self.assertFalse(Supplier.objects.exists())
+        self.assertEqual(self.client.delete(url, {'ids': ["1"]}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejected_batches(self):
+        url = reverse('bulk-categories')
+        self.assertEqual(self.client.post(url, [], format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(BULK_MAX_ROWS=1):
+            response = self.client.post(url, [{'name': "maison"}, {'name': "jardin"}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(User.objects.create_user("bob", "bob@example.com", "secret"))
+        self.assertEqual(self.client.post(url, [{'name': "maison"}], format='json').status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Category.objects.filter(name="Maison").exists())
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_RATES={'checkout': '2/min'})
+class ThrottlingTestCase(ShopTestCase):
+    """🚦 Seau à jetons par portée"""
+
+    def test_checkout_rejected_with_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(self.create_order({self.products[0]: 1}).status_code, status.HTTP_201_CREATED)
+        response = self.create_order({self.products[0]: 1})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Autre portée (sans débit configuré) : pas de limite
+        self.assertEqual(self.client.get(reverse('order-list')).status_code, status.HTTP_200_OK)
+
+        stats = self.client.get(reverse('report-throttling')).data
+        self.assertEqual(stats['process'], {'checkout': 1})
+        self.assertEqual(stats['shared'], {'checkout': 1})
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    def test_cache_refusal_keeps_local_token(self):
+        # Le cache (partagé) a déjà vu deux requêtes d'un autre processus
+        for _ in range(2):
+            throttling.hit('throttle:checkout:x', '2/min', now=100)
+        throttling.reset()
+        self.assertEqual(throttling.hit('throttle:checkout:x', '2/min', now=100)[0], False)
+        self.assertNotIn('throttle:checkout:x', throttling._local_buckets)
+
+    @override_settings(THROTTLE_LOCAL_MAX_KEYS=2)
+    def test_local_buckets_evict_least_recently_used(self):
+        for key in ['a', 'b', 'a', 'c']:
+            throttling.hit(key, '10/min', now=100)
+        self.assertEqual(list(throttling._local_buckets), ['a', 'c'])
+
+
+class IdempotencyTestCase(ShopTestCase):
+    """🔁 En-tête Idempotency-Key sur la création de commande"""
+
+    def test_replay_returns_stored_response(self):
+        first = self.create_order({self.products[0]: 2}, HTTP_IDEMPOTENCY_KEY="abc")
+        replay = self.create_order({self.products[0]: 2}, HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(available_stock(self.products[0].pk), 18)
+
+    def test_same_key_other_body_rejected(self):
+        self.create_order({self.products[0]: 2}, HTTP_IDEMPOTENCY_KEY="abc")
+        response = self.create_order({self.products[0]: 3}, HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_request_not_stored(self):
+        refused = self.create_order({self.products[0]: 100}, HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(refused.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.create_order({self.products[0]: 100}, HTTP_IDEMPOTENCY_KEY="abc").status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_fingerprint_of_multipart_body_with_files(self):
+        def fingerprint(content, read_first):
+            django_request = APIRequestFactory().post(
+                '/upload/', {'name': "x", 'image': SimpleUploadedFile("a.png", content)}, format='multipart',
+            )
+            if read_first:
+                django_request.POST  # flux consommé (vérification CSRF...)
+            return request_fingerprint(Request(django_request, parsers=[MultiPartParser()]), 'upload')
+
+        for read_first in (False, True):
+            self.assertEqual(fingerprint(b"png", read_first), fingerprint(b"png", read_first))
+            self.assertNotEqual(fingerprint(b"png", read_first), fingerprint(b"gif", read_first))
+
+
+class InventoryTestCase(ShopTestCase):
+    """📦 Journal de stock : réservations, saisies et compaction"""
+
+    def test_insufficient_stock_rejected(self):
+        response = self.create_order({self.products[0]: 5, self.products[1]: 21})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Tout ou rien : ni commande, ni réservation sur le produit disponible
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(available_stock(self.products[0].pk), 20)
+
+    def test_add_item_beyond_stock_rejected(self):
+        order = self.create_order({self.products[0]: 15}).data['order_id']
+        response = self.client.post(reverse('order-add-item', args=[order]),
+                                    {'product_id': self.products[0].pk, 'quantity': 6}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(available_stock(self.products[0].pk), 5)
+
+    def test_low_stock_alert_when_crossing_threshold(self):
+        self.create_order({self.products[0]: 10})
+        self.assertFalse(StockAlert.objects.exists())
+        self.create_order({self.products[0]: 6})
+        alert = StockAlert.objects.get()
+        self.assertEqual((alert.kind, alert.stock, alert.threshold), (StockAlert.KindChoices.LOW, 4, 5))
+
+    def test_low_stock_listing(self):
+        # Seuil par catégorie, au plus LOW_STOCK_CEILING ; disponible = instantané + mouvements en attente
+        with self.assertRaises(ValidationError):
+            Category(name="Au-delà", low_stock_threshold=LOW_STOCK_CEILING + 1).full_clean()
+        bulky = Category.objects.create(name="Vrac", low_stock_threshold=LOW_STOCK_CEILING)
+        stocks = {
+            "Sous le seuil": (self.category, 4), "Au seuil": (self.category, 5), "Réassort en attente": (self.category, 3),
+            "Sous le plafond": (bulky, LOW_STOCK_CEILING - 1), "Au plafond": (bulky, LOW_STOCK_CEILING),
+            "Réservé en attente": (bulky, LOW_STOCK_CEILING + 10),
+        }
+        products = {name: Product.objects.create(name=name, price="1.00", category=category, stock=stock)
+                    for name, (category, stock) in stocks.items()}
+        compact_ledger()
+        record_movements({products["Réassort en attente"].pk: 10}, StockMovement.ReasonChoices.RESTOCK)
+        record_movements({products["Réservé en attente"].pk: -15}, StockMovement.ReasonChoices.RESERVATION)
+
+        response = self.client.get(reverse('product-low-stock'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['name'], row['stock'], row['threshold']) for row in response.data], [
+            ("Sous le seuil", 4, 5),
+            ("Réservé en attente", LOW_STOCK_CEILING - 5, LOW_STOCK_CEILING),
+            ("Sous le plafond", LOW_STOCK_CEILING - 1, LOW_STOCK_CEILING),
+        ])
+
+    def test_compaction_keeps_available_stock(self):
+        self.create_order({self.products[0]: 3, self.products[1]: 4})
+        self.create_order({self.products[0]: 2})
+        before = {product.pk: available_stock(product.pk) for product in self.products}
+
+        self.assertEqual(compact_ledger(batch=2), 3)
+
+        self.assertEqual({product.pk: available_stock(product.pk) for product in self.products}, before)
+        self.assertFalse(StockMovement.objects.filter(compacted=False).exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 15)
+
+    def test_stock_edit_journalled_as_adjustment(self):
+        # Saisie d'une valeur absolue pendant que des réservations attendent la compaction
+        self.create_order({self.products[0]: 3})
+        response = self.client.patch(reverse('product-detail', args=[self.products[0].pk]), {'stock': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(available_stock(self.products[0].pk), 50)
+        compact_ledger()
+        self.assertEqual(available_stock(self.products[0].pk), 50)
+        self.assertTrue(StockMovement.objects.filter(reason=StockMovement.ReasonChoices.ADJUSTMENT, delta=33).exists())
+
+    def test_product_save_journals_stock_edit(self):
+        self.create_order({self.products[0]: 3})
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.name, product.stock = 'Renommé', 30
+        product.save()
+        self.assertEqual(available_stock(product.pk), 30)
+        product.stock = 25
+        product.save(update_fields=['stock'])
+        self.assertEqual(available_stock(product.pk), 25)
+        # L'instantané reste celui de la compaction
+        self.assertEqual(Product.objects.values_list('name', 'stock').get(pk=product.pk), ('Renommé', 20))
+        self.assertEqual(StockMovement.objects.filter(reason=StockMovement.ReasonChoices.ADJUSTMENT).count(), 2)
+
+    def test_compaction_scheduled_after_rolled_back_movement(self):
+        inventory._last_compaction_bucket = None
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(InsufficientStock):
+                with transaction.atomic():
+                    record_movements({self.products[0].pk: -5}, StockMovement.ReasonChoices.RESERVATION)
+                    record_movements({self.products[1].pk: -21}, StockMovement.ReasonChoices.RESERVATION)
+            self.assertFalse(Job.objects.exists())
+            record_movements({self.products[0].pk: -5}, StockMovement.ReasonChoices.RESERVATION)
+        self.assertTrue(Job.objects.filter(name='inventory.compact').exists())
+
+
+class CancellationTestCase(ShopTestCase):
+    """↩️ Annulation : le stock réservé est rendu une seule fois"""
+
+    def test_cancel_restores_stock_once(self):
+        order = self.create_order({self.products[0]: 3, self.products[1]: 2}).data['order_id']
+        url = reverse('order-cancel', args=[order])
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(available_stock(self.products[0].pk), 20)
+        self.assertEqual(available_stock(self.products[1].pk), 20)
+        self.assertEqual(StockMovement.objects.filter(reason=StockMovement.ReasonChoices.CANCELLATION).count(), 2)
+
+    def test_cancel_writes_restocked_alerts(self):
+        orders = [self.create_order({self.products[0]: 8}).data['order_id'] for _ in range(2)]
+        self.assertEqual(StockAlert.objects.get().kind, StockAlert.KindChoices.LOW)
+        self.assertCountEqual([str(pk) for pk in cancel_orders(orders)], orders)
+        alert = StockAlert.objects.latest('pk')
+        self.assertEqual((alert.kind, alert.stock, alert.threshold), (StockAlert.KindChoices.RESTOCKED, 20, 5))
+        self.assertEqual(StockMovement.objects.filter(reason=StockMovement.ReasonChoices.CANCELLATION).count(), 2)
+
+    def test_bulk_cancel_with_repeated_ids(self):
+        orders = [self.create_order({self.products[0]: 2}).data['order_id'] for _ in range(2)]
+        response = self.client.post(reverse('order-bulk-cancel'), {'order_ids': orders + orders[:1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((len(response.data['cancelled']), response.data['skipped']), (2, 0))
+        self.assertEqual(available_stock(self.products[0].pk), 20)
+
+    def test_cancel_order_placed_before_the_ledger(self):
+        # Commande d'avant le journal, créée comme le faisait POST /orders/ :
+        # lignes sans mouvement, stock jamais décrémenté ; l'annuler ne rend rien
+        order = legacy_order(self.admin, self.shop_client, {self.products[0]: 4})
+        self.assertEqual(cancel_orders([order.pk]), [order.pk])
+        self.assertEqual(available_stock(self.products[0].pk), 20)
+        self.assertFalse(StockMovement.objects.exists())
+
+
+class ExpiryTestCase(ShopTestCase):
+    """⏰ Expiration des commandes en attente"""
+
+    def test_expiry_releases_reservations(self):
+        stale = [UUID(self.create_order({self.products[0]: 2}).data['order_id']) for _ in range(3)]
+        fresh = self.create_order({self.products[0]: 1}).data['order_id']
+        confirmed = self.create_order({self.products[1]: 1}).data['order_id']
+        Order.objects.filter(pk=confirmed).update(status=Order.StatusChoices.CONFIRMED)
+        Order.objects.filter(pk__in=stale + [confirmed]).update(created_at=timezone.now() - timedelta(days=2))
+
+        expired, _ = expire_pending_orders(ttl=timedelta(days=1), batch=2)
+
+        self.assertEqual(expired, 3)
+        self.assertEqual(
+            set(Order.objects.filter(status=Order.StatusChoices.CANCELLED).values_list('pk', flat=True)), set(stale)
+        )
+        self.assertEqual(Order.objects.get(pk=fresh).status, Order.StatusChoices.PENDING)
+        self.assertEqual(Order.objects.get(pk=confirmed).status, Order.StatusChoices.CONFIRMED)
+        self.assertEqual(available_stock(self.products[0].pk), 19)
+        self.assertEqual(available_stock(self.products[1].pk), 19)
+        # Rien de plus au passage suivant
+        self.assertEqual(expire_pending_orders(ttl=timedelta(days=1))[0], 0)
+        self.assertEqual(available_stock(self.products[0].pk), 19)
+
+    def test_expiring_order_placed_before_the_ledger(self):
+        # Panier abandonné d'avant le journal : annulé par l'expiration
+        # périodique sans rendre de stock qu'il n'a jamais retiré
+        order = legacy_order(self.admin, self.shop_client, {self.products[0]: 4, self.products[1]: 2})
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=2))
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+        self.assertEqual(Order.objects.get(pk=order.pk).status, Order.StatusChoices.CANCELLED)
+        self.assertEqual(available_stock(self.products[0].pk), 20)
+        self.assertEqual(available_stock(self.products[1].pk), 20)
+
+    def test_workers_schedule_expiry(self):
+        stale = self.create_order({self.products[0]: 2}).data['order_id']
+        Order.objects.filter(pk=stale).update(created_at=timezone.now() - timedelta(days=2))
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+        self.assertEqual(Order.objects.get(pk=stale).status, Order.StatusChoices.CANCELLED)
+        self.assertEqual(available_stock(self.products[0].pk), 20)
+        # Une seule expiration par intervalle, quel que soit le nombre de balayages
+        job = Job.objects.get(name='orders.expire_pending')
+        self.assertEqual(job.status, Job.StatusChoices.DONE)
+
+
+def image_file(name="photo.jpg", size=(800, 400), image_format='JPEG', exif=True):
+    """Image uploadée de test ; un JPEG porte des métadonnées EXIF"""
+    image = Image.new('RGB', size, (200, 30, 30))
+    buffer = BytesIO()
+    extra = {}
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010F] = "Appareil de test"  # Make
+        extra['exif'] = metadata.tobytes()
+    image.save(buffer, image_format, **extra)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=Image.MIME[image_format])
+
+
+class TemporaryMediaMixin:
+    """MEDIA_ROOT dans un répertoire temporaire, supprimé après chaque test"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = self.settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class ImageVariantsTestCase(TemporaryMediaMixin, ShopTestCase):
+    """🖼️ Variantes des images produits : générées en tâche de fond, servies par taille"""
+
+    def upload_product(self):
+        supplier = Supplier.objects.create(name="Fournisseur")
+        response = self.client.post(reverse('product-list'), {
+            'name': "Appareil photo", 'price': "99.00", 'category': self.category.pk, 'stock': 3,
+            'supplier': [supplier.pk], 'image': image_file(),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Product.objects.get(name="Appareil photo")
+
+    def test_upload_generates_variants(self):
+        product = self.upload_product()
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+        for variant, max_size in [('thumb', 320), ('medium', 800)]:
+            for ext, pil_format in [('webp', 'WEBP'), ('jpg', 'JPEG')]:
+                with default_storage.open(variant_name(product.image.name, variant, ext)) as file:
+                    with Image.open(file) as image:
+                        self.assertEqual((image.format, max(image.size)), (pil_format, max_size))
+                        self.assertNotIn(0x010F, image.getexif())
+
+    def test_image_route(self):
+        product = self.upload_product()
+        response = self.client.get(reverse('product-image', args=[product.pk, 'thumb', 'webp']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (320, 160))
+
+        self.assertEqual(self.client.get(reverse('product-image', args=[product.pk, 'huge', 'webp'])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse('product-image', args=[self.products[0].pk, 'thumb', 'webp']))
+                         .status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_image_route_revalidated(self):
+        product = self.upload_product()
+        url = reverse('product-image', args=[product.pk, 'thumb', 'jpg'])
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((not_modified.status_code, not_modified['Cache-Control']), (304, 'public, no-cache'))
+
+        # Image remplacée : même URL, autre contenu
+        self.assertEqual(self.client.patch(reverse('product-detail', args=[product.pk]),
+                                           {'image': image_file(size=(400, 800))}, format='multipart').status_code,
+                         status.HTTP_200_OK)
+        replaced = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(replaced.status_code, status.HTTP_200_OK)
+        with Image.open(BytesIO(b''.join(replaced.streaming_content))) as image:
+            self.assertEqual(image.size, (160, 320))
+
+    def test_hashed_files_immutable(self):
+        product = self.upload_product()
+        b''.join(self.client.get(reverse('product-image', args=[product.pk, 'thumb', 'webp'])).streaming_content)
+        for name in [product.image.name, variant_name(product.image.name, 'thumb', 'webp')]:
+            with self.subTest(name=name):
+                response = self.client.get(settings.MEDIA_URL + name)
+                self.assertIn('immutable', response['Cache-Control'])
+                b''.join(response.streaming_content)
+
+
+class JobQueueTestCase(ShopTestCase):
+    """⚙️ File de tâches : tâches bloquées remises en file, jamais exécutées deux fois"""
+
+    def enqueue_jobs(self, count):
+        return [enqueue('idempotency.purge', idempotency_key=f"test:{index}") for index in range(count)]
+
+    def age(self, jobs, minutes=30):
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(updated_at=timezone.now() - timedelta(minutes=minutes))
+
+    def test_requeued_job_skipped_by_its_first_worker(self):
+        self.enqueue_jobs(2)
+        first, waiting = claim_jobs('worker-1', limit=2)
+        self.assertTrue(run_job(first))
+        # Le second attend dans le lot de worker-1 plus longtemps que JOBS_STALE_AFTER
+        self.age([waiting])
+        self.assertEqual(requeue_stale_jobs(), 1)
+        [taken] = claim_jobs('worker-2')
+
+        with self.assertLogs('app.tasks', 'WARNING'):
+            self.assertIsNone(run_job(waiting))
+        self.assertEqual(Job.objects.get(pk=taken.pk).locked_by, 'worker-2')
+        self.assertTrue(run_job(taken))
+
+    def test_started_job_not_requeued(self):
+        self.enqueue_jobs(2)
+        first, second = claim_jobs('worker-1', limit=2)
+        self.age([first, second])
+        run_job(first)
+        self.assertEqual(requeue_stale_jobs(), 1)  # seul le second n'a pas donné signe de vie
+        self.assertEqual(Job.objects.get(pk=first.pk).status, Job.StatusChoices.DONE)
+
+    def test_worker_loop_recovers_jobs_of_dead_workers(self):
+        jobs = self.enqueue_jobs(2)
+        claim_jobs('dead-worker', limit=2)
+        self.age(jobs)
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.StatusChoices.DONE})
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_job_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            [job] = self.enqueue_jobs(1)
+            self.assertEqual(Job.objects.get(pk=job.pk).status, Job.StatusChoices.QUEUED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.StatusChoices.DONE, 1))
+
+
+class MediaResponseTestCase(TemporaryMediaMixin, SimpleTestCase):
+    """📦 media_response : plages, validation conditionnelle et modes de service"""
+
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        super().setUp()
+        default_storage.save('docs/notice.bin', ContentFile(self.content))
+
+    def get(self, **headers):
+        response = media_response(RequestFactory().get('/media/docs/notice.bin', **headers), 'docs/notice.bin')
+        self.addCleanup(response.close)
+        return response
+
+    def test_full_response(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+
+    def test_ranges(self):
+        for header, expected in [('bytes=0-99', self.content[:100]), ('bytes=1000-', self.content[1000:]),
+                                 ('bytes=-24', self.content[-24:]), ('bytes=1000-5000', self.content[1000:])]:
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b''.join(response.streaming_content), expected)
+                self.assertEqual(response['Content-Length'], str(len(expected)))
+                start = len(self.content) - len(expected) if header.startswith('bytes=-') else int(header[6:].split('-')[0])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{start + len(expected) - 1}/1024')
+
+        unsatisfiable = self.get(HTTP_RANGE='bytes=2000-')
+        self.assertEqual((unsatisfiable.status_code, unsatisfiable['Content-Range']), (416, 'bytes */1024'))
+        # Plages multiples : non gérées, réponse complète
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-1,5-6').status_code, 200)
+
+    def test_conditional_requests(self):
+        etag = self.get()['ETag']
+        not_modified = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertIn('max-age=86400', not_modified['Cache-Control'])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"autre"').status_code, 200)
+        # If-Range périmé : la plage est ignorée, fichier complet
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"autre"').status_code, 200)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+
+    def test_offloaded_to_web_server(self):
+        with self.settings(MEDIA_SERVE_MODE='x-accel'):
+            self.assertEqual(self.get()['X-Accel-Redirect'], '/protected-media/docs/notice.bin')
+        with self.settings(MEDIA_SERVE_MODE='x-sendfile'):
+            self.assertEqual(self.get()['X-Sendfile'], default_storage.path('docs/notice.bin'))
+
+    def test_outside_media_root(self):
+        for name in ['../settings.py', 'docs/absent.bin', 'docs']:
+            with self.subTest(name=name), self.assertRaises(Http404):
+                media_response(RequestFactory().get('/media/x'), name)
+
+
+class SalesReportsTestCase(ShopTestCase):
+    """📊 Rapports : agrégats journaliers recalculés d'après le watermark"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.today = timezone.localdate()
+        cls.yesterday = cls.today - timedelta(days=1)
+        cls.kept = cls.place_order({cls.products[0]: 2, cls.products[1]: 1}, cls.yesterday)
+        cls.place_order({cls.products[0]: 1}, cls.yesterday, status=Order.StatusChoices.CANCELLED)
+        cls.place_order({cls.products[2]: 3}, cls.today)
+        # Modifiées avant la marge du watermark (REPORTS_WATERMARK_OVERLAP)
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Order.objects.update(updated_at=an_hour_ago)
+        OrderItem.objects.update(updated_at=an_hour_ago)
+
+    @classmethod
+    def place_order(cls, quantities, day, status=Order.StatusChoices.CONFIRMED):
+        order = Order.objects.create(user=cls.admin, client=cls.shop_client, status=status)
+        for product, quantity in quantities.items():
+            OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        created_at = timezone.make_aware(datetime.combine(day, datetime.min.time().replace(hour=12)))
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        return order
+
+    def daily(self):
+        response = self.client.get(reverse('report-daily'), {'start': self.yesterday, 'end': self.today})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['day'], row['orders'], row['units'], row['revenue']) for row in response.data['results']]
+
+    def test_rollups_match_orders(self):
+        self.assertEqual(refresh_sales_rollups(), 2)
+        self.assertEqual(self.daily(), [(self.yesterday, 1, 3, Decimal('30.00')), (self.today, 1, 3, Decimal('30.00'))])
+        products = self.client.get(reverse('report-products'), {'start': self.yesterday}).data['results']
+        # Commande annulée exclue par défaut ; tri par chiffre d'affaires
+        self.assertEqual([(row['product_id'], row['units'], row['revenue']) for row in products], [
+            (self.products[2].pk, 3, Decimal('30.00')), (self.products[0].pk, 2, Decimal('20.00')),
+            (self.products[1].pk, 1, Decimal('10.00')),
+        ])
+
+    def test_incremental_refresh_rebuilds_changed_days_only(self):
+        started = timezone.now()
+        refresh_sales_rollups()
+        watermark = ReportWatermark.objects.get(name=WATERMARK).value
+        overlap = settings.REPORTS_WATERMARK_OVERLAP
+        self.assertTrue(started - overlap <= watermark <= timezone.now() - overlap)
+        self.assertEqual(refresh_sales_rollups(), 0)  # rien de modifié depuis
+
+        # Jour non touché : son agrégat n'est pas relu
+        DailyOrderSummary.objects.filter(day=self.today).update(revenue=999)
+        OrderItem.objects.create(order=self.kept, product=self.products[3], quantity=4)
+        Order.objects.filter(pk=self.kept.pk).update(updated_at=timezone.now())
+        self.assertEqual(refresh_sales_rollups(), 1)
+        self.assertEqual(self.daily(), [(self.yesterday, 1, 7, Decimal('70.00')), (self.today, 1, 3, Decimal('999.00'))])
+
+        self.assertEqual(refresh_sales_rollups(full=True), 2)
+        self.assertEqual(self.daily()[1], (self.today, 1, 3, Decimal('30.00')))
+
+    def test_deleted_order_day_rebuilt(self):
+        refresh_sales_rollups()
+        self.assertEqual(self.client.delete(reverse('order-detail', args=[self.kept.pk])).status_code,
+                         status.HTTP_204_NO_CONTENT)
+        job = Job.objects.get(name='reports.refresh_sales', payload__days__isnull=False)
+        refresh_sales(**job.payload)
+        self.assertEqual(self.daily(), [(self.today, 1, 3, Decimal('30.00'))])
+
+
+class LeaderboardsTestCase(ShopTestCase):
+    """🏆 Classements : instantanés partagés, rafraîchis par le worker"""
+
+    def top_sold(self):
+        response = self.client.get(reverse('leaderboard-top-sold'), {'window': '7d'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['product_id'], row['units']) for row in response.data['results']]
+
+    def test_refreshed_after_sales_rollups(self):
+        self.assertEqual(self.top_sold(), [])
+        self.create_order({self.products[1]: 4, self.products[2]: 1})
+
+        refresh_sales()
+        self.assertEqual(self.top_sold(), [])  # instantané encore valide, pas recalculé par le web
+        self.assertTrue(Job.objects.filter(name='leaderboards.refresh', status=Job.StatusChoices.QUEUED).exists())
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(self.top_sold(), [(self.products[1].pk, 4), (self.products[2].pk, 1)])
+
+    def test_stale_snapshot_recomputed_on_read(self):
+        self.assertEqual(self.client.get(reverse('leaderboard-categories')).data['results'][0]['products_count'], 4)
+        Product.objects.create(name="Nouveau", price="5.00", category=self.category)
+        self.assertEqual(self.client.get(reverse('leaderboard-categories')).data['results'][0]['products_count'], 4)
+
+        LeaderboardSnapshot.objects.update(computed_at=timezone.now() - timedelta(seconds=settings.LEADERBOARDS_TTL + 1))
+        self.assertEqual(self.client.get(reverse('leaderboard-categories')).data['results'][0]['products_count'], 5)
@@ -0,0 +1,182 @@
+"""
+🚦 LIMITATION DE DÉBIT PAR SEAU À JETONS (par utilisateur et par route)
+
+Les throttles de DRF (AnonRateThrottle / UserRateThrottle) gardent
+l'historique des horodatages de chaque client dans le cache : une lecture
+et une écriture d'une liste qui grossit avec le débit, à chaque requête.
+
+TokenBucketThrottle applique un seau à jetons sous la forme GCRA : un seul
+nombre par (route, client), l'instant théorique où le seau sera de nouveau
+plein. Une requête consomme un jeton ; le seau (RATE requêtes au plus d'un
+coup) se remplit de RATE jetons par période.
+
+- THROTTLE_RATES : débit par portée ('checkout': '30/min'...)
+- portée d'une vue : `throttle_scope`, ou par action `throttle_scopes`
+  ({'create': 'checkout'}) ; 'default' sinon
+- client : l'utilisateur connecté, sinon l'adresse IP
+- THROTTLE_ENABLED = False : aucune limitation (tests, outils internes)
+- THROTTLE_BACKEND = 'local' : seaux en mémoire du processus, sans aller-
+  retour réseau, au plus THROTTLE_LOCAL_MAX_KEYS (les moins récemment
+  utilisés sont oubliés) ; 'cache' : seaux partagés dans le cache Django
+  (Redis en production). Le seau local est toujours consulté d'abord : un
+  processus qui voit déjà trop de requêtes refuse sans interroger le cache.
+  Un jeton n'est débité qu'une fois les deux seaux d'accord
+- refus : 429 avec Retry-After, compteur par portée dans le processus
+  (rejection_counts()) et dans le cache partagé (shared_rejection_counts()),
+  lus par GET /api/v1/reports/throttling/, et un avertissement dans le
+  logger 'app.throttling' tous les THROTTLE_LOG_EVERY refus
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+logger = logging.getLogger('app.throttling')
+
+_PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+_lock = threading.Lock()
+# Seaux locaux, du moins récemment utilisé au plus récent (éviction LRU)
+_local_buckets = OrderedDict()
+_rejections = Counter()
+
+
+def parse_rate(rate):
+    """'30/min' -> (30 requêtes, 60 secondes)."""
+    count, period = rate.split('/')
+    return int(count), _PERIODS[period]
+
+
+def _gcra(tat, now, count, period):
+    """
+    Une requête sur un seau dont l'instant « plein » est `tat`. Renvoie
+    (nouveau tat ou None si refusée, secondes à attendre).
+    """
+    interval = period / count
+    tat = max(tat or now, now)
+    # Seau vide : plus de `count` requêtes consommées en avance
+    overdraft = tat - now - (period - interval)
+    if overdraft > 0:
+        return None, overdraft
+    return tat + interval, 0
+
+
+def _hit_local(key, now, count, period, consume=True):
+    """Seau local ; consume=False : vérifie sans débiter de jeton."""
+    with _lock:
+        tat, wait = _gcra(_local_buckets.get(key), now, count, period)
+        if tat is None:
+            return False, wait
+        if consume:
+            _local_buckets[key] = tat
+            _local_buckets.move_to_end(key)
+            # Oublier un seau ne fait que le rendre plein : au pire un client
+            # inactif depuis longtemps retrouve son débit complet
+            max_keys = getattr(settings, 'THROTTLE_LOCAL_MAX_KEYS', 100_000)
+            while len(_local_buckets) > max_keys:
+                _local_buckets.popitem(last=False)
+        return True, 0
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+
+def _hit_cache(key, now, count, period):
+    cache = _cache()
+    tat, wait = _gcra(cache.get(key), now, count, period)
+    if tat is None:
+        return False, wait
+    # Pas de verrou entre processus : au pire quelques requêtes de plus passent
+    cache.set(key, tat, timeout=math.ceil(tat - now) + 1)
+    return True, 0
+
+
+def hit(key, rate, now=None):
+    """Consomme un jeton du seau `key` au débit `rate`. Renvoie (autorisée, secondes à attendre)."""
+    now = time.time() if now is None else now
+    count, period = parse_rate(rate)
+    if getattr(settings, 'THROTTLE_BACKEND', 'local') != 'cache':
+        return _hit_local(key, now, count, period)
+    # Seau local vérifié sans débit : un refus du cache ne consomme pas de
+    # jeton local. Débité ensuite seulement si le cache accepte (une requête
+    # concurrente a pu prendre le dernier jeton local entre-temps : le cache,
+    # partagé, a le dernier mot)
+    allowed, wait = _hit_local(key, now, count, period, consume=False)
+    if not allowed:
+        return False, wait
+    allowed, wait = _hit_cache(key, now, count, period)
+    if allowed:
+        _hit_local(key, now, count, period)
+    return allowed, wait
+
+
+def rejection_counts():
+    """Refus par portée depuis le démarrage du processus."""
+    with _lock:
+        return dict(_rejections)
+
+
+def _count_shared_rejection(scope):
+    cache = _cache()
+    key = f"throttle:rejections:{scope}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Premier refus de la portée (ou clé évincée) : au pire un refus
+        # concurrent n'est pas compté
+        cache.add(key, 1, timeout=None)
+
+
+def shared_rejection_counts():
+    """Refus par portée de THROTTLE_RATES, tous processus confondus (cache partagé)."""
+    scopes = list(getattr(settings, 'THROTTLE_RATES', {}))
+    counts = _cache().get_many([f"throttle:rejections:{scope}" for scope in scopes])
+    return {scope: counts.get(f"throttle:rejections:{scope}", 0) for scope in scopes}
+
+
+def reset():
+    """Vide les seaux locaux et les compteurs (tests)."""
+    with _lock:
+        _local_buckets.clear()
+        _rejections.clear()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle DRF : seau à jetons par (portée de la route, client)."""
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None)) or getattr(view, 'throttle_scope', None) or 'default'
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return True
+        scope = self.get_scope(view)
+        rate = getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+        if not rate:
+            return True
+
+        user = request.user
+        client = f"user:{user.pk}" if user and user.is_authenticated else f"ip:{self.get_ident(request)}"
+        allowed, wait = hit(f"throttle:{scope}:{client}", rate)
+        if not allowed:
+            self.retry_after = wait
+            with _lock:
+                _rejections[scope] += 1
+                rejected = _rejections[scope]
+            _count_shared_rejection(scope)
+            if (rejected - 1) % getattr(settings, 'THROTTLE_LOG_EVERY', 100) == 0:
+                logger.warning("Débit dépassé : portée %s, %s (%s refus dans ce processus)", scope, client, rejected)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
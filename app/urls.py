@@ -7,7 +7,9 @@ from .views import (CategoryCreateView,
                     SupplierViewSet,
                     ClientViewSet,
                     ProductViewApi,
-                    ReviewViewSet,OrderItemViewSet,OrderViewSet
+                    ReviewViewSet,OrderItemViewSet,OrderViewSet,
+                    ProductImageView,ReportViewSet,LeaderboardViewSet,
+                    CategoryBulkView,SupplierBulkView,ClientBulkView
                     )
 router = DefaultRouter()
 router.register(r'suppliers',SupplierViewSet, basename='supplier')
@@ -16,12 +18,18 @@ router.register(r'product',ProductViewApi, basename='product')
 router.register(r'review',ReviewViewSet, basename='review')
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'order-items', OrderItemViewSet, basename='orderitem')
+router.register(r'reports', ReportViewSet, basename='report')
+router.register(r'leaderboards', LeaderboardViewSet, basename='leaderboard')
 
 urlpatterns=[
     path('categorie/create/',CategoryCreateView.as_view(),name='categorie-create'),
      path('categorie/list/',CategoryListView.as_view(),name='categorie-list'),
      path('categorie/<int:pk>/',CategoryDetailView.as_view(),name='category-detail'),
      path('categorie/delete/<int:pk>/',CategoryDeleteView.as_view(),name='categorie-delete'),
+     path('product/<int:pk>/image/<slug:variant>.<slug:ext>',ProductImageView.as_view(),name='product-image'),
+     path('bulk/categories/',CategoryBulkView.as_view(),name='bulk-categories'),
+     path('bulk/suppliers/',SupplierBulkView.as_view(),name='bulk-suppliers'),
+     path('bulk/clients/',ClientBulkView.as_view(),name='bulk-clients'),
      path('',include(router.urls)),
     
 ]
\ No newline at end of file
@@ -28,21 +28,71 @@ MÉTHODES À CONNAÎTRE :
 """
 
 
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Sum
+from django.http import Http404
+from django.utils import timezone
 from rest_framework import generics, filters, status,viewsets
-from rest_framework.response import Response
-from .models import Category, Product, Order, OrderItem, Review, Client, Supplier
-from .serializers import ( CategorySerializer,CategoryListSerializer,CategoryDetailSerializer,
-                          OrderCreateSerializer,OrderDetailSerializer,OrderListSerializer,
-                          OrderItemCreateSerializer ,OrderItemListSerializer,OrderItemDetailSerializer)
-from django.db.models import Count
+from rest_framework import serializers as rf_serializers
 from rest_framework.decorators import action
 # from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 # from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import serializers as rf_serializers
+
+from .bulk import BulkWriteView
+from .columns import ReadColumnsMixin
+from .fast_serializers import FastListMixin, OrderListFastSerializer, ProductListFastSerializer
+from .idempotency import idempotent
+from .images import FORMATS, ensure_variant, get_variants
+from .inventory import InsufficientStock, alerts_after, decrement_stock, low_stock_products, with_available_stock
+from .leaderboards import get_leaderboard
+from .media import REVALIDATE, media_response
+from .models import (Category, Product, Order, OrderItem, Review, Client, Supplier,
+                     DailyOrderSummary, DailyProductSales, StockMovement)
+from .orders import cancel_orders, client_spent, confirm_orders, order_total
+from .pagination import RecentFirstCursorPagination
+from .prefetch import prefetch_top
+from .reports import schedule_sales_refresh
+from .serializers import ( CategorySerializer,CategoryListSerializer,CategoryDetailSerializer,
+                          OrderCreateSerializer,OrderDetailSerializer,OrderListSerializer,
+                          OrderItemCreateSerializer ,OrderItemListSerializer,OrderItemDetailSerializer,
+                          SupplierCreateSerializer, SupplierListSerializer, SupplierDetailSerializer,
+                          ClientCreateSerializer, ClientListSerializer, ClientDetailSerializer, ClientBulkSerializer,
+                          ProductCreateSerializer, ProductListSerializer, ProductDetailSerializer, ProductIdsSerializer,
+                          ReviewCreateSerializer, ReviewListSerializer, ReviewDetailSerializer,
+                          LowStockProductSerializer, StockAlertSerializer, StockMovementSerializer,
+                          LeaderboardQuerySerializer, OrderIdsSerializer, ReportQuerySerializer,
+                          PRODUCT_NAMES_LIMIT)
+from .tasks import enqueue
+from .throttling import rejection_counts, shared_rejection_counts
 
 
 
 # Create your views here.
+# ============================================================================
+# 🧩 SERIALIZER PAR ACTION
+# ============================================================================
+
+WRITE_ACTIONS = ('create', 'update', 'partial_update')
+
+
+class SerializerByActionMixin:
+    """
+    🧩 `serializer_classes` : {action: serializer} résolu par une lecture de
+    dictionnaire, classes importées une fois au chargement du module (plus
+    d'import dans get_serializer_class à chaque requête). Les autres actions
+    utilisent `serializer_class`.
+    """
+    serializer_classes = {}
+
+    def get_serializer_class(self):
+        return self.serializer_classes.get(self.action, self.serializer_class)
+
+
 # ============================================================================
 # 📁 CATEGORY VIEWSET (EXEMPLE COMPLET - ÉTUDIEZ-LE)
 # ============================================================================
@@ -59,6 +109,7 @@ class CategoryListView(generics.ListAPIView):
     📁 CategoryListView
     """
     serializer_class =CategoryListSerializer
+    throttle_scope = 'catalog'
     queryset=Category.objects.all()   
   
     
@@ -71,7 +122,9 @@ class CategoryDetailView(generics.RetrieveAPIView):
     📁 CategoryDetailView
     """
     serializer_class =CategoryDetailSerializer
-    queryset=Category.objects.all()   
+    throttle_scope = 'catalog'
+    # Les N premiers noms de produits en une requête (voir app/prefetch.py)
+    queryset=Category.objects.prefetch_related(prefetch_top(Category, 'products', PRODUCT_NAMES_LIMIT, queryset=Product.objects.only('pk', 'name', 'category')))
     
     # def get_queryset(self):
     #     queryset = Category.objects.all().prefetch_related('products')
@@ -99,11 +152,12 @@ class CategoryDeleteView(generics.DestroyAPIView):
 # - Ajouter le tri sur 'name', 'created_at'
 # - Permissions : IsAuthenticatedOrReadOnly
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(ReadColumnsMixin, SerializerByActionMixin, viewsets.ModelViewSet):
     """
     📦 TODO : ViewSet pour gérer les fournisseurs 
     """
     queryset = Supplier.objects.all()
+    throttle_scope = 'catalog'
     search_fields = ['name', 'address']  # Recherche sur ces champs
     ordering_fields = ['name']  # Tri possible sur ces champs
     ordering = ['name']  # Tri par défaut
@@ -113,17 +167,9 @@ class SupplierViewSet(viewsets.ModelViewSet):
     # TODO: ordering_fields
     # TODO: ordering
     
-    def get_serializer_class(self):
-        """TODO : Retourner le bon serializer selon l'action"""
-        if self.action == 'create' or self.action == 'update' or self.action == 'partial_update':
-            from .serializers import SupplierCreateSerializer
-            return SupplierCreateSerializer
-        elif self.action == 'list':
-            from .serializers import SupplierListSerializer
-            return SupplierListSerializer
-        else:
-            from .serializers import SupplierDetailSerializer
-            return SupplierDetailSerializer
+    # Serializer selon l'action (SerializerByActionMixin), détail par défaut
+    serializer_class = SupplierDetailSerializer
+    serializer_classes = {**dict.fromkeys(WRITE_ACTIONS, SupplierCreateSerializer), 'list': SupplierListSerializer}
     
     def get_queryset(self):
         """TODO : Optimiser les requêtes"""
@@ -133,7 +179,10 @@ class SupplierViewSet(viewsets.ModelViewSet):
         if self.action == 'list':
             queryset = queryset.annotate(products_count=Count('products'))
         elif self.action == 'retrieve':
-            queryset = queryset.prefetch_related('products')
+            # Seuls les N premiers produits sont affichés : pas de préchargement complet
+            queryset = queryset.annotate(products_count=Count('products')).prefetch_related(
+                prefetch_top(Supplier, 'products', PRODUCT_NAMES_LIMIT, queryset=Product.objects.only('pk', 'name'))
+            )
         return queryset
     
     # TODO: Action personnalisée 'products' - Liste des produits d'un fournisseur
@@ -156,36 +205,54 @@ class SupplierViewSet(viewsets.ModelViewSet):
 # - Action personnalisée 'orders' : Liste des commandes du client
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(ReadColumnsMixin, SerializerByActionMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
+    # Détail et historique : agrégats sur toutes les commandes du client
+    throttle_scopes = {'retrieve': 'client-detail', 'orders': 'client-detail'}
     search_fields=['first_name','email','address','last_name','phone_number']
     ordering_fields=['first_name','email','address','last_name']
     ordering=['first_name']
     
-    def get_serializer_class(self):
-        
-        
-        # if self.action in ['create', 'update', 'partial_update']:
-        if self.action == 'create' or self.action == 'update' or self.action =='partial_update':
-            from .serializers import ClientCreateSerializer
-            return ClientCreateSerializer
-        elif self.action =='list':
-            from .serializers import ClientListSerializer
-            return ClientListSerializer
-        else:
-            from .serializers import ClientDetailSerializer
-            return ClientDetailSerializer
+    serializer_class = ClientDetailSerializer
+    serializer_classes = {**dict.fromkeys(WRITE_ACTIONS, ClientCreateSerializer), 'list': ClientListSerializer}
         
     def get_queryset(self):
         queryset=Client.objects.all()
         if self.action=='list':
             queryset=queryset.annotate(orders_count=Count('orders'))
         elif self.action =='retrieve':
-                        # Précharger les commandes pour éviter les requêtes multiples
-            queryset = queryset.prefetch_related('orders__items', 'orders__items__product','orders__user')
+            # Seules les N commandes les plus récentes (Prefetch découpé : ROW_NUMBER
+            # par client), montants calculés en base ; l'historique complet
+            # passe par l'action paginée `orders`
+            recent_orders = (
+                Order.objects.select_related('user')
+                .annotate(total=order_total())
+                .order_by('-created_at')[:getattr(settings, 'CLIENT_RECENT_ORDERS', 5)]
+            )
+            queryset = queryset.prefetch_related(
+                Prefetch('orders', queryset=recent_orders, to_attr='recent_orders')
+            ).annotate(orders_total=client_spent())
 
             
         return queryset   
+
+    @action(detail=True, methods=['get'])
+    def orders(self, request, pk=None):
+        """
+        GET /api/v1/client/{id}/orders/?cursor=...&page_size=20
+        Toutes les commandes du client, plus récentes d'abord, par pages
+        """
+        client = self.get_object()
+        queryset = (
+            Order.objects.filter(client=client)
+            .select_related('client')
+            .prefetch_related('items')
+            .annotate(total=order_total())
+        )
+        paginator = RecentFirstCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = OrderListSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
     
     
 
@@ -200,20 +267,13 @@ class ClientViewSet(viewsets.ModelViewSet):
 # - Tri sur 'name', 'price', 'created_at', 'stock'
 # - Permissions : IsAuthenticatedOrReadOnly
 # - Optimisation : select_related('category') et prefetch_related('suppliers') 
-class ProductViewApi(viewsets.ModelViewSet):
+class ProductViewApi(FastListMixin, ReadColumnsMixin, SerializerByActionMixin, viewsets.ModelViewSet):
     queryset=Product.objects.all()
+    fast_list_serializer_class = ProductListFastSerializer
+    throttle_scope = 'catalog'
     
-    def get_serializer_class(self):
-        if self.action  in ['create', 'update', 'partial_update']:
-            from .serializers import ProductCreateSerializer
-            return ProductCreateSerializer
-        elif self.action =='list':
-            from .serializers import ProductListSerializer
-            return ProductListSerializer
-
-        else:
-            from .serializers import ProductDetailSerializer
-            return ProductDetailSerializer
+    serializer_class = ProductDetailSerializer
+    serializer_classes = {**dict.fromkeys(WRITE_ACTIONS, ProductCreateSerializer), 'list': ProductListSerializer}
         
     def get_queryset(self):
         """
@@ -223,13 +283,101 @@ class ProductViewApi(viewsets.ModelViewSet):
         """
         queryset = super().get_queryset()
         # TODO: Ajouter les optimisations
+        if self.action in ['retrieve', 'batch']:
+            # Catégorie et fournisseurs imbriqués : leurs N premiers produits
+            # préchargés en une requête chacun (app/prefetch.py) ; avis en sous-requêtes
+            queryset = ProductDetailSerializer.annotate_queryset(with_available_stock(queryset))
+            queryset = queryset.select_related('category').prefetch_related(
+                prefetch_top(Category, 'products', PRODUCT_NAMES_LIMIT, queryset=Product.objects.only('pk', 'name', 'category'),
+                             prefix='category__'),
+                Prefetch('supplier', queryset=Supplier.objects.annotate(products_count=Count('products')).prefetch_related(
+                    prefetch_top(Supplier, 'products', PRODUCT_NAMES_LIMIT, queryset=Product.objects.only('pk', 'name'))
+                )),
+            )
+        elif self.action == 'list':
+            # category_name : jointure plutôt qu'une requête par produit (liste DRF,
+            # FAST_LIST_SERIALIZERS = False) ; colonnes réduites par ReadColumnsMixin ;
+            # in_stock lit le stock disponible annoté (app/inventory.py)
+            queryset = with_available_stock(queryset.select_related('category'))
         return queryset
+
+    def perform_create(self, serializer):
+        """Miniatures générées en tâche de fond dès l'upload de l'image"""
+        product = serializer.save()
+        if product.image:
+            self.enqueue_image_variants(product.image.name)
+
+    def perform_update(self, serializer):
+        product = serializer.save()
+        if 'image' in serializer.validated_data and product.image:
+            self.enqueue_image_variants(product.image.name)
+
+    def enqueue_image_variants(self, name):
+        enqueue('images.generate_variants', {'name': name}, idempotency_key=f"images.generate_variants:{name}")
     
-    # TODO: Action 'low_stock' - GET /api/products/low_stock/
-    # Retourner les produits avec stock < 10
-    # @action(detail=False, methods=['get'])
-    # def low_stock(self, request):
-    #     pass
+    @action(detail=False, methods=['get', 'post'])
+    def batch(self, request):
+        """
+        GET /api/v1/product/batch/?ids=3,1,2   ou   POST {"ids": [3, 1, 2]}
+        Détails de plusieurs produits en un nombre fixe de requêtes, dans
+        l'ordre demandé ; les ids inexistants sont listés dans `missing`
+        """
+        if request.method == 'GET':
+            raw = request.query_params.get('ids', '')
+            data = {'ids': [value for value in raw.split(',') if value.strip()]}
+        else:
+            data = request.data
+        ids_serializer = ProductIdsSerializer(data=data)
+        ids_serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(ids_serializer.validated_data['ids']))  # sans doublons, ordre conservé
+
+        products = {product.pk: product for product in self.get_queryset().filter(pk__in=ids)}
+        serializer = self.get_serializer([products[pk] for pk in ids if pk in products], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in products],
+        })
+
+    @action(detail=False, methods=['get'])
+    def low_stock(self, request):
+        """
+        GET /api/v1/product/low_stock/
+        Produits sous le seuil de leur catégorie (index partiel, pas de scan)
+        """
+        products = low_stock_products().select_related('category')
+        serializer = LowStockProductSerializer(products, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='stock-movements')
+    def stock_movements(self, request, pk=None):
+        """
+        GET /api/v1/product/{id}/stock-movements/?limit=100
+        Historique des mouvements de stock, du plus récent au plus ancien
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', 100)), 1000)
+        except ValueError:
+            return Response({'error': 'limit doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+        movements = StockMovement.objects.filter(product_id=pk).order_by('-pk')[:limit]
+        return Response(StockMovementSerializer(movements, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='stock-alerts')
+    def stock_alerts(self, request):
+        """
+        GET /api/v1/product/stock-alerts/?after=<id>&limit=100
+        Flux des franchissements de seuil : repasser le `cursor` renvoyé
+        en `after` pour ne lire que les nouvelles alertes
+        """
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = min(int(request.query_params.get('limit', 100)), 1000)
+        except ValueError:
+            return Response({'error': 'after et limit doivent être des entiers'}, status=status.HTTP_400_BAD_REQUEST)
+        alerts = list(alerts_after(after, limit))
+        return Response({
+            'results': StockAlertSerializer(alerts, many=True).data,
+            'cursor': alerts[-1].pk if alerts else after,
+        })
     
     # TODO: Action 'by_category' - GET /api/products/by_category/?category_id=1
     # Filtrer par catégorie via query parameter
@@ -245,6 +393,27 @@ class ProductViewApi(viewsets.ModelViewSet):
 
 
 
+class ProductImageView(generics.GenericAPIView):
+    """
+    🖼️ GET /api/v1/product/{id}/image/{variante}.{webp|jpg}
+
+    Sert une variante redimensionnée de l'image du produit, générée et mise
+    en cache disque à la première demande si elle n'existe pas encore. L'URL
+    ne change pas quand l'image est remplacée : revalidée à chaque usage.
+    """
+    queryset = Product.objects.only('pk', 'image')
+    throttle_scope = 'catalog'
+
+    def get(self, request, pk, variant, ext):
+        if variant not in get_variants() or ext not in FORMATS:
+            raise Http404
+        product = self.get_object()
+        if not product.image:
+            raise Http404
+
+        return media_response(request, ensure_variant(product.image.name, variant, ext), cache_control=REVALIDATE)
+
+
 # ============================================================================
 # 📁 REVIEW VIEWSET
 # ============================================================================
@@ -255,20 +424,12 @@ class ProductViewApi(viewsets.ModelViewSet):
 # - Tri sur 'created_at', 'rating'
 # - Permissions : IsAuthenticated
 # - perform_create() : Associer automatiquement l'utilisateur connecté           
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SerializerByActionMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
+    throttle_scope = 'catalog'
     
-    def get_serializer_class(self):
-        if self.action in ['create','update','partial_update']:
-            from .serializers import ReviewCreateSerializer
-            return ReviewCreateSerializer
-        elif self.action == 'list':
-            from .serializers import ReviewListSerializer
-            return ReviewListSerializer
-        else:
-            from .serializers import ReviewDetailSerializer
-
-            return ReviewDetailSerializer
+    serializer_class = ReviewDetailSerializer
+    serializer_classes = {**dict.fromkeys(WRITE_ACTIONS, ReviewCreateSerializer), 'list': ReviewListSerializer}
     # def perform_create(self, serializer):
     #     """
     #     TODO : Lors de la création, associer automatiquement l'utilisateur connecté
@@ -291,42 +452,44 @@ from rest_framework.decorators import action
 # ============================================================================
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(FastListMixin, SerializerByActionMixin, viewsets.ModelViewSet):
     """
     🛒 ViewSet pour gérer les commandes
     """
     queryset = Order.objects.all()
+    fast_list_serializer_class = OrderListFastSerializer
+    throttle_scopes = {'create': 'checkout', 'add_item': 'checkout'}
     # permission_classes = [IsAuthenticated]
     # filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     # filterset_fields = ['user', 'client', 'status']
     # ordering_fields = ['created_at', 'status']
     # ordering = ['-created_at']
 
-    def get_serializer_class(self):
-        """Retourne le serializer selon l'action"""
-        if self.action in ['create', 'update', 'partial_update']:
-            return OrderCreateSerializer
-        elif self.action == 'list':
-            return OrderListSerializer
-        else:
-            return OrderDetailSerializer
+    serializer_class = OrderDetailSerializer
+    serializer_classes = {**dict.fromkeys(WRITE_ACTIONS, OrderCreateSerializer), 'list': OrderListSerializer}
 
     def get_queryset(self):
         """
         Optimisations :
         - select_related pour user et client
-        - prefetch_related pour items__product
+        - prefetch_related pour items__product (stock disponible annoté : in_stock sans requête par produit)
         """
-        queryset = super().get_queryset().select_related('user', 'client').prefetch_related('items__product')
+        queryset = super().get_queryset().select_related('user', 'client').prefetch_related(
+            Prefetch('items__product', queryset=with_available_stock(Product.objects.all()))
+        )
         return queryset
     
+    @idempotent
     def create(self, request, *args, **kwargs):
-        """Crée une commande + ses items"""
+        """Crée une commande + ses items (en-tête Idempotency-Key : pas de doublon sur réessai)"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         order = serializer.save(user=request.user)
+        schedule_sales_refresh()
 
-        # Retourne les détails complets après création
+        # Retourne les détails complets après création, relus avec les
+        # select_related / prefetch de get_queryset (pas un SELECT produit par ligne)
+        order = self.get_queryset().get(pk=order.pk)
         detail_serializer = OrderDetailSerializer(order, context={'request': request})
         return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
 
@@ -335,29 +498,49 @@ class OrderViewSet(viewsets.ModelViewSet):
         """Associer l'utilisateur connecté à la commande"""
         serializer.save(user=self.request.user)
 
+    def perform_update(self, serializer):
+        serializer.save()
+        schedule_sales_refresh()
+
+    def perform_destroy(self, instance):
+        day = timezone.localdate(instance.created_at)
+        instance.delete()
+        schedule_sales_refresh(deleted_day=day)
+
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         order = self.get_object()
-        if getattr(order, 'status', None) == Order.StatusChoices.PENDING:
-            order.status = Order.StatusChoices.CONFIRMED
-            order.save()
+        if confirm_orders([order.pk]):
             return Response({'status': 'Commande confirmée'})
         return Response({'error': "La commande ne peut pas être confirmée"}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
+        """Annule la commande et rend le stock réservé (app/orders.py)"""
         order = self.get_object()
-        if getattr(order, 'status', None) not in [Order.StatusChoices.CANCELLED, Order.StatusChoices.DELIVERED]:
-            order.status = Order.StatusChoices.CANCELLED
-            order.save()
+        if cancel_orders([order.pk]):
             return Response({'status': 'Commande annulée'})
         return Response({'error': "La commande ne peut pas être annulée"}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-cancel', permission_classes=[IsAdminUser])
+    def bulk_cancel(self, request):
+        """
+        POST /api/v1/orders/bulk-cancel/  {"order_ids": [...]}
+        Annulation en masse : un UPDATE et un INSERT groupé, pas d'aller-retour par commande
+        """
+        serializer = OrderIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = serializer.validated_data['order_ids']
+        cancelled = cancel_orders(requested)
+        return Response({'cancelled': cancelled, 'skipped': len(set(requested)) - len(cancelled)})
+
     @action(detail=True, methods=['post'])
+    @idempotent
     def add_item(self, request, pk=None):
         """
         Ajouter un produit à la commande.
         Attendu en body: product_id, quantity
+        En-tête Idempotency-Key : un réessai renvoie la ligne déjà ajoutée (app/idempotency.py)
         """
         order = self.get_object()
         product_id = request.data.get('product_id')
@@ -370,22 +553,24 @@ class OrderViewSet(viewsets.ModelViewSet):
             quantity = int(quantity)
         except (TypeError, ValueError):
             return Response({'error': 'quantity doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+        if quantity < 1:
+            return Response({'error': 'quantity doit être positive'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             product = Product.objects.get(pk=product_id)
         except Product.DoesNotExist:
             return Response({'error': 'Produit introuvable'}, status=status.HTTP_404_NOT_FOUND)
 
-        if product.stock < quantity:
+        try:
+            with transaction.atomic():
+                # Décrément conditionnel : pas de survente sous concurrence
+                decrement_stock(product, quantity, order=order)
+                order_item = OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        except InsufficientStock:
             return Response({'error': 'Stock insuffisant'}, status=status.HTTP_400_BAD_REQUEST)
+        schedule_sales_refresh()
 
-        # Créer l'OrderItem
-        order_item = OrderItem.objects.create(order=order, product=product, quantity=quantity)
-        # Décrémenter le stock
-        product.stock = product.stock - quantity
-        product.save()
-
-        serializer = OrderItemDetailSerializer(order_item)
+        serializer = OrderItemDetailSerializer(order_item, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['get'])
@@ -400,7 +585,7 @@ class OrderViewSet(viewsets.ModelViewSet):
 # 📁 ORDERITEM VIEWSET
 # ============================================================================
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(SerializerByActionMixin, viewsets.ModelViewSet):
     """
     📦 ViewSet pour gérer les articles de commande
     """
@@ -411,18 +596,25 @@ class OrderItemViewSet(viewsets.ModelViewSet):
     # ordering_fields = ['created_at']
     # ordering = ['-created_at']
 
-    def get_serializer_class(self):
-        if self.action in ['create', 'update', 'partial_update']:
-            return OrderItemCreateSerializer
-        elif self.action == 'list':
-            return OrderItemListSerializer
-        else:
-            return OrderItemDetailSerializer
+    serializer_class = OrderItemDetailSerializer
+    serializer_classes = {**dict.fromkeys(WRITE_ACTIONS, OrderItemCreateSerializer), 'list': OrderItemListSerializer}
 
     def get_queryset(self):
-        """Optimisations avec select_related"""
-        queryset = super().get_queryset().select_related('order', 'product')
-        return queryset
+        """
+        Optimisations :
+        - select_related pour order
+        - Prefetch du produit avec le stock disponible annoté (in_stock de
+          ProductListSerializer sans requête par ligne)
+        """
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.select_related('order', 'product')
+        # Détail : produit imbriqué (ProductListSerializer) et commande imbriquée
+        # (OrderListSerializer : client, nombre de lignes et total)
+        return queryset.select_related('order__client').prefetch_related(
+            Prefetch('product', queryset=with_available_stock(Product.objects.select_related('category'))),
+            'order__items__product',
+        )
 
     def perform_create(self, serializer):
         """
@@ -430,9 +622,186 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         """
         product = serializer.validated_data.get('product')
         quantity = serializer.validated_data.get('quantity', 0)
-        if product.stock < quantity:
+        try:
+            with transaction.atomic():
+                # Décrémenter le stock (conditionnel, atomique) et sauvegarder
+                decrement_stock(product, quantity, order=serializer.validated_data.get('order'))
+                serializer.save()
+        except InsufficientStock:
             raise rf_serializers.ValidationError("Stock insuffisant")
-        # Décrémenter le stock et sauvegarder
-        product.stock = product.stock - quantity
-        product.save()
+        schedule_sales_refresh()
+
+    def perform_update(self, serializer):
         serializer.save()
+        schedule_sales_refresh()
+
+    def perform_destroy(self, instance):
+        day = timezone.localdate(instance.order.created_at)
+        instance.delete()
+        schedule_sales_refresh(deleted_day=day)
+
+
+# ============================================================================
+# 📊 RAPPORTS DE VENTES (agrégats journaliers, voir app/reports.py)
+# ============================================================================
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    📊 Rapports lus uniquement dans les tables d'agrégats :
+    - GET /api/v1/reports/daily/      : commandes, unités et CA par jour
+    - GET /api/v1/reports/categories/ : CA par catégorie
+    - GET /api/v1/reports/products/   : meilleurs produits
+    - GET /api/v1/reports/throttling/ : refus de la limitation de débit (app/throttling.py)
+
+    ?start / ?end (défaut : les REPORTS_DEFAULT_DAYS derniers jours),
+    ?status (défaut : toutes les commandes sauf annulées), ?limit.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get_params(self, request):
+        serializer = ReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        params.setdefault('end', timezone.localdate())
+        params.setdefault('start', params['end'] - timedelta(days=getattr(settings, 'REPORTS_DEFAULT_DAYS', 30) - 1))
+        return params
+
+    def filter_rollups(self, queryset, params):
+        queryset = queryset.filter(day__range=(params['start'], params['end']))
+        if 'status' in params:
+            return queryset.filter(status=params['status'])
+        return queryset.exclude(status=Order.StatusChoices.CANCELLED)
+
+    def report(self, params, rows):
+        return Response({'start': params['start'], 'end': params['end'], 'results': list(rows)})
+
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        params = self.get_params(request)
+        rows = (
+            self.filter_rollups(DailyOrderSummary.objects.all(), params)
+            .values('day')
+            .annotate(orders=Sum('orders_count'), units=Sum('units'), revenue=Sum('revenue'))
+            .order_by('day')
+        )
+        return self.report(params, rows)
+
+    @action(detail=False, methods=['get'])
+    def categories(self, request):
+        params = self.get_params(request)
+        rows = (
+            self.filter_rollups(DailyProductSales.objects.all(), params)
+            .values('category_id', category_name=F('category__name'))
+            .annotate(units=Sum('units'), revenue=Sum('revenue'))
+            .order_by('-revenue', 'category_id')[:params['limit']]
+        )
+        return self.report(params, rows)
+
+    @action(detail=False, methods=['get'])
+    def products(self, request):
+        params = self.get_params(request)
+        rows = (
+            self.filter_rollups(DailyProductSales.objects.all(), params)
+            .values('product_id', product_name=F('product__name'))
+            .annotate(units=Sum('units'), revenue=Sum('revenue'), orders=Sum('orders_count'))
+            .order_by('-revenue', 'product_id')[:params['limit']]
+        )
+        return self.report(params, rows)
+
+    @action(detail=False, methods=['get'])
+    def throttling(self, request):
+        """Refus de la limitation de débit par portée : ce processus et tous (cache partagé)"""
+        return Response({'process': rejection_counts(), 'shared': shared_rejection_counts()})
+
+
+# ============================================================================
+# 🏆 CLASSEMENTS (instantanés enregistrés, voir app/leaderboards.py)
+# ============================================================================
+
+class LeaderboardViewSet(viewsets.ViewSet):
+    """
+    🏆 Classements servis depuis leurs instantanés (?window=7d|30d|all, ?limit=10) :
+    - GET /api/v1/leaderboards/categories/ : catégories avec le plus de produits
+    - GET /api/v1/leaderboards/top-sold/   : produits les plus vendus
+    - GET /api/v1/leaderboards/top-rated/  : produits les mieux notés
+    """
+    throttle_scope = 'catalog'
+
+    def leaderboard(self, request, board):
+        serializer = LeaderboardQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        window, limit = serializer.validated_data['window'], serializer.validated_data['limit']
+        return Response({'window': window, **get_leaderboard(board, window, limit)})
+
+    @action(detail=False, methods=['get'])
+    def categories(self, request):
+        return self.leaderboard(request, 'categories')
+
+    @action(detail=False, methods=['get'], url_path='top-sold')
+    def top_sold(self, request):
+        return self.leaderboard(request, 'top-sold')
+
+    @action(detail=False, methods=['get'], url_path='top-rated')
+    def top_rated(self, request):
+        return self.leaderboard(request, 'top-rated')
+
+
+# ============================================================================
+# 📦 ÉCRITURE EN MASSE (back-office, voir app/bulk.py)
+# ============================================================================
+
+class CategoryBulkView(BulkWriteView):
+    """
+    📦 POST / PATCH / DELETE /api/v1/bulk/categories/
+    """
+    serializer_class = CategorySerializer
+    queryset = Category.objects.all()
+
+    def prepare_instance(self, obj):
+        obj.set_default_description()
+
+
+class SupplierBulkView(BulkWriteView):
+    """
+    📦 POST / PATCH / DELETE /api/v1/bulk/suppliers/
+    """
+    serializer_class = SupplierCreateSerializer
+    queryset = Supplier.objects.all()
+
+
+class ClientBulkView(BulkWriteView):
+    """
+    📦 POST / PATCH / DELETE /api/v1/bulk/clients/
+    """
+    serializer_class = ClientBulkSerializer
+    queryset = Client.objects.all()
+
+    def check_rows(self, rows, instances):
+        # Unicité de l'email sans tenir compte de la casse (comme Client.save),
+        # sur l'état du lot après écriture : chaque ligne contre les autres
+        # lignes, puis contre la base en une requête. Un email en base ne
+        # bloque ni la ligne de son propre client, ni une autre ligne si la
+        # ligne (acceptée) de son client lui donne un autre email ; refuser une
+        # ligne peut en bloquer d'autres, d'où les passes jusqu'à stabilité
+        emails = {index: data['email'].lower() for index, data in rows if data.get('email')}
+        row_pks = {index: self.request.data[index]['id'] for index, _ in rows} if instances is not None else {}
+        owners = Client.email_owners(emails.values())
+        errors = {}
+        while True:
+            new_emails = {row_pks[index]: email for index, email in emails.items()
+                          if index in row_pks and index not in errors}
+            seen = set()
+            found = {}
+            for index, email in emails.items():
+                if index in errors:
+                    continue
+                owner = owners.get(email)
+                if owner is not None and owner != row_pks.get(index) and new_emails.get(owner, email) == email:
+                    found[index] = {'email': ["Un client avec cet email existe déjà."]}
+                elif email in seen:
+                    found[index] = {'email': ["Email présent deux fois dans le lot."]}
+                else:
+                    seen.add(email)
+            if not found:
+                return errors
+            errors.update(found)
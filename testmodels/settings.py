@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from datetime import timedelta
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,12 +44,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.middleware.QueryInspectorMiddleware',
+    'app.middleware.SerializerProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'testmodels.urls'
@@ -141,7 +145,139 @@ STATIC_URL = 'static/'
 MEDIA_URL ='/media/'
 MEDIA_ROOT =os.path.join(BASE_DIR,'media')
 
+# Service des médias (app/media.py) : 'django' (FileResponse + Range),
+# 'x-accel' (nginx) ou 'x-sendfile' (Apache / lighttpd)
+MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_PREFIX = '/protected-media/'  # location nginx `internal` pointant sur MEDIA_ROOT
+MEDIA_CACHE_MAX_AGE = 86400
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Django REST Framework
+# Rendu / parsing JSON via orjson (app/renderers.py), sortie identique au JSONRenderer
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'app.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Seau à jetons par route et par client (app/throttling.py, débits plus bas)
+    'DEFAULT_THROTTLE_CLASSES': ['app.throttling.TokenBucketThrottle'],
+}
+
+
+# Détection des requêtes SQL lentes et répétées (N+1) - développement / staging
+# Voir app/query_inspector.py ; activée à la demande (QUERY_INSPECTOR_ENABLED=True),
+# rapports sur le logger 'app.queries'
+
+QUERY_INSPECTOR_ENABLED = os.getenv('QUERY_INSPECTOR_ENABLED', 'False') == 'True'
+QUERY_INSPECTOR_REPEAT_THRESHOLD = 3  # même forme de requête >= 3 fois = N+1 probable
+QUERY_INSPECTOR_SLOW_MS = 100
+QUERY_INSPECTOR_RAISE = False  # True : lève NPlusOneError au lieu de seulement logger
+
+
+# Profilage des serializers champ par champ (en-tête Server-Timing)
+# Voir app/serializer_profiling.py et `python manage.py profile_serializers`
+
+SERIALIZER_PROFILING = os.getenv('SERIALIZER_PROFILING', 'False') == 'True'
+
+
+# Listes produits / commandes rendues par app/fast_serializers.py (values_list)
+# au lieu des ModelSerializer - sortie identique
+
+FAST_LIST_SERIALIZERS = True
+
+
+# Compression des réponses (app/compression.py) : br si Brotli est installé, sinon gzip
+
+COMPRESSION_MIN_SIZE = 1024  # octets ; en dessous, la compression ne rapporte rien
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5  # 0-11 ; au-delà de 5-6 le coût CPU explose
+
+
+# Tâches de fond (app/tasks.py) exécutées par `python manage.py run_jobs`
+
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'  # True : exécution dans le processus web après commit
+JOBS_STALE_AFTER = timedelta(minutes=10)  # tâche RUNNING sans nouvelles = worker mort, remise en file (> plus longue tâche)
+JOBS_SWEEP_INTERVAL = 60  # secondes entre deux recherches de tâches bloquées par chaque worker
+JOBS_KEEP_DONE = timedelta(days=7)
+
+
+# Rapports de ventes (app/reports.py) : agrégats journaliers recalculés en tâche de fond
+
+REPORTS_DEFAULT_DAYS = 30  # fenêtre par défaut de /api/v1/reports/...
+REPORTS_WATERMARK_OVERLAP = timedelta(minutes=5)  # marge pour les transactions validées en retard
+
+
+# Classements (app/leaderboards.py) : instantanés dans la table LeaderboardSnapshot,
+# partagés par le worker et les processus web
+
+LEADERBOARDS_WINDOWS = {'7d': 7, '30d': 30, 'all': None}  # nom -> nombre de jours (None : tout)
+LEADERBOARDS_SIZE = 50  # lignes conservées par classement (limit maximal)
+LEADERBOARDS_TTL = 3600  # secondes ; au-delà, recalculé par la requête qui le lit (plus tôt par le worker après chaque recalcul des ventes)
+LEADERBOARDS_MIN_REVIEWS = 3  # avis minimum pour figurer dans le classement des notes
+
+
+# Journal des mouvements de stock (app/inventory.py)
+
+INVENTORY_COMPACT_DELAY = 10  # secondes entre un mouvement et sa compaction dans Product.stock
+
+
+# Expiration des paniers abandonnés (app/orders.py) : tâche 'orders.expire_pending' mise en
+# file par les workers (run_jobs), ou `python manage.py expire_pending_orders` par cron
+
+ORDERS_PENDING_TTL = timedelta(hours=24)  # au-delà, une commande en attente est annulée
+ORDERS_EXPIRE_BATCH = 500  # commandes par transaction : verrous tenus brièvement
+ORDERS_EXPIRE_INTERVAL = timedelta(minutes=15)  # une expiration en file par intervalle
+
+
+# Détail client : nombre de commandes récentes incluses (le reste via /client/{id}/orders/)
+
+CLIENT_RECENT_ORDERS = 5
+
+
+# Lecture groupée de produits (/api/v1/product/batch/)
+
+PRODUCT_BATCH_MAX = 200
+
+
+# Écriture en masse (/api/v1/bulk/categories|suppliers|clients/, voir app/bulk.py)
+
+BULK_MAX_ROWS = 5000  # lignes au plus par requête
+BULK_CHUNK_SIZE = 500  # lignes par INSERT / UPDATE, chacun dans sa transaction
+
+
+# Clés d'idempotence (en-tête Idempotency-Key sur POST /orders/ et /orders/{id}/add_item/)
+
+IDEMPOTENCY_TTL = timedelta(hours=24)  # durée pendant laquelle un réessai reçoit la réponse mémorisée
+
+
+# Limitation de débit (app/throttling.py) : requêtes par client (utilisateur ou IP)
+# et par portée ; une vue choisit sa portée avec throttle_scope / throttle_scopes
+
+THROTTLE_RATES = {
+    'default': '1200/min',
+    'catalog': '600/min',  # produits, catégories, fournisseurs, avis, classements
+    'checkout': '30/min',  # création de commande, ajout d'article
+    'client-detail': '60/min',  # détail client : agrégats sur toutes ses commandes
+    'bulk': '30/min',  # écriture en masse du back-office
+}
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True') == 'True'  # False : aucune limitation (les tests l'activent au cas par cas)
+THROTTLE_BACKEND = os.getenv('THROTTLE_BACKEND', 'local')  # 'cache' : seaux partagés entre processus
+THROTTLE_CACHE = 'default'  # alias dans CACHES pour THROTTLE_BACKEND = 'cache'
+THROTTLE_LOG_EVERY = 100  # un avertissement tous les N refus par portée
+
+
+# Démarrage à froid (app/startup.py, `python manage.py profile_startup`) : budget
+# vérifié par app/tests.py (avec STARTUP_BUDGET_TEST=1), de l'interpréteur neuf à l'application WSGI prête
+
+STARTUP_BUDGET = 2.0  # secondes
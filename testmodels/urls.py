@@ -16,14 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
 from django.conf import settings
+from app import media
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/',include('app.urls')),
-  
-]
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Médias servis aussi en production : X-Accel-Redirect / X-Sendfile ou FileResponse (app/media.py)
+    path(settings.MEDIA_URL.lstrip('/') + '<path:path>', media.serve, name='media'),
+]
\ No newline at end of file